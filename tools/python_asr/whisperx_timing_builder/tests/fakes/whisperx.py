@@ -0,0 +1,55 @@
+"""Minimal stand-in for the parts of the whisperx API the tool uses; records every call."""
+
+CALLS = {"load_model": 0, "load_align_model": 0, "load_audio": 0, "transcribe": 0, "align": 0}
+TRANSCRIBE_OPTIONS = []
+
+
+def reset():
+    for key in CALLS:
+        CALLS[key] = 0
+    TRANSCRIBE_OPTIONS.clear()
+
+
+class FakeModel:
+    def __init__(self, language):
+        self.language = language
+
+    def transcribe(self, audio, language=None, **kwargs):
+        CALLS["transcribe"] += 1
+        TRANSCRIBE_OPTIONS.append(dict(kwargs, language=language))
+        return {
+            "language": language or self.language or "en",
+            "segments": [
+                {"start": 0.0, "end": 1.5, "text": " hello "},
+                {"start": 2.0, "end": 3.0, "text": "world"},
+            ],
+        }
+
+
+def load_model(name, device, compute_type=None, language=None):
+    CALLS["load_model"] += 1
+    return FakeModel(language)
+
+
+def load_audio(path):
+    CALLS["load_audio"] += 1
+    if path.endswith("broken.wav"):
+        raise RuntimeError("Failed to load audio")
+    return [0.0] * 16000
+
+
+def load_align_model(language_code, device):
+    CALLS["load_align_model"] += 1
+    return {"language": language_code}, {"language": language_code}
+
+
+def align(segments, model, metadata, audio, device, return_char_alignments=False):
+    CALLS["align"] += 1
+    for item in segments:  # like the real align, annotate the caller's segment dicts in place
+        item["words"] = [{"word": item["text"].strip(), "start": item["start"], "end": item["end"]}]
+    return {
+        "segments": [dict(item) for item in segments],
+        "word_segments": [
+            {"word": item["text"].strip(), "start": item["start"], "end": item["end"]} for item in segments
+        ],
+    }
@@ -0,0 +1,331 @@
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "tests" / "fakes"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import whisperx  # the fake from tests/fakes
+
+from whisperx_timing_builder import (
+    ArtifactCache,
+    AudioChunk,
+    ChunkOptions,
+    PrefetchingDecoder,
+    ResidentWorker,
+    WhisperXService,
+    _build_parser,
+    _chunking_from_args,
+    _client_job,
+    main,
+    merge_chunk_segments,
+    plan_chunks,
+)
+
+try:
+    import numpy
+except ImportError:  # numpy ships with whisperx; only the chunking tests need it
+    numpy = None
+
+
+class ResidentWorkerTests(unittest.TestCase):
+    def setUp(self):
+        whisperx.reset()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.workdir = Path(self.tmp.name)
+        (self.workdir / "a.wav").write_bytes(b"RIFF")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def worker(self, align_cache_size=2):
+        return ResidentWorker(WhisperXService("cpu", "tiny", "int8", "en", align_cache_size=align_cache_size))
+
+    def job(self, command, **extra):
+        return {"command": command, "workdir": str(self.workdir), "audio": "a.wav", **extra}
+
+    def test_models_are_loaded_once_and_align_models_are_lru_cached(self):
+        worker = self.worker(align_cache_size=2)
+        for _ in range(2):
+            self.assertTrue(worker.handle(self.job("transcribe"))["ok"])
+        for language in ("en", "de", "en"):
+            self.assertTrue(worker.handle(self.job("align", language=language))["ok"])
+
+        self.assertEqual(1, whisperx.CALLS["load_model"])
+        self.assertEqual(2, whisperx.CALLS["transcribe"])
+        self.assertEqual(2, whisperx.CALLS["load_align_model"])
+        self.assertEqual(3, whisperx.CALLS["load_audio"])  # only the first align reuses the transcribe waveform
+        aligned = json.loads((self.workdir / "out" / "aligned.json").read_text(encoding="utf-8"))
+        self.assertEqual("hello", aligned["segments"][0]["text"])
+
+        small = self.worker(align_cache_size=1)
+        for language in ("en", "de", "en"):
+            small.handle(self.job("align", language=language))
+        self.assertEqual(5, whisperx.CALLS["load_align_model"])
+
+    def test_serve_lines_reports_errors_and_stops_on_shutdown(self):
+        worker = self.worker()
+        lines = [
+            "not json",
+            json.dumps({"id": 1, "command": "explode"}),
+            json.dumps({"id": 2, **self.job("transcribe", audio="missing.wav")}),
+            json.dumps({"id": 3, **self.job("transcribe")}),
+            json.dumps({"id": 4, "command": "blocks", "workdir": str(self.workdir), "maxBlockChars": 5}),
+            json.dumps({"id": 5, "command": "shutdown"}),
+            json.dumps({"id": 6, **self.job("transcribe")}),
+        ]
+        written = []
+        worker.serve_lines(lines, written.append)
+        responses = [json.loads(text) for text in written]
+
+        self.assertEqual([None, 1, 2, 3, 4, 5], [item["id"] for item in responses])
+        self.assertEqual([False, False, False, True, True, True], [item["ok"] for item in responses])
+        self.assertIn("Audio file does not exist", responses[2]["error"])
+        blocks = json.loads((self.workdir / "out" / "blocks.json").read_text(encoding="utf-8"))
+        self.assertEqual(2, len(blocks))
+        self.assertEqual(1, whisperx.CALLS["transcribe"])
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX") and shutil.which("ffmpeg"), "needs Unix sockets and ffmpeg")
+    def test_client_round_trip_over_unix_socket(self):
+        socket_path = str(self.workdir / "worker.sock")
+        serve_args = ["serve", "--socket", socket_path, "--model", "tiny", "--language", "en", "--no-cache"]
+        with redirect_stderr(StringIO()):
+            server = threading.Thread(target=main, args=(serve_args,))
+            server.start()
+            deadline = time.monotonic() + 10
+            while not Path(socket_path).exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            common = ["--socket", socket_path, "--workdir", str(self.workdir), "--audio", "a.wav"]
+            with redirect_stdout(StringIO()) as out:
+                self.assertEqual(0, main(["client", "transcribe", *common]))
+                self.assertEqual(0, main(["client", "align", *common]))
+                self.assertEqual(0, main(["client", "shutdown", "--socket", socket_path]))
+            server.join(timeout=10)
+
+        self.assertFalse(server.is_alive())
+        self.assertIn("aligned.json", out.getvalue())
+        self.assertEqual(1, whisperx.CALLS["load_model"])
+        self.assertEqual(1, whisperx.CALLS["load_audio"])  # align reuses the waveform decoded for transcribe
+
+    def test_serve_refuses_to_replace_a_file_that_is_not_a_socket(self):
+        regular = self.workdir / "notes.txt"
+        regular.write_text("keep me", encoding="utf-8")
+        with redirect_stderr(StringIO()) as err:
+            self.assertEqual(2, main(["serve", "--socket", str(regular), "--model", "tiny", "--no-cache"]))
+        self.assertIn("not a socket", err.getvalue())
+        self.assertEqual("keep me", regular.read_text(encoding="utf-8"))
+        self.assertEqual(0, whisperx.CALLS["load_model"])
+
+    def test_client_blocks_input_is_relative_to_the_workdir(self):
+        argv = ["client", "blocks", "--socket", "w.sock", "--workdir", str(self.workdir), "--input", "out/aligned.json"]
+        job = _client_job(_build_parser().parse_args(argv))
+        self.assertEqual(str((self.workdir / "out" / "aligned.json").resolve()), job["input"])
+
+
+class RunCommandTests(unittest.TestCase):
+    def setUp(self):
+        whisperx.reset()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.workdir = Path(self.tmp.name)
+        (self.workdir / "a.wav").write_bytes(b"RIFF")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_pipeline(self, *extra):
+        argv = ["run", "--workdir", str(self.workdir), "--audio", "a.wav", "--model", "tiny"]
+        argv += ["--cache-dir", str(self.workdir / "cache"), *extra]
+        with mock.patch("whisperx_timing_builder.shutil.which", return_value="/usr/bin/ffmpeg"):
+            return main(argv)
+
+    def test_run_decodes_once_and_writes_every_artifact(self):
+        with redirect_stdout(StringIO()):
+            self.assertEqual(0, self.run_pipeline("--text-mode", "block_text"))
+
+        self.assertEqual(1, whisperx.CALLS["load_audio"])
+        self.assertEqual(1, whisperx.CALLS["transcribe"])
+        self.assertEqual(1, whisperx.CALLS["align"])
+        out = self.workdir / "out"
+        for name in ("transcript.json", "aligned.json", "blocks.json"):
+            self.assertTrue((out / name).exists(), name)
+        transcript = json.loads((out / "transcript.json").read_text(encoding="utf-8"))
+        self.assertNotIn("words", transcript["segments"][0])
+        cues = json.loads((out / "cues.template.json").read_text(encoding="utf-8"))
+        self.assertEqual([{"start": 0.0, "end": 3.0, "text": "hello world", "typingDuration": 0.0}], cues)
+
+    def test_align_leaves_the_transcript_untouched(self):
+        service = WhisperXService("cpu", "tiny", "int8", "en")
+        transcript = service.transcribe(self.workdir / "a.wav")
+        service.align(self.workdir / "a.wav", transcript)
+        self.assertNotIn("words", transcript["segments"][0])
+
+    def test_cached_stages_skip_models_and_decoding(self):
+        with redirect_stdout(StringIO()):
+            self.assertEqual(0, self.run_pipeline())
+            whisperx.reset()
+            with redirect_stdout(StringIO()) as out:
+                self.assertEqual(0, self.run_pipeline())
+            self.assertIn("Reused 2 cached stage result(s).", out.getvalue())
+            self.assertEqual(0, sum(whisperx.CALLS.values()))
+
+            self.assertEqual(0, self.run_pipeline("--language", "de"))
+            self.assertEqual(1, whisperx.CALLS["transcribe"])
+            (self.workdir / "a.wav").write_bytes(b"RIFF changed")
+            self.assertEqual(0, self.run_pipeline("--language", "de"))
+            self.assertEqual(2, whisperx.CALLS["transcribe"])
+            whisperx.reset()
+            self.assertEqual(0, self.run_pipeline("--no-cache"))
+        self.assertEqual(1, whisperx.CALLS["transcribe"])
+
+    def test_prune_evicts_old_entries_then_least_recently_used(self):
+        cache = ArtifactCache(self.workdir / "cache")
+        for index, age_days in enumerate((40, 3, 2, 1)):
+            cache.store("transcribe", f"k{index}", {"segments": ["x" * 100]})
+            stamp = time.time() - age_days * 86400
+            os.utime(cache.root / "transcribe" / f"k{index}.json", (stamp, stamp))
+        entry_size = (cache.root / "transcribe" / "k0.json").stat().st_size
+
+        removed, _ = cache.prune(max_age_seconds=30 * 86400)
+        self.assertEqual(1, removed)
+        self.assertIsNotNone(cache.load("transcribe", "k1"))  # refreshes k1, so k2 is now the oldest
+        removed, freed = cache.prune(max_bytes=2 * entry_size)
+        self.assertEqual((1, entry_size), (removed, freed))
+        self.assertEqual(["k1.json", "k3.json"], sorted(path.name for path in (cache.root / "transcribe").iterdir()))
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        whisperx.reset()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.workdir = Path(self.tmp.name)
+        for name in ("s1/ep01.wav", "s1/ep02.wav", "s2/ep01.wav", "s2/broken.wav"):
+            (self.workdir / name).parent.mkdir(parents=True, exist_ok=True)
+            (self.workdir / name).write_bytes(name.encode("utf-8"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_batch(self, *extra):
+        argv = ["batch", "--workdir", str(self.workdir), "--model", "tiny", "--batch-size", "4"]
+        argv += ["--cache-dir", str(self.workdir / "cache"), *extra]
+        with mock.patch("whisperx_timing_builder.shutil.which", return_value="/usr/bin/ffmpeg"):
+            with redirect_stdout(StringIO()), redirect_stderr(StringIO()) as err:
+                code = main(argv)
+        return code, err.getvalue()
+
+    def test_batch_shares_the_model_and_writes_per_file_outputs(self):
+        manifest = "# season two\ns2/ep01.wav\n\ns1/ep01.wav  # duplicate\n"
+        (self.workdir / "list.txt").write_text(manifest, encoding="utf-8")
+        code, _ = self.run_batch("--inputs", "s1/*.wav", "--manifest", "list.txt", "--prefetch", "2")
+
+        self.assertEqual(0, code)
+        self.assertEqual(1, whisperx.CALLS["load_model"])
+        self.assertEqual(3, whisperx.CALLS["load_audio"])
+        self.assertEqual({4}, {options["batch_size"] for options in whisperx.TRANSCRIBE_OPTIONS})
+        for name in ("s1/ep01", "s1/ep02", "s2/ep01"):
+            self.assertTrue((self.workdir / "out" / name / "transcript.json").exists(), name)
+
+    def test_batch_skips_decoding_cached_files(self):
+        self.assertEqual(0, self.run_batch("--inputs", "s1/*.wav")[0])
+        whisperx.reset()
+        self.assertEqual(0, self.run_batch("--inputs", "s1/*.wav")[0])
+        self.assertEqual(0, whisperx.CALLS["load_audio"])
+        self.assertEqual(0, whisperx.CALLS["transcribe"])
+
+    def test_batch_continues_past_a_failing_file(self):
+        code, err = self.run_batch("--inputs", "s2/*.wav")
+
+        self.assertEqual(2, code)
+        self.assertIn("1 of 2 file(s) failed", err)
+        self.assertTrue((self.workdir / "out" / "s2" / "ep01" / "transcript.json").exists())
+
+    def test_prefetching_decoder_keeps_at_most_depth_files_ahead(self):
+        started = []
+        paths = [Path(f"{index}.wav") for index in range(5)]
+        decoder = PrefetchingDecoder(lambda path: started.append(path) or path.name, paths, depth=2)
+
+        seen = []
+        for path, future in decoder:
+            self.assertEqual(path.name, future.result())
+            self.assertLessEqual(len(started), len(seen) + 3)
+            seen.append(path)
+        self.assertEqual(paths, seen)
+
+
+@unittest.skipIf(numpy is None, "needs numpy")
+class ChunkedTranscriptionTests(unittest.TestCase):
+    SILENCES = ((9.6, 10.4), (19.0, 19.8))
+
+    def waveform(self, seconds=25.0):
+        rng = numpy.random.default_rng(7)
+        audio = (rng.standard_normal(int(seconds * 16000)) * 0.3).astype(numpy.float32)
+        for start, end in self.SILENCES:
+            audio[int(start * 16000) : int(end * 16000)] = 0.0
+        return audio
+
+    def test_plan_cuts_inside_silences_with_overlap(self):
+        chunks = plan_chunks(self.waveform(), ChunkOptions(seconds=10.0, overlap=1.0, search=3.0))
+
+        self.assertEqual(3, len(chunks))
+        for chunk, (start, end) in zip(chunks, self.SILENCES):
+            self.assertTrue(start <= chunk.keep_to <= end, chunk)
+        self.assertAlmostEqual(chunks[0].keep_to - 1.0, chunks[1].start)
+        self.assertEqual(25.0, chunks[-1].end)
+        self.assertEqual([chunks[0].keep_to, chunks[1].keep_to], [chunks[1].keep_from, chunks[2].keep_from])
+
+    def test_merge_offsets_segments_and_drops_seam_duplicates(self):
+        chunks = [AudioChunk(0.0, 11.0, 0.0, 10.0), AudioChunk(9.0, 20.0, 10.0, float("inf"))]
+        results = [
+            [{"start": 8.0, "end": 9.5, "text": "left"}, {"start": 9.8, "end": 10.8, "text": "Seam"}],
+            [
+                {"start": 0.6, "end": 1.6, "text": "seam "},
+                {"start": 1.5, "end": 2.5, "text": "seam"},
+                {"start": 3.0, "end": 4.0, "text": "right"},
+            ],
+        ]
+
+        merged = merge_chunk_segments(chunks, results)
+
+        self.assertEqual(
+            [(8.0, 9.5, "left"), (9.6, 10.6, "seam"), (12.0, 13.0, "right")],
+            [(item["start"], item["end"], item["text"]) for item in merged],
+        )
+
+    def test_chunks_are_transcribed_in_worker_processes(self):
+        whisperx.reset()
+        chunking = ChunkOptions(seconds=10.0, overlap=1.0, search=3.0, workers=2)
+        service = WhisperXService("cpu", "tiny", "int8", "en", chunking=chunking)
+        with redirect_stderr(StringIO()):
+            transcript = service.transcribe(Path("unused.wav"), audio=self.waveform())
+
+        self.assertEqual(0, whisperx.CALLS["load_model"])  # the parent never loads the ASR model
+        self.assertEqual("en", transcript["language"])
+        self.assertEqual(["hello", "world", "world", "world"], [item["text"] for item in transcript["segments"]])
+        starts = [item["start"] for item in transcript["segments"]]
+        self.assertEqual(starts, sorted(starts))
+        self.assertGreater(starts[-1], 19.0)
+
+    def test_cuda_defaults_to_one_worker(self):
+        argv = ["transcribe", "--audio", "a.wav", "--chunk-seconds", "600"]
+        with mock.patch("whisperx_timing_builder.os.cpu_count", return_value=64):
+            self.assertEqual(16, _chunking_from_args(_build_parser().parse_args(argv)).workers)
+            self.assertEqual(1, _chunking_from_args(_build_parser().parse_args([*argv, "--device", "cuda"])).workers)
+            explicit = _build_parser().parse_args([*argv, "--device", "cuda", "--workers", "2"])
+            self.assertEqual(2, _chunking_from_args(explicit).workers)
+
+
+if __name__ == "__main__":
+    unittest.main()
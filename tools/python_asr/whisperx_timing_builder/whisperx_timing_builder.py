@@ -4,18 +4,44 @@
 from __future__ import annotations
 
 import argparse
+import copy
+import hashlib
 import importlib.util
 import json
+import multiprocessing
+import os
 import shutil
+import socket
+import socketserver
 import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 EXIT_OK = 0
 EXIT_ERROR = 2
 
+# whisperx.load_audio always resamples to 16 kHz mono float32.
+SAMPLE_RATE = 16000
+ENERGY_FRAME_SECONDS = 0.02
+ENERGY_SMOOTHING_FRAMES = 15
+
+# Part of every cache key: bump it whenever a stage's output format or normalization changes.
+TOOL_VERSION = "1.1"
+CACHE_DIR_HELP = "Stage cache directory (default: ~/.cache/whisperx_timing_builder)."
+
+BLOCK_DEFAULTS: Dict[str, float] = {
+    "gap_threshold": 1.2,
+    "max_block_duration": 25.0,
+    "max_block_chars": 240,
+    "min_block_duration": 2.0,
+}
+
 
 @dataclass
 class Segment:
@@ -24,6 +50,26 @@ class Segment:
     text: str
 
 
+@dataclass
+class ChunkOptions:
+    """Chunked transcription: windows of about ``seconds``, cut in the quietest spot within
+    ``search`` seconds of each target boundary and extended by ``overlap`` on both sides."""
+
+    seconds: float
+    overlap: float = 2.0
+    search: float = 30.0
+    workers: int = 1
+    worker_threads: Optional[int] = None
+
+
+@dataclass
+class AudioChunk:
+    start: float
+    end: float
+    keep_from: float
+    keep_to: float
+
+
 class CliError(Exception):
     """Handled CLI error with a user-facing message."""
 
@@ -36,10 +82,17 @@ class JsonIO:
 
     @staticmethod
     def write_json(path: Path, payload: Any) -> None:
+        JsonIO.write_text(path, JsonIO.dumps(payload))
+
+    @staticmethod
+    def dumps(payload: Any) -> str:
+        return json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+
+    @staticmethod
+    def write_text(path: Path, text: str) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
         with path.open("w", encoding="utf-8") as file:
-            json.dump(payload, file, ensure_ascii=False, indent=2)
-            file.write("\n")
+            file.write(text)
 
 
 class WorkdirContext:
@@ -61,7 +114,7 @@ class EnvironmentValidator:
     def __init__(self, context: WorkdirContext) -> None:
         self.context = context
 
-    def run(self) -> None:
+    def run(self, check_tools: bool = True) -> None:
         errors: List[str] = []
         if not self.context.workdir.exists() or not self.context.workdir.is_dir():
             errors.append(f"Workdir does not exist or is not a directory: {self.context.workdir}")
@@ -69,21 +122,144 @@ class EnvironmentValidator:
             errors.append("Audio path is required for validation.")
         elif not self.context.audio.exists():
             errors.append(f"Audio file does not exist: {self.context.audio}")
+        if check_tools:
+            errors.extend(self.tool_errors())
+
+        if errors:
+            raise CliError("\n".join(errors))
+
+    @staticmethod
+    def tool_errors() -> List[str]:
+        errors: List[str] = []
         if shutil.which("ffmpeg") is None:
             errors.append("ffmpeg is not available in PATH.")
         if importlib.util.find_spec("whisperx") is None:
             errors.append("Python package 'whisperx' is not importable in this environment.")
+        return errors
 
-        if errors:
-            raise CliError("\n".join(errors))
+
+class ArtifactCache:
+    """Content-addressed store of stage outputs under ``<root>/<stage>/<key>.json``.
+
+    Keys hash the audio bytes together with every parameter that changes the stage's output, so a
+    hit is always safe to reuse. Hits refresh the entry's mtime; ``prune`` evicts by age and then
+    oldest-first by total size.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.hits = 0
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+
+    def audio_digest(self, audio_path: Path) -> str:
+        stat = audio_path.stat()
+        memo_key = (str(audio_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if memo_key not in self._digests:
+            digest = hashlib.sha256()
+            with audio_path.open("rb") as file:
+                for chunk in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(chunk)
+            self._digests[memo_key] = digest.hexdigest()
+        return self._digests[memo_key]
+
+    def key(self, stage: str, audio_path: Path, **params: Any) -> str:
+        material = {"stage": stage, "audio": self.audio_digest(audio_path), "version": TOOL_VERSION, **params}
+        return hashlib.sha256(json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / stage / f"{key}.json"
+
+    def contains(self, stage: str, key: str) -> bool:
+        return self._path(stage, key).is_file()
+
+    def load(self, stage: str, key: str) -> Optional[Any]:
+        path = self._path(stage, key)
+        try:
+            payload = JsonIO.read_json(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return payload
+
+    def store(self, stage: str, key: str, payload: Any) -> None:
+        path = self._path(stage, key)
+        partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            JsonIO.write_json(partial, payload)
+            partial.replace(path)
+        except OSError as exc:
+            partial.unlink(missing_ok=True)
+            print(f"WARNING: Could not write cache entry {path}: {exc}", file=sys.stderr)
+
+    def prune(self, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None) -> Tuple[int, int]:
+        """Removes entries older than ``max_age_seconds``, then the least recently used ones until
+        the cache fits in ``max_bytes``. Returns the number of removed entries and freed bytes."""
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = freed = 0
+        for mtime, size, path in entries:
+            expired = max_age_seconds is not None and now - mtime > max_age_seconds
+            oversized = max_bytes is not None and total > max_bytes
+            if not (expired or oversized):
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+
+def _default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "whisperx_timing_builder"
 
 
 class WhisperXService:
-    def __init__(self, device: str, model_name: str, compute_type: str, language: str) -> None:
+    """Runs WhisperX stages; models are loaded on first use and kept for the lifetime of the service.
+
+    Alignment models are cached per language, keeping the ``align_cache_size`` most recently used.
+    ``batch_size`` is passed to ``model.transcribe`` when set (WhisperX's own default otherwise).
+    With a ``cache``, stage outputs are looked up before any model or audio is loaded. The most
+    recently decoded waveform is kept, so transcribing and then aligning one file decodes it once.
+    With ``chunking``, long audio is transcribed window by window. With more than one worker the
+    windows go to a pool of worker processes, each holding its own model, and the parent process
+    does not load the ASR model; with one worker (the cuda default) they run in-process.
+    """
+
+    def __init__(
+        self,
+        device: str,
+        model_name: str,
+        compute_type: str,
+        language: str,
+        align_cache_size: int = 1,
+        batch_size: Optional[int] = None,
+        cache: Optional[ArtifactCache] = None,
+        chunking: Optional[ChunkOptions] = None,
+        threads: Optional[int] = None,
+    ) -> None:
         self.device = device
         self.model_name = model_name
         self.compute_type = compute_type
         self.language = language
+        self.align_cache_size = max(1, align_cache_size)
+        self.batch_size = batch_size
+        self.cache = cache
+        self.chunking = chunking
+        self.threads = threads
+        self._model: Any = None
+        self._last_audio: Optional[Tuple[Tuple[str, int, int], Any]] = None
+        self._align_models: "OrderedDict[str, Tuple[Any, Any]]" = OrderedDict()
 
     def _import_whisperx(self):
         try:
@@ -92,17 +268,90 @@ class WhisperXService:
             raise CliError("Failed to import whisperx. Install it in this tool-specific virtual environment.") from exc
         return whisperx
 
-    def transcribe(self, audio_path: Path) -> Dict[str, Any]:
-        whisperx = self._import_whisperx()
-        language = None if self.language == "auto" else self.language
-        model = whisperx.load_model(
-            self.model_name,
-            self.device,
-            compute_type=self.compute_type,
-            language=language,
-        )
-        audio = whisperx.load_audio(str(audio_path))
-        result = model.transcribe(audio, language=language)
+    def load_model(self) -> Any:
+        if self._model is None:
+            whisperx = self._import_whisperx()
+            options: Dict[str, Any] = {}
+            if self.threads is not None:
+                options["threads"] = self.threads
+            self._model = whisperx.load_model(
+                self.model_name,
+                self.device,
+                compute_type=self.compute_type,
+                language=None if self.language == "auto" else self.language,
+                **options,
+            )
+        return self._model
+
+    def load_align_model(self, language_code: str) -> Tuple[Any, Any]:
+        cached = self._align_models.pop(language_code, None)
+        if cached is None:
+            whisperx = self._import_whisperx()
+            cached = whisperx.load_align_model(language_code=language_code, device=self.device)
+        self._align_models[language_code] = cached
+        while len(self._align_models) > self.align_cache_size:
+            self._align_models.popitem(last=False)
+        return cached
+
+    def decode_audio(self, audio_path: Path) -> Any:
+        return self._import_whisperx().load_audio(str(audio_path))
+
+    def load_audio(self, audio_path: Path) -> Any:
+        stat = audio_path.stat()
+        identity = (str(audio_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if self._last_audio is None or self._last_audio[0] != identity:
+            self._last_audio = None
+            self._last_audio = (identity, self.decode_audio(audio_path))
+        return self._last_audio[1]
+
+    def release_audio(self) -> None:
+        """Drops the memoized waveform so a long-lived service does not keep the last file in memory."""
+        self._last_audio = None
+
+    def _transcript_key(self, audio_path: Path, requested: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        params = {
+            "model": self.model_name,
+            "computeType": self.compute_type,
+            "device": self.device,
+            "language": requested,
+            "batchSize": self.batch_size,
+        }
+        if self.chunking is not None:
+            params["chunking"] = [self.chunking.seconds, self.chunking.overlap, self.chunking.search]
+        return self.cache.key("transcribe", audio_path, **params)
+
+    def has_cached_transcript(self, audio_path: Path, language: Optional[str] = None) -> bool:
+        key = self._transcript_key(audio_path, language or self.language)
+        return self.cache is not None and key is not None and self.cache.contains("transcribe", key)
+
+    def transcribe(self, audio_path: Path, language: Optional[str] = None, audio: Any = None) -> Dict[str, Any]:
+        """Transcribes ``audio_path``; pass an already decoded ``audio`` waveform to skip decoding it again."""
+        requested = language or self.language
+        key = self._transcript_key(audio_path, requested)
+        if self.cache is not None and key:
+            cached = self.cache.load("transcribe", key)
+            if cached is not None:
+                return cached
+
+        language = None if requested == "auto" else requested
+        if audio is None:
+            audio = self.load_audio(audio_path)
+        if self.chunking is not None:
+            transcript = self._transcribe_chunked(audio, language)
+        else:
+            transcript = self.transcribe_waveform(audio, language)
+        if self.cache is not None and key:
+            self.cache.store("transcribe", key, transcript)
+        return transcript
+
+    def transcribe_waveform(self, audio: Any, language: Optional[str]) -> Dict[str, Any]:
+        model = self.load_model()
+        options: Dict[str, Any] = {"language": language}
+        if self.batch_size is not None:
+            options["batch_size"] = self.batch_size
+        result = model.transcribe(audio, **options)
 
         normalized_segments = [
             {"start": float(item["start"]), "end": float(item["end"]), "text": str(item.get("text", "")).strip()}
@@ -113,17 +362,66 @@ class WhisperXService:
             "segments": normalized_segments,
         }
 
-    def align(self, audio_path: Path, transcript: Dict[str, Any]) -> Dict[str, Any]:
-        whisperx = self._import_whisperx()
-        audio = whisperx.load_audio(str(audio_path))
+    def _transcribe_chunked(self, audio: Any, language: Optional[str]) -> Dict[str, Any]:
+        assert self.chunking is not None
+        chunks = plan_chunks(audio, self.chunking)
+        if len(chunks) == 1:
+            return self.transcribe_waveform(audio, language)
+
+        windows = [audio[int(chunk.start * SAMPLE_RATE) : int(chunk.end * SAMPLE_RATE)] for chunk in chunks]
+        workers = max(1, min(self.chunking.workers, len(chunks)))
+        print(f"Transcribing {len(chunks)} chunk(s) with {workers} worker process(es).", file=sys.stderr)
+        if workers == 1:
+            results = [self.transcribe_waveform(window, language) for window in windows]
+        else:
+            settings = {
+                "device": self.device,
+                "model_name": self.model_name,
+                "compute_type": self.compute_type,
+                "language": self.language,
+                "batch_size": self.batch_size,
+                "threads": self.chunking.worker_threads,
+            }
+            # spawn, not fork: the parent may already hold torch/CUDA state that must not be forked.
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunk_worker,
+                initargs=(settings,),
+            ) as pool:
+                results = list(pool.map(_transcribe_chunk, windows, repeat(language)))
+
+        languages = [result["language"] for result in results if result.get("language")]
+        return {
+            "language": max(languages, key=languages.count) if languages else language,
+            "segments": merge_chunk_segments(chunks, [result["segments"] for result in results]),
+        }
 
-        language_code = self.language
+    def align(
+        self, audio_path: Path, transcript: Dict[str, Any], language: Optional[str] = None, audio: Any = None
+    ) -> Dict[str, Any]:
+        language_code = language or self.language
         if language_code == "auto":
             language_code = transcript.get("language") or "ru"
 
-        align_model, metadata = whisperx.load_align_model(language_code=language_code, device=self.device)
+        key = None
+        if self.cache is not None:
+            transcript_digest = hashlib.sha256(
+                json.dumps(transcript, sort_keys=True, ensure_ascii=False).encode("utf-8")
+            ).hexdigest()
+            key = self.cache.key(
+                "align", audio_path, language=language_code, device=self.device, transcript=transcript_digest
+            )
+            cached = self.cache.load("align", key)
+            if cached is not None:
+                return cached
+
+        whisperx = self._import_whisperx()
+        if audio is None:
+            audio = self.load_audio(audio_path)
+        align_model, metadata = self.load_align_model(language_code)
         aligned = whisperx.align(
-            transcript.get("segments", []),
+            copy.deepcopy(transcript.get("segments", [])),  # whisperx.align annotates the segments it is given
             align_model,
             metadata,
             audio,
@@ -146,9 +444,88 @@ class WhisperXService:
             payload["word_segments"] = aligned["word_segments"]
         if "words" in aligned:
             payload["words"] = aligned["words"]
+        if self.cache is not None and key:
+            self.cache.store("align", key, payload)
         return payload
 
 
+def plan_chunks(audio: Any, options: ChunkOptions, sample_rate: int = SAMPLE_RATE) -> List[AudioChunk]:
+    """Splits a waveform into overlapping windows, cutting where the smoothed RMS energy is lowest.
+
+    Each cut lands within ``options.search`` seconds of its target (but at least half a chunk after
+    the previous cut). ``keep_from``/``keep_to`` are the cuts themselves: a merged segment belongs
+    to the chunk whose range contains its midpoint.
+    """
+    import numpy as np
+
+    total = len(audio) / sample_rate
+    if total <= options.seconds:
+        return [AudioChunk(start=0.0, end=total, keep_from=0.0, keep_to=float("inf"))]
+
+    frame = max(1, int(sample_rate * ENERGY_FRAME_SECONDS))
+    frames = len(audio) // frame
+    samples = np.asarray(audio[: frames * frame], dtype=np.float64).reshape(frames, frame)
+    energy = np.sqrt(np.mean(np.square(samples), axis=1))
+    kernel = np.ones(ENERGY_SMOOTHING_FRAMES) / ENERGY_SMOOTHING_FRAMES
+    smoothed = np.convolve(energy, kernel, mode="same")
+    frame_seconds = frame / sample_rate
+
+    cuts = [0.0]
+    while total - cuts[-1] > options.seconds:
+        target = cuts[-1] + options.seconds
+        low = int(max(cuts[-1] + options.seconds / 2, target - options.search) / frame_seconds)
+        high = min(frames, int(min(total, target + options.search) / frame_seconds))
+        if high > low:
+            cuts.append((low + int(np.argmin(smoothed[low:high]))) * frame_seconds)
+        else:
+            cuts.append(target)
+    cuts.append(total)
+
+    chunks = []
+    for index, (keep_from, keep_to) in enumerate(zip(cuts, cuts[1:])):
+        last = index == len(cuts) - 2
+        chunks.append(
+            AudioChunk(
+                start=max(0.0, keep_from - options.overlap),
+                end=min(total, keep_to + options.overlap),
+                keep_from=keep_from,
+                keep_to=float("inf") if last else keep_to,
+            )
+        )
+    return chunks
+
+
+def merge_chunk_segments(chunks: List[AudioChunk], results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Shifts chunk-relative segments to absolute time and keeps each one only in the chunk owning its
+    midpoint; an identical phrase repeated across a seam is dropped as well."""
+    merged: List[Dict[str, Any]] = []
+    for chunk, segments in zip(chunks, results):
+        for item in segments:
+            start = round(float(item["start"]) + chunk.start, 3)
+            end = round(float(item["end"]) + chunk.start, 3)
+            if not chunk.keep_from <= (start + end) / 2 < chunk.keep_to:
+                continue
+            text = str(item.get("text", "")).strip()
+            if merged and start < merged[-1]["end"] and text.casefold() == merged[-1]["text"].casefold():
+                continue
+            merged.append({"start": start, "end": end, "text": text})
+    return merged
+
+
+_CHUNK_SERVICE: Optional[WhisperXService] = None
+
+
+def _init_chunk_worker(settings: Dict[str, Any]) -> None:
+    global _CHUNK_SERVICE
+    _CHUNK_SERVICE = WhisperXService(**settings)
+    _CHUNK_SERVICE.load_model()
+
+
+def _transcribe_chunk(audio: Any, language: Optional[str]) -> Dict[str, Any]:
+    assert _CHUNK_SERVICE is not None, "chunk worker was not initialized"
+    return _CHUNK_SERVICE.transcribe_waveform(audio, language)
+
+
 class BlockBuilder:
     def __init__(
         self,
@@ -259,6 +636,132 @@ class CueExporter:
         return "…"
 
 
+class PrefetchingDecoder:
+    """Yields ``(path, future)`` pairs while decoding up to ``depth`` upcoming files on a background thread.
+
+    At most ``depth + 1`` decoded waveforms are alive at once: the one being consumed and the ones
+    queued behind it. A decode error surfaces from the future of the file that failed.
+    """
+
+    def __init__(self, load: Callable[[Path], Any], paths: Iterable[Path], depth: int = 1) -> None:
+        self.load = load
+        self.paths = list(paths)
+        self.depth = max(0, depth)
+
+    def __iter__(self) -> Iterator[Tuple[Path, "Future[Any]"]]:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode")
+        upcoming = iter(self.paths)
+        pending: Deque[Tuple[Path, "Future[Any]"]] = deque()
+        try:
+            for path in upcoming:
+                pending.append((path, executor.submit(self.load, path)))
+                if len(pending) > self.depth:
+                    break
+            while pending:
+                yield pending.popleft()
+                following = next(upcoming, None)
+                if following is not None:
+                    pending.append((following, executor.submit(self.load, following)))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ArtifactWriter:
+    """Writes JSON artifacts on a background thread so the next stage does not wait for the disk.
+
+    Payloads are serialized on the caller's thread when submitted, so a later stage may mutate
+    them while the file is still being written.
+    """
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifacts")
+        self._pending: List[Tuple[Path, Future]] = []
+
+    def submit(self, path: Path, payload: Any) -> None:
+        self._pending.append((path, self._executor.submit(JsonIO.write_text, path, JsonIO.dumps(payload))))
+
+    def wait(self) -> List[Path]:
+        """Blocks until every artifact is on disk and returns their paths; re-raises the first write error."""
+        try:
+            for _, future in self._pending:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=True)
+        return [path for path, _ in self._pending]
+
+
+class ResidentWorker:
+    """Executes transcribe/align/blocks jobs against one resident ``WhisperXService``.
+
+    Jobs are JSON objects with a ``command`` plus the paths the matching CLI command takes
+    (``workdir``, ``audio``, ``out``) and optional ``language``, ``input``, ``gapThreshold``,
+    ``maxBlockDuration``, ``maxBlockChars`` and ``minBlockDuration``. Every job gets one
+    response: ``{"id", "ok": true, "output", "seconds"}`` or ``{"id", "ok": false, "error"}``.
+    """
+
+    def __init__(self, service: WhisperXService) -> None:
+        self.service = service
+        self.stopped = False
+
+    def handle(self, job: Any) -> Dict[str, Any]:
+        job_id = job.get("id") if isinstance(job, dict) else None
+        started = time.perf_counter()
+        try:
+            output = self._dispatch(job)
+        except CliError as exc:
+            return {"id": job_id, "ok": False, "error": str(exc)}
+        except Exception as exc:  # a failing job must not take the resident models down with it
+            return {"id": job_id, "ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            # Models stay resident; a waveform is kept only from a transcribe job to the align job that follows it.
+            if not isinstance(job, dict) or job.get("command") != "transcribe":
+                self.service.release_audio()
+        response: Dict[str, Any] = {"id": job_id, "ok": True, "seconds": round(time.perf_counter() - started, 3)}
+        if output is not None:
+            response["output"] = str(output)
+        return response
+
+    def handle_line(self, line: str) -> Optional[Dict[str, Any]]:
+        if not line.strip():
+            return None
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as exc:
+            return {"id": None, "ok": False, "error": f"Invalid JSON job: {exc}"}
+        return self.handle(job)
+
+    def serve_lines(self, lines: Iterable[str], write: Callable[[str], None]) -> None:
+        for line in lines:
+            response = self.handle_line(line)
+            if response is not None:
+                write(json.dumps(response, ensure_ascii=False) + "\n")
+            if self.stopped:
+                break
+
+    def _dispatch(self, job: Any) -> Optional[Path]:
+        if not isinstance(job, dict):
+            raise CliError("Job must be a JSON object.")
+        command = job.get("command")
+        if command == "shutdown":
+            self.stopped = True
+            return None
+        context = WorkdirContext(Path(job.get("workdir", ".")), Path(job.get("out", "out")), job.get("audio"))
+        if command in ("transcribe", "align"):
+            EnvironmentValidator(context).run(check_tools=False)
+            if command == "transcribe":
+                return _write_transcript(context, self.service, job.get("language"))
+            return _write_aligned(context, self.service, job.get("language"))
+        if command == "blocks":
+            builder = BlockBuilder(
+                gap_threshold=float(job.get("gapThreshold", BLOCK_DEFAULTS["gap_threshold"])),
+                max_block_duration=float(job.get("maxBlockDuration", BLOCK_DEFAULTS["max_block_duration"])),
+                max_block_chars=int(job.get("maxBlockChars", BLOCK_DEFAULTS["max_block_chars"])),
+                min_block_duration=float(job.get("minBlockDuration", BLOCK_DEFAULTS["min_block_duration"])),
+            )
+            return _write_blocks(context.workdir, context.out, job.get("input"), builder)
+        raise CliError(f"Unknown job command: {command!r}. Expected transcribe, align, blocks or shutdown.")
+
+
 def _default_compute_type(device: str, compute_type: Optional[str]) -> str:
     if compute_type:
         return compute_type
@@ -274,41 +777,125 @@ def _build_parser() -> argparse.ArgumentParser:
     common.add_argument("--audio", required=True, help="Audio path relative to workdir or absolute path.")
     common.add_argument("--out", default="out", help="Output directory relative to workdir or absolute path.")
 
+    cache = argparse.ArgumentParser(add_help=False)
+    cache.add_argument("--cache-dir", default=None, help=CACHE_DIR_HELP)
+    cache.add_argument("--no-cache", action="store_true", help="Neither read nor write the stage cache.")
+
+    chunking = argparse.ArgumentParser(add_help=False)
+    chunking.add_argument(
+        "--chunk-seconds", type=float, default=None, help="Transcribe in windows of about this length (default: off)."
+    )
+    chunking.add_argument("--chunk-overlap", type=float, default=2.0, help="Seconds shared by neighbouring windows.")
+    chunking.add_argument("--chunk-search", type=float, default=30.0, help="How far a cut may move to find silence.")
+    chunking.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: CPUs / threads on cpu, 1 on cuda)."
+    )
+    chunking.add_argument("--worker-threads", type=int, default=None, help="CPU threads per worker model (default: 4).")
+
     validate = subparsers.add_parser("validate", parents=[common], help="Validate environment and required inputs.")
     validate.set_defaults(handler=cmd_validate)
 
-    transcribe = subparsers.add_parser("transcribe", parents=[common], help="Run WhisperX transcription.")
+    transcribe = subparsers.add_parser(
+        "transcribe", parents=[common, cache, chunking], help="Run WhisperX transcription."
+    )
     transcribe.add_argument("--language", default="ru", help="Language code or 'auto'.")
     transcribe.add_argument("--device", choices=["cpu", "cuda"], default="cpu")
     transcribe.add_argument("--model", default="large-v3")
     transcribe.add_argument("--compute-type", default=None)
     transcribe.set_defaults(handler=cmd_transcribe)
 
-    align = subparsers.add_parser("align", parents=[common], help="Run WhisperX alignment with word timestamps.")
+    align = subparsers.add_parser(
+        "align", parents=[common, cache], help="Run WhisperX alignment with word timestamps."
+    )
     align.add_argument("--language", default="ru", help="Language code or 'auto'.")
     align.add_argument("--device", choices=["cpu", "cuda"], default="cpu")
     align.set_defaults(handler=cmd_align)
 
     blocks = subparsers.add_parser("blocks", help="Group transcript/aligned segments into blocks.")
-    blocks.add_argument("--workdir", default=".")
-    blocks.add_argument("--out", default="out")
-    blocks.add_argument("--input", default=None, help="Explicit JSON input file (aligned/transcript).")
-    blocks.add_argument("--gap-threshold", type=float, default=1.2)
-    blocks.add_argument("--max-block-duration", type=float, default=25.0)
-    blocks.add_argument("--max-block-chars", type=int, default=240)
-    blocks.add_argument("--min-block-duration", type=float, default=2.0)
+    _add_block_args(blocks)
     blocks.set_defaults(handler=cmd_blocks)
 
     export = subparsers.add_parser("export-cues", help="Export cue template for emoji overlay builder.")
     export.add_argument("--workdir", default=".")
     export.add_argument("--out", default="out")
-    export.add_argument("--typing-duration", type=float, default=0.0)
-    export.add_argument("--text-mode", choices=["empty", "ellipsis", "block_text"], default="ellipsis")
+    _add_export_args(export)
     export.set_defaults(handler=cmd_export_cues)
 
+    run = subparsers.add_parser(
+        "run", parents=[common, cache, chunking], help="Run transcribe, align, blocks and export-cues in one process."
+    )
+    run.add_argument("--language", default="ru", help="Language code or 'auto'.")
+    run.add_argument("--device", choices=["cpu", "cuda"], default="cpu")
+    run.add_argument("--model", default="large-v3")
+    run.add_argument("--compute-type", default=None)
+    _add_grouping_args(run)
+    _add_export_args(run)
+    run.set_defaults(handler=cmd_run)
+
+    batch = subparsers.add_parser("batch", parents=[cache], help="Transcribe many audio files with one loaded model.")
+    batch.add_argument("--workdir", default=".", help="Base directory for inputs, manifest and outputs.")
+    batch.add_argument("--inputs", nargs="+", default=[], help="Glob patterns relative to workdir ('s01/*.mp3').")
+    batch.add_argument("--manifest", default=None, help="Text file with one audio path per line ('#' comments).")
+    batch.add_argument("--out", default="out", help="Outputs go to <out>/<audio path without suffix>/transcript.json.")
+    batch.add_argument("--language", default="ru", help="Language code or 'auto'.")
+    batch.add_argument("--device", choices=["cpu", "cuda"], default="cpu")
+    batch.add_argument("--model", default="large-v3")
+    batch.add_argument("--compute-type", default=None)
+    batch.add_argument("--batch-size", type=int, default=8, help="Passed to model.transcribe.")
+    batch.add_argument("--prefetch", type=int, default=1, help="Files decoded ahead of the one being transcribed.")
+    batch.set_defaults(handler=cmd_batch)
+
+    serve = subparsers.add_parser(
+        "serve", parents=[cache], help="Keep models loaded and run jobs from stdin JSONL or a Unix socket."
+    )
+    serve.add_argument("--socket", default=None, help="Unix socket path to listen on (default: JSONL on stdin/stdout).")
+    serve.add_argument("--language", default="ru", help="Default language code or 'auto'.")
+    serve.add_argument("--device", choices=["cpu", "cuda"], default="cpu")
+    serve.add_argument("--model", default="large-v3")
+    serve.add_argument("--compute-type", default=None)
+    serve.add_argument("--align-cache", type=int, default=2, help="Alignment models kept loaded (one per language).")
+    serve.set_defaults(handler=cmd_serve)
+
+    client = subparsers.add_parser("client", help="Send a job to a running 'serve --socket' worker.")
+    client_jobs = client.add_subparsers(dest="job", required=True)
+    connection = argparse.ArgumentParser(add_help=False)
+    connection.add_argument("--socket", required=True, help="Unix socket of the running worker.")
+    for name in ("transcribe", "align"):
+        job = client_jobs.add_parser(name, parents=[connection, common], help=f"Run {name} on the worker.")
+        job.add_argument("--language", default=None, help="Language code or 'auto' (default: the worker's).")
+    client_blocks = client_jobs.add_parser("blocks", parents=[connection], help="Run blocks on the worker.")
+    _add_block_args(client_blocks)
+    client_jobs.add_parser("shutdown", parents=[connection], help="Stop the worker.")
+    client.set_defaults(handler=cmd_client)
+
+    prune = subparsers.add_parser("cache-prune", help="Evict stage cache entries by age and/or total size.")
+    prune.add_argument("--cache-dir", default=None, help=CACHE_DIR_HELP)
+    prune.add_argument("--max-age-days", type=float, default=None, help="Remove entries unused for longer than this.")
+    prune.add_argument("--max-size-mb", type=float, default=None, help="Then evict least recently used above this.")
+    prune.set_defaults(handler=cmd_cache_prune)
+
     return parser
 
 
+def _add_block_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--workdir", default=".")
+    parser.add_argument("--out", default="out")
+    parser.add_argument("--input", default=None, help="Explicit JSON input file (aligned/transcript).")
+    _add_grouping_args(parser)
+
+
+def _add_grouping_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--gap-threshold", type=float, default=BLOCK_DEFAULTS["gap_threshold"])
+    parser.add_argument("--max-block-duration", type=float, default=BLOCK_DEFAULTS["max_block_duration"])
+    parser.add_argument("--max-block-chars", type=int, default=BLOCK_DEFAULTS["max_block_chars"])
+    parser.add_argument("--min-block-duration", type=float, default=BLOCK_DEFAULTS["min_block_duration"])
+
+
+def _add_export_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--typing-duration", type=float, default=0.0)
+    parser.add_argument("--text-mode", choices=["empty", "ellipsis", "block_text"], default="ellipsis")
+
+
 def cmd_validate(args: argparse.Namespace) -> int:
     context = WorkdirContext(Path(args.workdir), Path(args.out), args.audio)
     EnvironmentValidator(context).run()
@@ -329,12 +916,53 @@ def cmd_transcribe(args: argparse.Namespace) -> int:
         model_name=args.model,
         compute_type=_default_compute_type(args.device, args.compute_type),
         language=args.language,
+        cache=_cache_from_args(args),
+        chunking=_chunking_from_args(args),
     )
-    transcript = service.transcribe(context.audio)
+    output_path = _write_transcript(context, service)
+    print(f"Saved transcript to: {output_path}{_cache_note(service)}")
+    return EXIT_OK
+
+
+def _cache_from_args(args: argparse.Namespace) -> Optional[ArtifactCache]:
+    if args.no_cache:
+        return None
+    return ArtifactCache(Path(args.cache_dir) if args.cache_dir else _default_cache_dir())
+
+
+def _chunking_from_args(args: argparse.Namespace) -> Optional[ChunkOptions]:
+    if args.chunk_seconds is None:
+        return None
+    if args.chunk_seconds <= 0 or args.chunk_overlap < 0 or args.chunk_search < 0:
+        raise CliError("--chunk-seconds must be positive; --chunk-overlap and --chunk-search must not be negative.")
+    if args.chunk_overlap * 2 >= args.chunk_seconds:
+        raise CliError("--chunk-overlap must be less than half of --chunk-seconds.")
+    threads = args.worker_threads or 4
+    # Every worker loads its own model; on cuda they would all land on the same GPU, so more than one is opt-in.
+    default_workers = 1 if args.device == "cuda" else max(1, (os.cpu_count() or 1) // threads)
+    workers = args.workers or default_workers
+    return ChunkOptions(
+        seconds=args.chunk_seconds,
+        overlap=args.chunk_overlap,
+        search=args.chunk_search,
+        workers=workers,
+        worker_threads=args.worker_threads,
+    )
+
+
+def _cache_note(service: WhisperXService, hits_before: int = 0) -> str:
+    return " (from cache)" if service.cache is not None and service.cache.hits > hits_before else ""
+
+
+def _write_transcript(
+    context: WorkdirContext, service: WhisperXService, language: Optional[str] = None, audio: Any = None
+) -> Path:
+    if context.audio is None:
+        raise CliError("Audio path is required.")
+    transcript = service.transcribe(context.audio, language, audio=audio)
     output_path = context.out / "transcript.json"
     JsonIO.write_json(output_path, transcript)
-    print(f"Saved transcript to: {output_path}")
-    return EXIT_OK
+    return output_path
 
 
 def cmd_align(args: argparse.Namespace) -> int:
@@ -345,22 +973,30 @@ def cmd_align(args: argparse.Namespace) -> int:
     validator = EnvironmentValidator(context)
     validator.run()
 
-    transcript_path = context.out / "transcript.json"
-    if not transcript_path.exists():
-        raise CliError(f"Transcript input is missing: {transcript_path}")
-
-    transcript = JsonIO.read_json(transcript_path)
     service = WhisperXService(
         device=args.device,
         model_name="large-v3",
         compute_type=_default_compute_type(args.device, None),
         language=args.language,
+        cache=_cache_from_args(args),
     )
-    aligned = service.align(context.audio, transcript)
+    output_path = _write_aligned(context, service)
+    print(f"Saved aligned result to: {output_path}{_cache_note(service)}")
+    return EXIT_OK
+
+
+def _write_aligned(context: WorkdirContext, service: WhisperXService, language: Optional[str] = None) -> Path:
+    if context.audio is None:
+        raise CliError("Audio path is required.")
+    transcript_path = context.out / "transcript.json"
+    if not transcript_path.exists():
+        raise CliError(f"Transcript input is missing: {transcript_path}")
+
+    transcript = JsonIO.read_json(transcript_path)
+    aligned = service.align(context.audio, transcript, language)
     output_path = context.out / "aligned.json"
     JsonIO.write_json(output_path, aligned)
-    print(f"Saved aligned result to: {output_path}")
-    return EXIT_OK
+    return output_path
 
 
 def _select_segments_source(workdir: Path, out_dir: Path, explicit_input: Optional[str]) -> Path:
@@ -381,7 +1017,19 @@ def cmd_blocks(args: argparse.Namespace) -> int:
     workdir = Path(args.workdir).resolve()
     out_dir = (workdir / args.out).resolve() if not Path(args.out).is_absolute() else Path(args.out).resolve()
 
-    source = _select_segments_source(workdir, out_dir, args.input)
+    builder = BlockBuilder(
+        gap_threshold=args.gap_threshold,
+        max_block_duration=args.max_block_duration,
+        max_block_chars=args.max_block_chars,
+        min_block_duration=args.min_block_duration,
+    )
+    output_path = _write_blocks(workdir, out_dir, args.input, builder)
+    print(f"Saved blocks to: {output_path}")
+    return EXIT_OK
+
+
+def _write_blocks(workdir: Path, out_dir: Path, explicit_input: Optional[str], builder: BlockBuilder) -> Path:
+    source = _select_segments_source(workdir, out_dir, explicit_input)
     if not source.exists():
         raise CliError(f"Input file does not exist: {source}")
 
@@ -390,17 +1038,10 @@ def cmd_blocks(args: argparse.Namespace) -> int:
     if not isinstance(segments, list):
         raise CliError("Input JSON must contain a 'segments' array.")
 
-    builder = BlockBuilder(
-        gap_threshold=args.gap_threshold,
-        max_block_duration=args.max_block_duration,
-        max_block_chars=args.max_block_chars,
-        min_block_duration=args.min_block_duration,
-    )
     blocks = builder.build(segments)
     output_path = out_dir / "blocks.json"
     JsonIO.write_json(output_path, blocks)
-    print(f"Saved blocks to: {output_path}")
-    return EXIT_OK
+    return output_path
 
 
 def cmd_export_cues(args: argparse.Namespace) -> int:
@@ -422,6 +1063,243 @@ def cmd_export_cues(args: argparse.Namespace) -> int:
     return EXIT_OK
 
 
+def cmd_run(args: argparse.Namespace) -> int:
+    context = WorkdirContext(Path(args.workdir), Path(args.out), args.audio)
+    if context.audio is None:
+        raise CliError("Audio path is required.")
+    EnvironmentValidator(context).run()
+
+    service = WhisperXService(
+        device=args.device,
+        model_name=args.model,
+        compute_type=_default_compute_type(args.device, args.compute_type),
+        language=args.language,
+        cache=_cache_from_args(args),
+        chunking=_chunking_from_args(args),
+    )
+    builder = BlockBuilder(
+        gap_threshold=args.gap_threshold,
+        max_block_duration=args.max_block_duration,
+        max_block_chars=args.max_block_chars,
+        min_block_duration=args.min_block_duration,
+    )
+    exporter = CueExporter(typing_duration=args.typing_duration, text_mode=args.text_mode)
+
+    # The service keeps the decoded waveform between stages (and skips decoding on cache hits);
+    # intermediates stay in memory and artifacts are written in the background as each stage finishes.
+    writer = ArtifactWriter()
+    try:
+        transcript = service.transcribe(context.audio)
+        writer.submit(context.out / "transcript.json", transcript)
+        aligned = service.align(context.audio, transcript)
+        writer.submit(context.out / "aligned.json", aligned)
+        blocks = builder.build(aligned["segments"])
+        writer.submit(context.out / "blocks.json", blocks)
+        writer.submit(context.out / "cues.template.json", exporter.export(blocks))
+    finally:
+        written = writer.wait()
+    for path in written:
+        print(f"Saved {path.name} to: {path}")
+    if service.cache is not None and service.cache.hits:
+        print(f"Reused {service.cache.hits} cached stage result(s).")
+    return EXIT_OK
+
+
+def _batch_inputs(workdir: Path, patterns: List[str], manifest: Optional[str]) -> List[Path]:
+    paths: List[Path] = []
+    missing: List[str] = []
+    for pattern in patterns:
+        matches = sorted(item for item in workdir.glob(pattern) if item.is_file())
+        if not matches:
+            missing.append(f"No files match: {pattern}")
+        paths.extend(matches)
+    if manifest:
+        manifest_path = Path(manifest) if Path(manifest).is_absolute() else workdir / manifest
+        if not manifest_path.exists():
+            raise CliError(f"Manifest does not exist: {manifest_path}")
+        for line in manifest_path.read_text(encoding="utf-8").splitlines():
+            entry = line.split("#", 1)[0].strip()
+            if not entry:
+                continue
+            path = Path(entry) if Path(entry).is_absolute() else workdir / entry
+            if path.is_file():
+                paths.append(path)
+            else:
+                missing.append(f"Audio file does not exist: {path}")
+    if missing:
+        raise CliError("\n".join(missing))
+    if not paths:
+        raise CliError("No audio inputs. Pass --inputs patterns and/or --manifest.")
+    return list(dict.fromkeys(path.resolve() for path in paths))
+
+
+def _batch_output_dirs(workdir: Path, out_dir: Path, paths: List[Path]) -> Dict[Path, Path]:
+    targets: Dict[Path, Path] = {}
+    owners: Dict[Path, Path] = {}
+    for path in paths:
+        try:
+            relative = path.relative_to(workdir)
+        except ValueError:
+            relative = Path(path.name)
+        target = out_dir / relative.with_suffix("")
+        if target in owners:
+            raise CliError(f"Inputs {owners[target]} and {path} would share the output directory {target}.")
+        owners[target] = path
+        targets[path] = target
+    return targets
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    context = WorkdirContext(Path(args.workdir), Path(args.out), None)
+    if not context.workdir.is_dir():
+        raise CliError(f"Workdir does not exist or is not a directory: {context.workdir}")
+    errors = EnvironmentValidator.tool_errors()
+    if errors:
+        raise CliError("\n".join(errors))
+    paths = _batch_inputs(context.workdir, args.inputs, args.manifest)
+    targets = _batch_output_dirs(context.workdir, context.out, paths)
+
+    service = WhisperXService(
+        device=args.device,
+        model_name=args.model,
+        compute_type=_default_compute_type(args.device, args.compute_type),
+        language=args.language,
+        batch_size=args.batch_size,
+        cache=_cache_from_args(args),
+    )
+    started = time.perf_counter()
+    service.load_model()
+    print(f"Loaded {args.model} on {args.device} in {time.perf_counter() - started:.1f}s; {len(paths)} file(s) queued.")
+
+    def decode(path: Path) -> Any:
+        # Cached files need no waveform: transcribe() returns the stored transcript.
+        return None if service.has_cached_transcript(path) else service.decode_audio(path)
+
+    failures: List[str] = []
+    for index, (path, decoded) in enumerate(PrefetchingDecoder(decode, paths, args.prefetch), start=1):
+        file_started = time.perf_counter()
+        hits_before = service.cache.hits if service.cache is not None else 0
+        try:
+            file_context = WorkdirContext(context.workdir, targets[path], str(path))
+            output_path = _write_transcript(file_context, service, audio=decoded.result())
+        except Exception as exc:  # one unreadable file must not abort the rest of the season
+            failures.append(f"{path}: {exc}")
+            print(f"[{index}/{len(paths)}] FAILED {path}: {exc}", file=sys.stderr)
+            continue
+        elapsed = time.perf_counter() - file_started
+        note = _cache_note(service, hits_before)
+        print(f"[{index}/{len(paths)}] Saved transcript to: {output_path} ({elapsed:.1f}s){note}")
+
+    if failures:
+        raise CliError(f"{len(failures)} of {len(paths)} file(s) failed:\n" + "\n".join(failures))
+    return EXIT_OK
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    errors = EnvironmentValidator.tool_errors()
+    if errors:
+        raise CliError("\n".join(errors))
+    socket_path = Path(args.socket) if args.socket is not None else None
+    if socket_path is not None and socket_path.exists() and not socket_path.is_socket():
+        raise CliError(f"--socket points at an existing file that is not a socket: {socket_path}")
+
+    service = WhisperXService(
+        device=args.device,
+        model_name=args.model,
+        compute_type=_default_compute_type(args.device, args.compute_type),
+        language=args.language,
+        align_cache_size=args.align_cache,
+        cache=_cache_from_args(args),
+    )
+    started = time.perf_counter()
+    service.load_model()
+    print(f"Loaded {args.model} on {args.device} in {time.perf_counter() - started:.1f}s.", file=sys.stderr)
+    worker = ResidentWorker(service)
+
+    if socket_path is None:
+        print("Reading JSONL jobs from stdin.", file=sys.stderr)
+        worker.serve_lines(sys.stdin, lambda text: (sys.stdout.write(text), sys.stdout.flush()))
+        return EXIT_OK
+
+    if not hasattr(socketserver, "UnixStreamServer"):
+        raise CliError("Unix sockets are not available on this platform; run 'serve' without --socket.")
+    if socket_path.exists():
+        socket_path.unlink()  # a stale socket left by a worker that did not shut down cleanly
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            lines = (raw.decode("utf-8") for raw in self.rfile)
+            worker.serve_lines(lines, lambda text: (self.wfile.write(text.encode("utf-8")), self.wfile.flush()))
+
+    # Jobs run one at a time: the resident models are not safe to share between threads.
+    with socketserver.UnixStreamServer(str(socket_path), Handler) as server:
+        print(f"Listening on {socket_path}.", file=sys.stderr)
+        try:
+            while not worker.stopped:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
+    return EXIT_OK
+
+
+def cmd_cache_prune(args: argparse.Namespace) -> int:
+    if args.max_age_days is None and args.max_size_mb is None:
+        raise CliError("Pass --max-age-days and/or --max-size-mb.")
+    cache = ArtifactCache(Path(args.cache_dir) if args.cache_dir else _default_cache_dir())
+    removed, freed = cache.prune(
+        max_bytes=int(args.max_size_mb * 1024 * 1024) if args.max_size_mb is not None else None,
+        max_age_seconds=args.max_age_days * 86400 if args.max_age_days is not None else None,
+    )
+    entries = "entry" if removed == 1 else "entries"
+    print(f"Removed {removed} cache {entries} ({freed / 1024 / 1024:.1f} MB) from {cache.root}.")
+    return EXIT_OK
+
+
+def _client_job(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.job == "shutdown":
+        return {"command": "shutdown"}
+    job: Dict[str, Any] = {"command": args.job, "workdir": str(Path(args.workdir).resolve()), "out": args.out}
+    if args.job == "blocks":
+        job.update(
+            # relative to --workdir, like the local blocks command (an absolute --input stays as is)
+            input=str((Path(args.workdir) / args.input).resolve()) if args.input else None,
+            gapThreshold=args.gap_threshold,
+            maxBlockDuration=args.max_block_duration,
+            maxBlockChars=args.max_block_chars,
+            minBlockDuration=args.min_block_duration,
+        )
+        return job
+    job.update(audio=str(Path(args.workdir, args.audio).resolve()), language=args.language)
+    return job
+
+
+def cmd_client(args: argparse.Namespace) -> int:
+    if not hasattr(socket, "AF_UNIX"):
+        raise CliError("Unix sockets are not available on this platform.")
+    job = _client_job(args)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(args.socket)
+            connection.sendall((json.dumps(job, ensure_ascii=False) + "\n").encode("utf-8"))
+            with connection.makefile("r", encoding="utf-8") as reader:
+                line = reader.readline()
+    except OSError as exc:
+        raise CliError(f"Cannot reach worker at {args.socket}: {exc}") from exc
+    if not line:
+        raise CliError("Worker closed the connection without a response.")
+
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise CliError(response.get("error", "Worker reported an unknown error."))
+    if "output" in response:
+        print(f"Saved {args.job} output to: {response['output']} ({response['seconds']}s on the worker)")
+    else:
+        print("Worker is shutting down.")
+    return EXIT_OK
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     parser = _build_parser()
     args = parser.parse_args(argv)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Measures encode speed and output size per encoding profile (``video.profile``).
+
+Requires ffmpeg in PATH. Every profile renders the same workdir with the single-pass overlay
+graph into a scratch file. The background is pre-scaled once up front, as a cached build does,
+so the timings cover only compositing and encoding. Without ``--workdir`` a synthetic
+workdir is generated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from synthetic import ROOT, SyntheticSpec, write_workdir
+
+from emoji_overlay_video_builder import (
+    ENCODING_PROFILES,
+    BackgroundCache,
+    ConfigLoader,
+    ConsoleLogger,
+    EmojiAssetResolver,
+    FfmpegCommandFactory,
+    LocalFileSystem,
+    RenderTarget,
+    SubprocessRunner,
+)
+
+
+def measure(workdir: Path, scratch: Path, profile: str, background: Path) -> dict:
+    config = ConfigLoader(workdir).load()
+    config = replace(config, video=replace(config.video, profile=profile))
+    override = workdir / config.inputs.emoji_override_dir if config.inputs.emoji_override_dir else None
+    resolver = EmojiAssetResolver(ROOT / "assets", config.inputs.emoji_pack_id, override, ConsoleLogger())
+    output = scratch / f"{profile}.mp4"
+    target = RenderTarget(output=output, background=background)
+    command = FfmpegCommandFactory().build(workdir, config, resolver, target, filter_script=scratch / f"{profile}.txt")
+    command.insert(1, "-v")
+    command.insert(2, "error")
+
+    runner = SubprocessRunner()
+    started = time.perf_counter()
+    if runner.run(command) != 0:
+        raise RuntimeError(f"ffmpeg failed for profile {profile}")
+    wall = time.perf_counter() - started
+    progress = runner.metrics()[-1].progress
+    frames = progress.frame if progress else 0
+    size = output.stat().st_size
+    seconds = progress.out_seconds if progress and progress.out_seconds else None
+    return {
+        "profile": profile,
+        "encoder_args": " ".join(config.video.encoding().x264_args(config.video.fps)),
+        "frames": frames,
+        "wall_seconds": round(wall, 3),
+        "fps": round(frames / wall, 1),
+        "bytes": size,
+        "kbit_per_sec": round(size * 8 / 1000 / seconds, 1) if seconds else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workdir", default=None, help="Workdir to encode (default: a synthetic one).")
+    parser.add_argument("--profiles", nargs="+", default=list(ENCODING_PROFILES), choices=list(ENCODING_PROFILES))
+    parser.add_argument("--cues", type=int, default=40, help="Cue count of the synthetic workdir.")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--json", dest="json_path", default=None, help="Optional path for machine-readable results.")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg is not available in PATH; nothing to measure.", file=sys.stderr)
+        return 2
+
+    results = []
+    print(f"{'profile':<10} {'frames':>7} {'wall s':>8} {'fps':>8} {'bytes':>10} {'kbit/s':>8}  encoder args")
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = Path(tmp)
+        if args.workdir:
+            workdir = Path(args.workdir).resolve()
+        else:
+            spec = SyntheticSpec(cues=args.cues, emojis_per_cue=3, vocabulary=15)
+            workdir = write_workdir(scratch / "workdir", spec, media=True, fps=args.fps)
+
+        config = ConfigLoader(workdir).load()
+        config = replace(config, render=replace(config.render, tmp_dir=str(scratch / "tmp")))
+        prepared = BackgroundCache(LocalFileSystem(), ConsoleLogger()).prepare(workdir, config)
+        if prepared.scale is not None and SubprocessRunner().run([prepared.scale[0], "-v", "error", *prepared.scale[1:]]):
+            print("Could not pre-scale the background.", file=sys.stderr)
+            return 2
+
+        for profile in args.profiles:
+            row = measure(workdir, scratch, profile, prepared.path)
+            results.append(row)
+            print(
+                f"{row['profile']:<10} {row['frames']:>7} {row['wall_seconds']:>8} {row['fps']:>8}"
+                f" {row['bytes']:>10} {row['kbit_per_sec']!s:>8}  {row['encoder_args']}"
+            )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
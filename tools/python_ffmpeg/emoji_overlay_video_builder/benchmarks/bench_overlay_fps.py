@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Measures ffmpeg encode fps as the number of cues grows, per overlay render mode.
+
+Requires ffmpeg in PATH. Each run encodes the whole synthetic timeline to the null muxer,
+so the numbers reflect filter-graph and encoder cost without disk I/O.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from synthetic import SyntheticSpec, duration, write_workdir
+
+from emoji_overlay_video_builder import (
+    RENDER_MODE_OVERLAYS,
+    RENDER_MODE_STRIPS,
+    ConfigLoader,
+    ConsoleLogger,
+    EmojiAssetResolver,
+    FfmpegCommandFactory,
+    RenderConfig,
+)
+
+
+def measure(workdir: Path, mode: str, fps: int, seconds: float) -> dict:
+    config = ConfigLoader(workdir).load()
+    config = replace(config, render=RenderConfig(mode=mode, tmp_dir=config.render.tmp_dir))
+    resolver = EmojiAssetResolver(workdir / "assets", "twemoji-72x72", workdir / "emoji", ConsoleLogger())
+    script = workdir / "out" / f"{mode}.filter.txt"
+    command = FfmpegCommandFactory().build(workdir, config, resolver, filter_script=script)
+    command = command[:-1] + ["-f", "null", "-"]
+    command.insert(1, "-v")
+    command.insert(2, "error")
+
+    started = time.perf_counter()
+    subprocess.run(command, check=True)
+    wall = time.perf_counter() - started
+    frames = int(round(seconds * fps))
+    return {"mode": mode, "wall_seconds": round(wall, 3), "fps": round(frames / wall, 1), "frames": frames}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cues", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--emojis-per-cue", type=int, default=3)
+    parser.add_argument("--vocabulary", type=int, default=15)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--json", dest="json_path", default=None, help="Optional path for machine-readable results.")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg is not available in PATH; nothing to measure.", file=sys.stderr)
+        return 2
+
+    results = []
+    print(f"{'cues':>6} {'mode':<16} {'frames':>7} {'wall s':>8} {'fps':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.cues:
+            spec = SyntheticSpec(cues=count, emojis_per_cue=args.emojis_per_cue, vocabulary=args.vocabulary)
+            workdir = write_workdir(Path(tmp) / f"cues_{count}", spec, media=True, fps=args.fps)
+            for mode in (RENDER_MODE_OVERLAYS, RENDER_MODE_STRIPS):
+                row = {"cues": count, "seconds": round(duration(spec), 3), **measure(workdir, mode, args.fps, duration(spec))}
+                results.append(row)
+                print(f"{count:>6} {mode:<16} {row['frames']:>7} {row['wall_seconds']:>8} {row['fps']:>8}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Times the planning pipeline on synthetic workdirs and compares the results with a JSON baseline.
+
+Each case is a synthetic workdir (N cues, M emojis per cue, a vocabulary size, typing on or
+off). For each case the suite times ``ConfigLoader.load``, ``EmojiTokenizer.split_clusters``
+over every cue (with a cold cache), ``ValidationService.validate`` (with a fresh resolver,
+so the directory listing is included) and ``FfmpegCommandFactory.build`` for both overlay
+render modes. With ``--encode`` and ffmpeg in PATH, short clips are also encoded to the
+null muxer (reported in plain milliseconds).
+
+Planning timings are reported in reference units rather than milliseconds: every sample
+calls the step in a loop long enough to take at least ``SAMPLE_SECONDS``, and is divided
+by a fixed pure-Python workload timed on either side of it. Machine-wide speed changes (shared
+hosts, frequency scaling) slow both down alike and cancel out, so back-to-back runs agree
+within 50% where raw milliseconds differed by up to 2x. Each value is the median of
+``--repeat`` samples, after one warm-up call.
+
+``--json`` writes the results; ``--baseline`` compares them with an earlier file and exits
+with 1 when a timing is slower than the baseline by more than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from synthetic import ROOT, SyntheticSpec, write_workdir
+
+from emoji_overlay_video_builder import (
+    RENDER_MODE_OVERLAYS,
+    RENDER_MODE_STRIPS,
+    ConfigLoader,
+    EmojiAssetResolver,
+    EmojiTokenizer,
+    FfmpegCommandFactory,
+    LocalFileSystem,
+    RenderConfig,
+    ValidationService,
+    _split_clusters_cached,
+)
+
+
+class QuietLogger:
+    def info(self, message: str) -> None:
+        return None
+
+    def warning(self, message: str) -> None:
+        return None
+
+    def error(self, message: str) -> None:
+        return None
+
+
+SAMPLE_SECONDS = 0.05
+
+
+def reference_workload() -> int:
+    """The fixed unit of work every planning timing is divided by."""
+    total = 0
+    for value in range(20000):
+        total += value * value % 7
+    return total
+
+
+def sample_seconds(action: Callable[[], object], loops: int) -> float:
+    gc.collect()
+    gc.disable()  # as in timeit: a collection landing inside one sample is noise, not cost
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            action()
+        return time.perf_counter() - started
+    finally:
+        gc.enable()
+
+
+def relative_cost(action: Callable[[], object], repeat: int) -> float:
+    """Median cost of one ``action`` call, in runs of ``reference_workload``."""
+    action()  # warm-up: imports, caches and the page cache would otherwise land in the first sample
+    loops = 1
+    while sample_seconds(action, loops) < SAMPLE_SECONDS:
+        loops *= 2
+    ratios = []
+    reference = sample_seconds(reference_workload, 1)
+    for _ in range(repeat):
+        elapsed = sample_seconds(action, loops) / loops
+        following = sample_seconds(reference_workload, 1)
+        ratios.append(elapsed / ((reference + following) / 2))  # bracketed, so a drift mid-sample is averaged out
+        reference = following
+    return float(f"{statistics.median(ratios):.4g}")
+
+
+def resolver_for(workdir: Path) -> EmojiAssetResolver:
+    return EmojiAssetResolver(ROOT / "assets", "twemoji-72x72", workdir / "emoji", QuietLogger())
+
+
+def time_case(workdir: Path, repeat: int) -> Dict[str, float]:
+    config = ConfigLoader(workdir).load()
+    texts = [cue.text for cue in config.cues]
+
+    def split_all() -> None:
+        _split_clusters_cached.cache_clear()
+        for text in texts:
+            EmojiTokenizer.split_clusters(text)
+
+    def validate() -> None:
+        errors = ValidationService(LocalFileSystem()).validate(
+            workdir, config, ROOT / "assets", "twemoji-72x72", None, resolver_for(workdir)
+        )
+        assert not errors, errors
+
+    timings = {
+        "config_load": relative_cost(lambda: ConfigLoader(workdir).load(), repeat),
+        "split_clusters": relative_cost(split_all, repeat),
+        "validate": relative_cost(validate, repeat),
+    }
+    resolver = resolver_for(workdir)
+    for mode in (RENDER_MODE_OVERLAYS, RENDER_MODE_STRIPS):
+        moded = replace(config, render=RenderConfig(mode=mode, tmp_dir=config.render.tmp_dir))
+        script = workdir / "out" / f"{mode}.filter.txt"
+        factory = FfmpegCommandFactory()
+        timings[f"build_{mode}"] = relative_cost(lambda: factory.build(workdir, moded, resolver, filter_script=script), repeat)
+    return timings
+
+
+def time_encode(workdir: Path) -> Dict[str, float]:
+    config = ConfigLoader(workdir).load()
+    resolver = resolver_for(workdir)
+    timings = {}
+    for mode in (RENDER_MODE_OVERLAYS, RENDER_MODE_STRIPS):
+        moded = replace(config, render=RenderConfig(mode=mode, tmp_dir=config.render.tmp_dir))
+        script = workdir / "out" / f"{mode}.filter.txt"
+        command = FfmpegCommandFactory().build(workdir, moded, resolver, filter_script=script)
+        command = [command[0], "-v", "error", *command[1:-1], "-f", "null", "-"]
+        started = time.perf_counter()
+        subprocess.run(command, check=True)
+        timings[f"encode_{mode}_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return timings
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions = []
+    for case, timings in results.items():
+        for metric, value in timings.items():
+            previous = baseline.get(case, {}).get(metric)
+            if not previous:
+                continue
+            ratio = value / previous
+            marker = "  REGRESSION" if ratio > 1 + tolerance else ""
+            print(f"{case:<28} {metric:<26} {previous:>10} -> {value:>10}  x{ratio:.2f}{marker}")
+            if marker:
+                regressions.append(f"{case} {metric}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cues", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--emojis-per-cue", type=int, default=3)
+    parser.add_argument("--vocabulary", type=int, default=20)
+    parser.add_argument("--typing", choices=["on", "off", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=15, help="Samples per timing; the median is kept.")
+    parser.add_argument("--encode", action="store_true", help="Also encode short clips (requires ffmpeg).")
+    parser.add_argument("--encode-cues", type=int, default=8, help="Cue count of the encoded clips.")
+    parser.add_argument("--json", dest="json_path", default=None, help="Where to write the results.")
+    parser.add_argument("--baseline", default=None, help="Earlier results to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown before flagging (0.5 = 50%%).")
+    args = parser.parse_args()
+
+    typing_modes = {"on": [True], "off": [False], "both": [True, False]}[args.typing]
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.cues:
+            for typing in typing_modes:
+                spec = SyntheticSpec(
+                    cues=count, emojis_per_cue=args.emojis_per_cue, vocabulary=args.vocabulary, typing=typing
+                )
+                case = f"cues={count},typing={'on' if typing else 'off'}"
+                workdir = write_workdir(Path(tmp) / case.replace(",", "_").replace("=", "-"), spec)
+                results[case] = time_case(workdir, args.repeat)
+                print(case, json.dumps(results[case]))
+
+        if args.encode:
+            if shutil.which("ffmpeg") is None:
+                print("ffmpeg is not available in PATH; skipping encodes.", file=sys.stderr)
+            else:
+                spec = SyntheticSpec(cues=args.encode_cues, emojis_per_cue=args.emojis_per_cue, vocabulary=args.vocabulary)
+                workdir = write_workdir(Path(tmp) / "encode", spec, media=True)
+                case = f"encode,cues={args.encode_cues}"
+                results[case] = time_encode(workdir)
+                print(case, json.dumps(results[case]))
+
+    payload = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "emojisPerCue": args.emojis_per_cue,
+            "vocabulary": args.vocabulary,
+            "repeat": args.repeat,
+            "referenceMs": round(statistics.median(sample_seconds(reference_workload, 1) for _ in range(args.repeat)) * 1000, 3),
+        },
+        "results": results,
+    }
+    regressions: List[str] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} timing(s) slower than the baseline by more than {args.tolerance:.0%}.")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
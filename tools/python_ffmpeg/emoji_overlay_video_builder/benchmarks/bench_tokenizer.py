@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Measures EmojiTokenizer throughput (clusters/sec) against the previous loop implementation.
+
+The corpus mixes plain emojis, skin tones, ZWJ families, keycaps, flags and tag sequences.
+The legacy loop splits tag sequences into one cluster per tag character, so the number of
+cues it tokenizes differently is reported next to the timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import synthetic  # noqa: F401  (puts the tool directory on sys.path)
+
+from emoji_overlay_video_builder import EmojiTokenizer, _split_clusters_cached
+
+SKIN_MODIFIERS = set(range(0x1F3FB, 0x1F400))
+
+SAMPLES = [
+    "😀",
+    "✨",
+    "❤️",
+    "👍🏽",
+    "👩‍💻",
+    "👨‍👩‍👧‍👦",
+    "🧑🏿‍🚀",
+    "1️⃣",
+    "#⃣",
+    "🇺🇸",
+    "🏴\U000e0067\U000e0062\U000e0073\U000e0063\U000e0074\U000e007f",
+]
+
+
+def legacy_split_clusters(text: str) -> List[str]:
+    """The string-concatenating loop EmojiTokenizer used before the table-driven engine."""
+    clusters: List[str] = []
+    i = 0
+    while i < len(text):
+        cluster = text[i]
+        i += 1
+
+        while i < len(text):
+            code = ord(text[i])
+            prev = ord(cluster[-1])
+            if code == 0xFE0F or code in SKIN_MODIFIERS:
+                cluster += text[i]
+                i += 1
+                continue
+            if prev == 0x200D:
+                cluster += text[i]
+                i += 1
+                continue
+            if code == 0x200D:
+                cluster += text[i]
+                i += 1
+                continue
+            if 0x1F1E6 <= prev <= 0x1F1FF and 0x1F1E6 <= code <= 0x1F1FF:
+                cluster += text[i]
+                i += 1
+                continue
+            if code == 0x20E3:
+                cluster += text[i]
+                i += 1
+                continue
+            break
+
+        if not cluster.isspace():
+            clusters.append(cluster)
+    return clusters
+
+
+def corpus(cues: int, emojis_per_cue: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(cues):
+        parts = []
+        for _ in range(emojis_per_cue):
+            sample = rng.choice(SAMPLES)
+            if parts and sample == "🇺🇸" and parts[-1] == "🇺🇸":
+                sample = "😀"
+            parts.append(sample)
+        texts.append("".join(parts))
+    return texts
+
+
+def measure(name: str, split: Callable[[str], List[str]], texts: List[str], repeat: int) -> dict:
+    clusters = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            clusters += len(split(text))
+    wall = time.perf_counter() - started
+    return {
+        "implementation": name,
+        "clusters": clusters,
+        "wall_seconds": round(wall, 4),
+        "clusters_per_sec": round(clusters / wall),
+        "cues_per_sec": round(len(texts) * repeat / wall),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cues", type=int, default=10000)
+    parser.add_argument("--emojis-per-cue", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus (cached passes hit the LRU).")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", default=None, help="Optional path for machine-readable results.")
+    args = parser.parse_args()
+
+    texts = corpus(args.cues, args.emojis_per_cue, args.seed)
+    mismatches = sum(1 for text in texts if legacy_split_clusters(text) != EmojiTokenizer.split_clusters(text))
+
+    _split_clusters_cached.cache_clear()
+    results = [
+        measure("legacy_loop", legacy_split_clusters, texts, args.repeat),
+        measure("table_uncached", lambda text: list(_split_clusters_cached.__wrapped__(text)), texts, args.repeat),
+        measure("table_cached", EmojiTokenizer.split_clusters, texts, args.repeat),
+    ]
+
+    print(f"{'implementation':<16} {'clusters':>10} {'wall s':>8} {'clusters/s':>12} {'cues/s':>10}")
+    for row in results:
+        print(
+            f"{row['implementation']:<16} {row['clusters']:>10} {row['wall_seconds']:>8}"
+            f" {row['clusters_per_sec']:>12} {row['cues_per_sec']:>10}"
+        )
+
+    print(f"legacy_loop tokenized {mismatches} of {len(texts)} cue(s) differently (tag sequences, adjacent flags).")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+"""Synthetic workdir generator shared by the emoji overlay builder benchmarks."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from emoji_overlay_video_builder import EmojiCodepointEncoder  # noqa: E402
+
+SAMPLE_EMOJI = ROOT / "assets" / "emoji" / "twemoji" / "72x72" / "1f480.png"
+VOCABULARY_BASE = 0x1F600
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    cues: int
+    emojis_per_cue: int
+    vocabulary: int
+    typing: bool = True
+    cue_seconds: float = 1.0
+    gap_seconds: float = 0.25
+
+
+def vocabulary(size: int) -> List[str]:
+    return [chr(VOCABULARY_BASE + n) for n in range(size)]
+
+
+def cue_texts(spec: SyntheticSpec) -> List[str]:
+    words = vocabulary(spec.vocabulary)
+    return [
+        "".join(words[(cue * spec.emojis_per_cue + idx) % len(words)] for idx in range(spec.emojis_per_cue))
+        for cue in range(spec.cues)
+    ]
+
+
+def duration(spec: SyntheticSpec) -> float:
+    return spec.cues * (spec.cue_seconds + spec.gap_seconds) + spec.gap_seconds
+
+
+def write_workdir(root: Path, spec: SyntheticSpec, media: bool = False, fps: int = 30) -> Path:
+    """Writes ``config.json`` and an emoji override dir with ``spec.vocabulary`` assets.
+
+    With ``media`` the background and audio are real files generated by ffmpeg (needed for
+    encodes); otherwise they are empty placeholders, which is enough for validation.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    emoji_dir = root / "emoji"
+    emoji_dir.mkdir(exist_ok=True)
+    for word in vocabulary(spec.vocabulary):
+        shutil.copyfile(SAMPLE_EMOJI, emoji_dir / EmojiCodepointEncoder.to_filename(word))
+
+    cues = []
+    cursor = spec.gap_seconds
+    for text in cue_texts(spec):
+        cues.append(
+            {
+                "text": text,
+                "start": round(cursor, 3),
+                "end": round(cursor + spec.cue_seconds, 3),
+                "typingDuration": spec.cue_seconds / 2 if spec.typing else 0.0,
+            }
+        )
+        cursor += spec.cue_seconds + spec.gap_seconds
+
+    if media:
+        seconds = f"{duration(spec):.3f}"
+        subprocess.run(
+            ["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", "color=c=0x202030:s=1280x720", "-frames:v", "1", str(root / "bg.png")],
+            check=True,
+        )
+        subprocess.run(
+            ["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo", "-t", seconds, str(root / "audio.wav")],
+            check=True,
+        )
+    else:
+        (root / "bg.png").write_bytes(b"")
+        (root / "audio.wav").write_bytes(b"")
+
+    config = {
+        "inputs": {"background": "bg.png", "audio": "audio.wav", "emojiPackId": "twemoji-72x72", "emojiOverrideDir": "emoji"},
+        "video": {"width": 1280, "height": 720, "fps": fps, "crf": 20},
+        "output": {"file": "out/final.mp4"},
+        "cues": cues,
+    }
+    (root / "config.json").write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8")
+    return root
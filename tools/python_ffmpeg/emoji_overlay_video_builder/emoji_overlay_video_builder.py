@@ -4,14 +4,24 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import hashlib
+import importlib
+import itertools
 import json
+import math
 import os
+import re
 import shlex
 import subprocess
 import sys
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Protocol, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
 
 
 class LoggerPort(Protocol):
@@ -38,6 +48,16 @@ class FileSystemPort(Protocol):
 
     def mkdir(self, path: Path) -> None: ...
 
+    def write_text(self, path: Path, content: str) -> None: ...
+
+    def read_text(self, path: Path) -> str: ...
+
+    def move(self, source: Path, destination: Path) -> None: ...
+
+    def write_lines(self, path: Path, lines: Iterable[str]) -> None: ...
+
+    def size(self, path: Path) -> int: ...
+
 
 class LocalFileSystem(FileSystemPort):
     def exists(self, path: Path) -> bool:
@@ -46,10 +66,95 @@ class LocalFileSystem(FileSystemPort):
     def mkdir(self, path: Path) -> None:
         path.mkdir(parents=True, exist_ok=True)
 
+    def write_text(self, path: Path, content: str) -> None:
+        path.write_text(content, encoding="utf-8")
+
+    def read_text(self, path: Path) -> str:
+        return path.read_text(encoding="utf-8")
+
+    def move(self, source: Path, destination: Path) -> None:
+        os.replace(source, destination)
+
+    def write_lines(self, path: Path, lines: Iterable[str]) -> None:
+        with path.open("w", encoding="utf-8") as handle:
+            for line in lines:
+                handle.write(line)
+
+    def size(self, path: Path) -> int:
+        return path.stat().st_size
+
 
 class ProcessRunnerPort(Protocol):
     def run(self, args: Sequence[str]) -> int: ...
 
+    def run_piped(self, args: Sequence[str], chunks: Iterable[bytes]) -> int: ...
+
+    def metrics(self) -> List["RunMetrics"]: ...
+
+
+@dataclass(frozen=True)
+class AudioStreamInfo:
+    codec: str
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+
+class MediaProbePort(Protocol):
+    def duration(self, path: Path) -> Optional[float]: ...
+
+    def audio_stream(self, path: Path) -> Optional[AudioStreamInfo]: ...
+
+
+class FfprobeMediaProbe(MediaProbePort):
+    def duration(self, path: Path) -> Optional[float]:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                str(path),
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        try:
+            return float(result.stdout.strip())
+        except ValueError:
+            return None
+
+    def audio_stream(self, path: Path) -> Optional[AudioStreamInfo]:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "a:0",
+                "-show_entries",
+                "stream=codec_name,sample_rate,channels",
+                "-of",
+                "json",
+                str(path),
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        try:
+            stream = json.loads(result.stdout)["streams"][0]
+        except (ValueError, KeyError, IndexError):
+            return None
+        return AudioStreamInfo(
+            codec=stream.get("codec_name", ""),
+            sample_rate=int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+            channels=stream.get("channels"),
+        )
+
 
 class CommandPrinter:
     @staticmethod
@@ -60,10 +165,252 @@ class CommandPrinter:
         return shlex.join(list(command))
 
 
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """One ``-progress`` block reported by ffmpeg."""
+
+    frame: int
+    fps: float
+    out_seconds: float
+    speed: Optional[float]
+    bitrate_kbits: Optional[float]
+    total_size: Optional[int]
+    done: bool
+
+
+class ProgressParser:
+    """Folds ffmpeg ``-progress`` ``key=value`` lines into a snapshot per ``progress=`` line."""
+
+    def __init__(self) -> None:
+        self._fields: Dict[str, str] = {}
+
+    def feed(self, line: str) -> Optional[ProgressSnapshot]:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+        if key != "progress":
+            self._fields[key] = value.strip()
+            return None
+        fields, self._fields = self._fields, {}
+        out_us = self._number(fields.get("out_time_us") or fields.get("out_time_ms"))
+        return ProgressSnapshot(
+            frame=int(self._number(fields.get("frame")) or 0),
+            fps=self._number(fields.get("fps")) or 0.0,
+            out_seconds=(out_us or 0.0) / 1_000_000,
+            speed=self._number(fields.get("speed", "").rstrip("x")),
+            bitrate_kbits=self._number(fields.get("bitrate", "").replace("kbits/s", "")),
+            total_size=int(self._number(fields.get("total_size")) or 0) or None,
+            done=value.strip() == "end",
+        )
+
+    @staticmethod
+    def _number(raw: Optional[str]) -> Optional[float]:
+        try:
+            return float(raw) if raw else None
+        except ValueError:
+            return None  # "N/A" before the first packet
+
+
+@dataclass(frozen=True)
+class RunMetrics:
+    """What one finished process cost; progress fields are None for non-ffmpeg commands."""
+
+    args: Tuple[str, ...]
+    exit_code: int
+    wall_seconds: float
+    peak_rss_kb: Optional[int]
+    progress: Optional[ProgressSnapshot] = None
+
+
 class SubprocessRunner(ProcessRunnerPort):
+    """Runs commands as child processes and records ``RunMetrics`` for each of them.
+
+    ffmpeg commands get ``-progress pipe:1 -nostats``; the progress stream is parsed on a
+    reader thread and logged every ``interval`` seconds (with an ETA when the expected
+    output duration is known from ``-t``, ``-frames:v`` or the probed inputs). Peak RSS
+    comes from ``os.wait4`` where the platform has it.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[LoggerPort] = None,
+        probe: Optional[MediaProbePort] = None,
+        interval: float = 5.0,
+    ):
+        self._logger = logger
+        self._probe = probe
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._metrics: List[RunMetrics] = []
+        self._durations: Dict[Path, Optional[float]] = {}  # probed once per input across all runs
+
     def run(self, args: Sequence[str]) -> int:
-        result = subprocess.run(args, check=False)
-        return result.returncode
+        return self._run(args, None)
+
+    def run_piped(self, args: Sequence[str], chunks: Iterable[bytes]) -> int:
+        return self._run(args, chunks)
+
+    def metrics(self) -> List[RunMetrics]:
+        with self._lock:
+            return list(self._metrics)
+
+    def _run(self, args: Sequence[str], chunks: Optional[Iterable[bytes]]) -> int:
+        tracked = Path(args[0]).name in ("ffmpeg", "ffmpeg.exe") and "-progress" not in args
+        argv = [args[0], "-progress", "pipe:1", "-nostats", *args[1:]] if tracked else list(args)
+        started = time.monotonic()
+        process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE if chunks is not None else None,
+            stdout=subprocess.PIPE if tracked else None,
+            text=False,
+        )
+
+        last: List[ProgressSnapshot] = []
+        reader = None
+        if tracked:
+            assert process.stdout is not None
+            reader = threading.Thread(
+                target=self._follow, args=(process.stdout, self._expected_seconds(args), last), daemon=True
+            )
+            reader.start()
+
+        if chunks is not None:
+            assert process.stdin is not None
+            try:
+                for chunk in chunks:
+                    process.stdin.write(chunk)
+            except BrokenPipeError:
+                pass
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        code, peak_rss_kb = self._wait(process)
+        if reader is not None:
+            reader.join()
+            process.stdout.close()
+        with self._lock:
+            self._metrics.append(
+                RunMetrics(
+                    args=tuple(args),
+                    exit_code=code,
+                    wall_seconds=time.monotonic() - started,
+                    peak_rss_kb=peak_rss_kb,
+                    progress=last[-1] if last else None,
+                )
+            )
+        return code
+
+    def _follow(self, stream: Any, expected: Optional[float], last: List[ProgressSnapshot]) -> None:
+        parser = ProgressParser()
+        logged = time.monotonic()
+        for raw in stream:
+            snapshot = parser.feed(raw.decode("utf-8", "replace"))
+            if snapshot is None:
+                continue
+            last.append(snapshot)
+            del last[:-1]
+            if self._logger is not None and (snapshot.done or time.monotonic() - logged >= self._interval):
+                logged = time.monotonic()
+                self._logger.info(self._describe(snapshot, expected))
+
+    @staticmethod
+    def _describe(snapshot: ProgressSnapshot, expected: Optional[float]) -> str:
+        def clock(seconds: float) -> str:
+            seconds = int(max(seconds, 0))
+            return f"{seconds // 3600:d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+        line = f"ffmpeg progress: frame={snapshot.frame} fps={snapshot.fps:.1f}"
+        if snapshot.speed:
+            line += f" speed={snapshot.speed:.2f}x"
+        line += f" time={clock(snapshot.out_seconds)}"
+        if expected:
+            line += f"/{clock(expected)} ({min(snapshot.out_seconds / expected, 1.0):.0%})"
+            if snapshot.speed and not snapshot.done:
+                line += f" ETA {clock((expected - snapshot.out_seconds) / snapshot.speed)}"
+        return line
+
+    def _expected_seconds(self, args: Sequence[str]) -> Optional[float]:
+        """Output duration implied by the command, used for the progress percentage and ETA."""
+        try:
+            if "-t" in args:
+                return float(args[args.index("-t") + 1])
+            if "-frames:v" in args:
+                if "-r" not in args:
+                    return None  # a handful of frames (e.g. one keyframe); not worth probing the inputs
+                return float(args[args.index("-frames:v") + 1]) / float(args[args.index("-r") + 1])
+        except (IndexError, ValueError):
+            return None
+        if self._probe is None:
+            return None
+
+        durations = []
+        still = False  # image inputs (-loop / -framerate) last as long as the graph repeats them
+        for idx, arg in enumerate(args[:-1]):
+            if arg in ("-loop", "-framerate"):
+                still = True
+            elif arg == "-i":
+                if not still and args[idx + 1] != "-":
+                    source = Path(args[idx + 1])
+                    if source not in self._durations:
+                        try:
+                            self._durations[source] = self._probe.duration(source)
+                        except OSError:
+                            return None  # no ffprobe available
+                    duration = self._durations[source]
+                    if duration:
+                        durations.append(duration)
+                still = False
+        if not durations:
+            return None
+        return min(durations) if "-shortest" in args else max(durations)
+
+    @staticmethod
+    def _wait(process: subprocess.Popen) -> Tuple[int, Optional[int]]:
+        if not hasattr(os, "wait4"):
+            return process.wait(), None
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        peak = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+        return process.returncode, peak
+
+
+class ImageLoaderPort(Protocol):
+    def load_rgb(self, path: Path, width: int, height: int) -> Any: ...
+
+    def load_rgba(self, path: Path, size: int) -> Any: ...
+
+
+def _import_optional(module: str, package: str) -> Any:
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ImportError(f"The rawvideo render mode requires '{package}' (pip install {package}).") from exc
+
+
+class PillowImageLoader(ImageLoaderPort):
+    """Decodes images into ``uint8`` NumPy arrays with Pillow."""
+
+    def load_rgb(self, path: Path, width: int, height: int) -> Any:
+        np = _import_optional("numpy", "numpy")
+        image_module = _import_optional("PIL.Image", "pillow")
+        with image_module.open(path) as image:
+            resized = image.convert("RGB").resize((width, height), image_module.BILINEAR)
+            return np.array(resized, dtype=np.uint8)
+
+    def load_rgba(self, path: Path, size: int) -> Any:
+        np = _import_optional("numpy", "numpy")
+        image_module = _import_optional("PIL.Image", "pillow")
+        with image_module.open(path) as image:
+            resized = image.convert("RGBA").resize((size, size), image_module.BILINEAR)
+            return np.array(resized, dtype=np.uint8)
 
 
 @dataclass(frozen=True)
@@ -81,17 +428,78 @@ class SafeAreaConfig:
     padding_left: int = 0
 
 
+@dataclass(frozen=True)
+class EncodingProfile:
+    """x264 settings selected by ``video.profile``; ``None`` keeps the encoder default."""
+
+    preset: Optional[str] = None
+    tune: Optional[str] = None
+    threads: Optional[int] = None
+    keyframe_interval: Optional[float] = None  # seconds
+
+    def x264_args(self, fps: int) -> List[str]:
+        args: List[str] = []
+        if self.preset:
+            args.extend(["-preset", self.preset])
+        if self.tune:
+            args.extend(["-tune", self.tune])
+        if self.threads is not None:
+            args.extend(["-threads", str(self.threads)])
+        if self.keyframe_interval:
+            args.extend(["-g", str(max(1, int(round(self.keyframe_interval * fps))))])
+        return args
+
+
+ENCODING_PROFILE_DEFAULT = "default"
+ENCODING_PROFILES: Dict[str, EncodingProfile] = {
+    ENCODING_PROFILE_DEFAULT: EncodingProfile(),
+    "fast": EncodingProfile(preset="veryfast"),
+    # Mostly still frames: long GOPs and x264's still-image tuning shrink the file.
+    "static": EncodingProfile(tune="stillimage", keyframe_interval=10.0),
+    # Seekable output for streaming/players: a keyframe every 2 s.
+    "streaming": EncodingProfile(preset="veryfast", keyframe_interval=2.0),
+    "archive": EncodingProfile(preset="slow"),
+}
+
+
 @dataclass(frozen=True)
 class VideoConfig:
+    """Output geometry and encoding; ``preset``/``tune``/``threads``/``keyframe_interval`` override ``profile``."""
+
     width: int = 1280
     height: int = 720
     fps: int = 30
     crf: int = 20
+    profile: str = ENCODING_PROFILE_DEFAULT
+    preset: Optional[str] = None
+    tune: Optional[str] = None
+    threads: Optional[int] = None
+    keyframe_interval: Optional[float] = None
+
+    def encoding(self) -> EncodingProfile:
+        overrides = {
+            name: value
+            for name, value in (
+                ("preset", self.preset),
+                ("tune", self.tune),
+                ("threads", self.threads),
+                ("keyframe_interval", self.keyframe_interval),
+            )
+            if value is not None
+        }
+        return replace(ENCODING_PROFILES[self.profile], **overrides)
+
+
+RENDER_MODE_OVERLAYS = "ffmpeg_overlays"
+RENDER_MODE_STRIPS = "ffmpeg_strips"
+RENDER_MODE_FRAMES = "frames"
+RENDER_MODE_RAWVIDEO = "rawvideo"
+RENDER_MODES = (RENDER_MODE_OVERLAYS, RENDER_MODE_STRIPS, RENDER_MODE_FRAMES, RENDER_MODE_RAWVIDEO)
 
 
 @dataclass(frozen=True)
 class RenderConfig:
-    mode: str = "ffmpeg_overlays"
+    mode: str = RENDER_MODE_OVERLAYS
     tmp_dir: str = "out/.tmp_frames"
 
 
@@ -112,9 +520,52 @@ class LayoutConfig:
     offset_y: int = 0
 
 
+@dataclass(frozen=True)
+class RenditionConfig:
+    """An extra output derived from the composited stream: optional centre crop, then scale."""
+
+    file: str
+    width: int
+    height: int
+    crop_width: Optional[int] = None
+    crop_height: Optional[int] = None
+    crf: Optional[int] = None
+
+
 @dataclass(frozen=True)
 class OutputConfig:
     file: str = "out/final.mp4"
+    renditions: List[RenditionConfig] = field(default_factory=list)
+
+
+COST_METRICS = (
+    "inputs",
+    "overlayNodes",
+    "uniqueAssets",
+    "filterScriptBytes",
+    "decoderMemoryMb",
+    "overlayEvalsPerSecond",
+)
+COST_WARN_DEFAULTS: Dict[str, float] = {
+    "inputs": 500,
+    "overlayNodes": 1000,
+    "uniqueAssets": 300,
+    "filterScriptBytes": 4 * 1024 * 1024,
+    "decoderMemoryMb": 2048,
+    "overlayEvalsPerSecond": 30000,
+}
+COST_FAIL_DEFAULTS: Dict[str, float] = {
+    "overlayNodes": 10000,
+    "decoderMemoryMb": 8192,
+}
+
+
+@dataclass(frozen=True)
+class CostLimits:
+    """Warn/fail thresholds keyed by ``COST_METRICS`` name; a metric above its limit trips it."""
+
+    warn: Dict[str, float] = field(default_factory=lambda: dict(COST_WARN_DEFAULTS))
+    fail: Dict[str, float] = field(default_factory=lambda: dict(COST_FAIL_DEFAULTS))
 
 
 @dataclass(frozen=True)
@@ -126,49 +577,51 @@ class AppConfig:
     layout: LayoutConfig
     output: OutputConfig
     cues: List[CueConfig]
+    limits: CostLimits = field(default_factory=CostLimits)
+
+
+def _char_class(ranges: Sequence[Tuple[int, int]]) -> str:
+    return "".join(re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}" for a, b in ranges)
+
+
+# Unicode emoji-sequence tables (UTS #51): code points that extend the preceding base.
+EMOJI_VARIATION_SELECTORS = ((0xFE0E, 0xFE0F),)
+EMOJI_SKIN_MODIFIERS = ((0x1F3FB, 0x1F3FF),)
+EMOJI_TAG_CHARACTERS = ((0xE0020, 0xE007F),)  # tag spec + CANCEL TAG (subdivision flags)
+EMOJI_KEYCAP = 0x20E3
+EMOJI_KEYCAP_BASES = "0123456789#*"
+EMOJI_REGIONAL_INDICATORS = ((0x1F1E6, 0x1F1FF),)
+EMOJI_ZWJ = 0x200D
+
+_EXTEND = _char_class(
+    [*EMOJI_VARIATION_SELECTORS, *EMOJI_SKIN_MODIFIERS, *EMOJI_TAG_CHARACTERS, (EMOJI_KEYCAP, EMOJI_KEYCAP)]
+)
+_REGIONAL = _char_class(EMOJI_REGIONAL_INDICATORS)
+_ELEMENT = (
+    f"(?:[{re.escape(EMOJI_KEYCAP_BASES)}]\uFE0F?\u20E3"
+    f"|[{_REGIONAL}]{{2}}"
+    f"|.)[{_EXTEND}]*"
+)
+_CLUSTER_RE = re.compile(f"{_ELEMENT}(?:{re.escape(chr(EMOJI_ZWJ))}(?:{_ELEMENT})?)*", re.DOTALL)
+
+
+@lru_cache(maxsize=16384)
+def _split_clusters_cached(text: str) -> Tuple[str, ...]:
+    return tuple(cluster for cluster in _CLUSTER_RE.findall(text) if not cluster.isspace())
 
 
 class EmojiTokenizer:
-    """Splits text to emoji clusters and preserves ZWJ/skin-tone combinations."""
+    """Splits text to emoji clusters and preserves ZWJ/skin-tone combinations.
 
-    _skin_modifiers = set(range(0x1F3FB, 0x1F400))
+    One regex compiled at import from the sequence tables above matches a whole cluster
+    (keycaps, flag pairs, modifiers, tag sequences, ZWJ chains), so clusters are slices of
+    the input. Results are cached per cue text because validation, planning and cache keys
+    all tokenize the same cues.
+    """
 
     @staticmethod
     def split_clusters(text: str) -> List[str]:
-        clusters: List[str] = []
-        i = 0
-        while i < len(text):
-            cluster = text[i]
-            i += 1
-
-            while i < len(text):
-                code = ord(text[i])
-                prev = ord(cluster[-1])
-                if code == 0xFE0F or code in EmojiTokenizer._skin_modifiers:
-                    cluster += text[i]
-                    i += 1
-                    continue
-                if prev == 0x200D:
-                    cluster += text[i]
-                    i += 1
-                    continue
-                if code == 0x200D:
-                    cluster += text[i]
-                    i += 1
-                    continue
-                if 0x1F1E6 <= prev <= 0x1F1FF and 0x1F1E6 <= code <= 0x1F1FF:
-                    cluster += text[i]
-                    i += 1
-                    continue
-                if code == 0x20E3:
-                    cluster += text[i]
-                    i += 1
-                    continue
-                break
-
-            if not cluster.isspace():
-                clusters.append(cluster)
-        return clusters
+        return list(_split_clusters_cached(text))
 
 
 class EmojiCodepointEncoder:
@@ -179,11 +632,33 @@ class EmojiCodepointEncoder:
 
 
 class EmojiAssetResolver:
-    def __init__(self, assets_root: Path, emoji_pack_id: str, override_dir: Optional[Path], logger: LoggerPort):
+    """Resolves emoji clusters to PNG assets, preferring the override dir over the bundled pack.
+
+    Each directory is listed once into an in-memory index and every cluster is resolved at
+    most once, so validation and build share the same lookups instead of issuing a
+    ``stat`` per emoji occurrence. With ``manifest`` set, the bundled pack listing is read
+    from (and refreshed into) that JSON file while the pack directory's mtime is unchanged.
+    Resolvers given the same ``indexes`` dict list every directory only once between them.
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(
+        self,
+        assets_root: Path,
+        emoji_pack_id: str,
+        override_dir: Optional[Path],
+        logger: LoggerPort,
+        manifest: Optional[Path] = None,
+        indexes: Optional[Dict[Path, frozenset]] = None,
+    ):
         self._assets_root = assets_root
         self._emoji_pack_id = emoji_pack_id
         self._override_dir = override_dir
         self._logger = logger
+        self._manifest = manifest
+        self._indexes: Dict[Path, frozenset] = indexes if indexes is not None else {}
+        self._resolved: Dict[str, Optional[Path]] = {}
 
     def _bundled_pack_dir(self) -> Path:
         if self._emoji_pack_id == "twemoji-72x72":
@@ -196,15 +671,72 @@ class EmojiAssetResolver:
         return self._assets_root / "emoji" / self._emoji_pack_id
 
     def resolve(self, emoji: str) -> Path:
-        filename = EmojiCodepointEncoder.to_filename(emoji)
-        if self._override_dir:
-            override = self._override_dir / filename
-            if override.exists():
-                return override
-        bundled = self._bundled_pack_dir() / filename
-        if bundled.exists():
-            return bundled
-        raise FileNotFoundError(f"Emoji asset not found for '{emoji}' as '{filename}'")
+        if emoji not in self._resolved:
+            self._resolved[emoji] = self._lookup(EmojiCodepointEncoder.to_filename(emoji))
+        path = self._resolved[emoji]
+        if path is None:
+            raise FileNotFoundError(
+                f"Emoji asset not found for '{emoji}' as '{EmojiCodepointEncoder.to_filename(emoji)}'"
+            )
+        return path
+
+    def resolved(self) -> Dict[str, Path]:
+        """Every cluster resolved so far, mapped to its asset path."""
+        return {emoji: path for emoji, path in self._resolved.items() if path is not None}
+
+    def invalidate(self, directory: Path) -> None:
+        """Forgets every resolution and the index of ``directory`` after files were added or removed there."""
+        self._resolved.clear()
+        self._indexes.pop(directory, None)
+
+    def _lookup(self, filename: str) -> Optional[Path]:
+        if self._override_dir and filename in self._index(self._override_dir):
+            return self._override_dir / filename
+        bundled = self._bundled_pack_dir()
+        if filename in self._index(bundled, self._manifest):
+            return bundled / filename
+        return None
+
+    def _index(self, directory: Path, manifest: Optional[Path] = None) -> frozenset:
+        if directory not in self._indexes:
+            self._indexes[directory] = self._load_index(directory, manifest)
+        return self._indexes[directory]
+
+    def _load_index(self, directory: Path, manifest: Optional[Path]) -> frozenset:
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+        except OSError:
+            return frozenset()
+
+        if manifest is not None and manifest.exists():
+            try:
+                data = json.loads(manifest.read_text(encoding="utf-8"))
+                if (
+                    data.get("version") == self.MANIFEST_VERSION
+                    and data.get("directory") == str(directory)
+                    and data.get("mtime_ns") == mtime_ns
+                ):
+                    return frozenset(data["files"])
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            self._logger.warning(f"Emoji manifest is stale or unreadable, re-indexing: {manifest}")
+
+        with os.scandir(directory) as entries:
+            files = frozenset(entry.name for entry in entries if entry.name.endswith(".png"))
+
+        if manifest is not None:
+            payload = {
+                "version": self.MANIFEST_VERSION,
+                "directory": str(directory),
+                "mtime_ns": mtime_ns,
+                "files": sorted(files),
+            }
+            try:
+                manifest.parent.mkdir(parents=True, exist_ok=True)
+                manifest.write_text(json.dumps(payload), encoding="utf-8")
+            except OSError as err:
+                self._logger.warning(f"Cannot write emoji manifest {manifest}: {err}")
+        return files
 
 
 class LayoutService:
@@ -229,6 +761,115 @@ class LayoutService:
         return min(total, int(progress * total + 1e-9) + (1 if progress > 0 else 0))
 
 
+@dataclass(frozen=True)
+class CueSpan:
+    """A run of consecutive frames in which a cue shows the same number of emojis."""
+
+    shown: int
+    first_frame: int
+    last_frame: int
+
+    @property
+    def frames(self) -> int:
+        return self.last_frame - self.first_frame + 1
+
+
+@dataclass(frozen=True)
+class CompiledCue:
+    first_frame: int
+    last_frame: int
+    spans: Tuple[CueSpan, ...]
+
+    @property
+    def max_shown(self) -> int:
+        return max((span.shown for span in self.spans), default=0)
+
+    @property
+    def static(self) -> bool:
+        return len({span.shown for span in self.spans}) <= 1
+
+    def appear_frame(self, idx: int) -> Optional[int]:
+        """First frame in which emoji ``idx`` is visible (``None`` if it never is)."""
+        for span in self.spans:
+            if span.shown > idx:
+                return span.first_frame
+        return None
+
+
+@dataclass(frozen=True)
+class TimelineEvent:
+    """From ``frame`` on, cue ``cue_index`` shows ``shown`` emojis (``cue_index`` is None when no cue is visible)."""
+
+    frame: int
+    cue_index: Optional[int]
+    shown: int
+
+
+class TimelineCompiler:
+    """Compiles cue timing into frame-exact visibility spans.
+
+    Every frame ``n`` inside a cue window ``[start, end]`` is sampled at ``n / fps`` through
+    ``LayoutService.shown_count``, so all render backends agree on the exact frame at which
+    each emoji appears and disappears. Windows are inclusive at both ends; where cues touch or
+    overlap, ``compile`` starts each cue after the frames of the cues before it, so no frame
+    belongs to two cues.
+    """
+
+    def __init__(self, fps: int):
+        self._fps = fps
+
+    def compile_cue(self, cue: CueConfig, total: int, not_before: int = 0) -> CompiledCue:
+        fps = self._fps
+        first = max(not_before, math.ceil(cue.start * fps - 1e-9))
+        last = math.floor(cue.end * fps + 1e-9)
+
+        spans: List[CueSpan] = []
+        for frame in range(first, last + 1):
+            shown = LayoutService.shown_count(total, frame / fps, cue.start, cue.typing_duration)
+            if spans and spans[-1].shown == shown:
+                spans[-1] = CueSpan(shown, spans[-1].first_frame, frame)
+            else:
+                spans.append(CueSpan(shown, frame, frame))
+        return CompiledCue(first_frame=first, last_frame=last, spans=tuple(spans))
+
+    def compile(self, cues: Sequence[CueConfig], totals: Sequence[int]) -> List[CompiledCue]:
+        compiled: List[CompiledCue] = []
+        free = 0  # first frame not taken by an earlier cue (cues are sorted by start)
+        for cue, total in zip(cues, totals):
+            compiled.append(self.compile_cue(cue, total, not_before=free))
+            if compiled[-1].spans:
+                free = max(free, compiled[-1].last_frame + 1)
+        return compiled
+
+    @staticmethod
+    def events(compiled: Sequence[CompiledCue]) -> List[TimelineEvent]:
+        """Merged state changes across the timeline, starting with the blank state at frame 0.
+
+        ``compile`` already keeps cue windows apart; an event that would still step back in time
+        is clamped forward, so the earlier cue keeps the shared frame.
+        """
+        events: List[TimelineEvent] = [TimelineEvent(0, None, 0)]
+
+        def push(event: TimelineEvent) -> None:
+            previous = events[-1]
+            visible = (event.cue_index, event.shown) if event.shown else (None, 0)
+            if (previous.cue_index, previous.shown) == visible:
+                return
+            frame = max(event.frame, previous.frame)
+            if previous.frame == frame:
+                events.pop()
+                if events and (events[-1].cue_index, events[-1].shown) == visible:
+                    return
+            events.append(TimelineEvent(frame, *visible))
+
+        for cue_index, cue in enumerate(compiled):
+            for span in cue.spans:
+                push(TimelineEvent(span.first_frame, cue_index, span.shown))
+            if cue.spans:
+                push(TimelineEvent(cue.last_frame + 1, None, 0))
+        return events
+
+
 class ConfigLoader:
     def __init__(self, workdir: Path):
         self._workdir = workdir
@@ -258,6 +899,7 @@ class ConfigLoader:
         render_data = data.get("render", {})
         layout_data = data.get("layout", {})
         output_data = data.get("output", {})
+        limits_data = data.get("limits", {})
 
         return AppConfig(
             inputs=InputsConfig(
@@ -276,9 +918,16 @@ class ConfigLoader:
                 height=int(video_data.get("height", 720)),
                 fps=int(video_data.get("fps", 30)),
                 crf=int(video_data.get("crf", 20)),
+                profile=video_data.get("profile", ENCODING_PROFILE_DEFAULT),
+                preset=video_data.get("preset"),
+                tune=video_data.get("tune"),
+                threads=int(video_data["threads"]) if "threads" in video_data else None,
+                keyframe_interval=(
+                    float(video_data["keyframeInterval"]) if "keyframeInterval" in video_data else None
+                ),
             ),
             render=RenderConfig(
-                mode=render_data.get("mode", "ffmpeg_overlays"),
+                mode=render_data.get("mode", RENDER_MODE_OVERLAYS),
                 tmp_dir=render_data.get("tmpDir", "out/.tmp_frames"),
             ),
             layout=LayoutConfig(
@@ -288,10 +937,38 @@ class ConfigLoader:
                 center_y=layout_data.get("centerY"),
                 offset_y=int(layout_data.get("offsetY", 0)),
             ),
-            output=OutputConfig(file=output_data.get("file", "out/final.mp4")),
+            output=OutputConfig(
+                file=output_data.get("file", "out/final.mp4"),
+                renditions=[
+                    RenditionConfig(
+                        file=item["file"],
+                        width=int(item["width"]),
+                        height=int(item["height"]),
+                        crop_width=int(item["crop"]["width"]) if "crop" in item else None,
+                        crop_height=int(item["crop"]["height"]) if "crop" in item else None,
+                        crf=int(item["crf"]) if "crf" in item else None,
+                    )
+                    for item in output_data.get("renditions", [])
+                ],
+            ),
             cues=cues,
+            limits=CostLimits(
+                warn=self._limits(COST_WARN_DEFAULTS, limits_data.get("warn", {})),
+                fail=self._limits(COST_FAIL_DEFAULTS, limits_data.get("fail", {})),
+            ),
         )
 
+    @staticmethod
+    def _limits(defaults: Dict[str, float], overrides: Dict[str, Optional[float]]) -> Dict[str, float]:
+        """Overrides the default thresholds; ``null`` disables one. Unknown names are kept for validation."""
+        limits = dict(defaults)
+        for name, value in overrides.items():
+            if value is None:
+                limits.pop(name, None)
+            else:
+                limits[name] = float(value)
+        return limits
+
 
 class ValidationService:
     def __init__(self, fs: FileSystemPort):
@@ -334,6 +1011,17 @@ class ValidationService:
             if not self._fs.exists(bundled):
                 errors.append(f"Bundled emoji pack folder is missing: {bundled}")
 
+        if config.render.mode not in RENDER_MODES:
+            errors.append(f"Unsupported render mode: {config.render.mode} (expected one of: {', '.join(RENDER_MODES)})")
+        for kind, limits in (("warn", config.limits.warn), ("fail", config.limits.fail)):
+            for name in limits:
+                if name not in COST_METRICS:
+                    errors.append(f"Unknown limits.{kind} metric: {name} (expected one of: {', '.join(COST_METRICS)})")
+        if config.video.profile not in ENCODING_PROFILES:
+            errors.append(
+                f"Unknown encoding profile: {config.video.profile} (expected one of: {', '.join(ENCODING_PROFILES)})"
+            )
+
         for i, cue in enumerate(config.cues):
             if cue.end <= cue.start:
                 errors.append(f"Cue #{i} has invalid time range: start={cue.start}, end={cue.end}")
@@ -351,59 +1039,862 @@ class ValidationService:
         return errors
 
 
+@dataclass(frozen=True)
+class TimeWindow:
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def frames(self, fps: int) -> int:
+        return int(round(self.duration * fps))
+
+    def rebase(self, cues: Sequence[CueConfig]) -> List[CueConfig]:
+        """Keeps cues that intersect the window, shifted so the window starts at ``t=0``."""
+        return [
+            replace(cue, start=cue.start - self.start, end=cue.end - self.start)
+            for cue in cues
+            if cue.end > self.start and cue.start < self.end
+        ]
+
+
+AUDIO_CODEC = "aac"
+AUDIO_BITRATE = "192k"
+AUDIO_COPY_SAMPLE_RATES = (44100, 48000)
+
+
+@dataclass(frozen=True)
+class AudioTrack:
+    """The audio input to mux: the source (encoded on the fly) or a ready AAC stream that is copied.
+
+    A copied track also bounds the output to ``duration``: ``-shortest`` does not stop a video
+    stream that a filter keeps generating (``tpad``/``loop``) when the audio is stream-copied.
+    """
+
+    path: Path
+    copy: bool = False
+    duration: Optional[float] = None
+
+    def codec_args(self) -> List[str]:
+        if not self.copy:
+            return ["-c:a", AUDIO_CODEC, "-b:a", AUDIO_BITRATE]
+        return ["-c:a", "copy"] + (["-t", f"{self.duration:.6f}"] if self.duration else [])
+
+
+@dataclass(frozen=True)
+class RenderTarget:
+    """Where and how ``FfmpegCommandFactory`` renders: a time window, encoder knobs and output kind.
+
+    ``still`` writes a single image instead of an encoded video; ``post_filter`` is applied
+    to the composited stream right before it is mapped to the output. ``renditions`` are
+    split off that stream and written next to ``output`` by the same process.
+    ``background`` replaces ``inputs.background`` (e.g. with a pre-scaled cached copy).
+    """
+
+    output: Path
+    window: Optional[TimeWindow] = None
+    audio: bool = True
+    threads: Optional[int] = None
+    preset: Optional[str] = None
+    still: bool = False
+    post_filter: Optional[str] = None
+    renditions: Sequence[RenditionConfig] = ()
+    audio_track: Optional[AudioTrack] = None
+    background: Optional[Path] = None
+
+
 class FfmpegCommandFactory:
-    def build(self, workdir: Path, config: AppConfig, resolver: EmojiAssetResolver) -> List[str]:
-        bg = str(workdir / config.inputs.background)
-        audio = str(workdir / config.inputs.audio)
-        output = str(workdir / config.output.file)
+    """Builds the single-pass overlay command.
+
+    Filter steps are produced lazily, so with ``filter_script`` the graph is streamed
+    straight to a ``-filter_complex_script`` file and emoji assets are opened there
+    through ``movie=`` sources, which keeps the argv a fixed size for any cue volume.
+
+    The background and the emoji sources are single decoded frames. The background is
+    scaled once and repeated with ``loop``; each overlay branch repeats its frame only for
+    the frames of its cue window and is offset there with ``setpts``, so outside that
+    window an overlay node has no secondary frames to decode, scale or blend.
+    """
+
+    def __init__(self, fs: Optional[FileSystemPort] = None):
+        self._fs = fs or LocalFileSystem()
+
+    def build(
+        self,
+        workdir: Path,
+        config: AppConfig,
+        resolver: EmojiAssetResolver,
+        target: Optional[RenderTarget] = None,
+        filter_script: Optional[Path] = None,
+    ) -> List[str]:
+        target = target or RenderTarget(output=workdir / config.output.file, renditions=tuple(config.output.renditions))
+        window = target.window
+        if window is not None:
+            config = replace(config, cues=window.rebase(config.cues))
+
+        bg = str(target.background or workdir / config.inputs.background)
+        audio_track = target.audio_track or AudioTrack(workdir / config.inputs.audio)
+
+        inputs = ["-framerate", str(config.video.fps), "-i", bg]
+        if target.audio:
+            if window is not None:
+                inputs.extend(["-ss", f"{window.start:.6f}", "-t", f"{window.duration:.6f}"])
+            inputs.extend(["-i", str(audio_track.path)])
+
+        cue_emojis: List[List[Path]] = [
+            [resolver.resolve(emoji) for emoji in EmojiTokenizer.split_clusters(cue.text)] for cue in config.cues
+        ]
+        compiled = TimelineCompiler(config.video.fps).compile(config.cues, [len(paths) for paths in cue_emojis])
+        cue_emojis = [paths[: cue.max_shown] for paths, cue in zip(cue_emojis, compiled)]
+        usage = self._asset_usage(cue_emojis)
+        first_index = inputs.count("-i")
+        if filter_script is None:
+            for emoji_path in usage:
+                inputs.extend(["-i", str(emoji_path)])
+
+        steps = self._filter_steps(config, cue_emojis, compiled, usage, first_index, filter_script is not None)
+        output_label = self._output_label(config, cue_emojis)
+        if target.post_filter:
+            steps = itertools.chain(steps, [f"[{output_label}]{target.post_filter}[post]"])
+            output_label = "post"
+        video_labels = [output_label]
+        if target.renditions and not target.still:
+            video_labels = [f"out{idx}" for idx in range(len(target.renditions) + 1)]
+            steps = itertools.chain(steps, self.rendition_steps(output_label, target.renditions))
+        if filter_script is None:
+            graph_args = ["-filter_complex", ";".join(steps)]
+        else:
+            self._fs.mkdir(filter_script.parent)
+            self._fs.write_lines(filter_script, (("" if n == 0 else ";\n") + step for n, step in enumerate(steps)))
+            graph_args = ["-filter_complex_script", str(filter_script)]
+
+        command = [
+            "ffmpeg",
+            "-y",
+            *inputs,
+            *graph_args,
+        ]
+        for label in video_labels:
+            command.extend(["-map", f"[{label}]"])
+        if target.still:
+            command.extend(["-frames:v", "1", "-update", "1", "-an", str(target.output)])
+            return command
+        if target.audio:
+            command.extend(["-map", "1:a:0"])
+        command.extend(
+            [
+                "-c:v",
+                "libx264",
+                "-pix_fmt",
+                "yuv420p",
+                "-r",
+                str(config.video.fps),
+                "-crf",
+                str(config.video.crf),
+            ]
+        )
+        command.extend(self.rendition_crf_args(target.renditions if len(video_labels) > 1 else ()))
+        encoding = config.video.encoding()
+        if target.preset:
+            encoding = replace(encoding, preset=target.preset)
+        if target.threads:
+            encoding = replace(encoding, threads=target.threads)
+        command.extend(encoding.x264_args(config.video.fps))
+        if window is not None:
+            command.extend(["-frames:v", str(window.frames(config.video.fps))])
+        if target.audio:
+            command.extend([*audio_track.codec_args(), "-shortest"])
+        else:
+            command.append("-an")
+        if len(video_labels) > 1:
+            outputs = [target.output] + [workdir / rendition.file for rendition in target.renditions]
+            command.extend(self.tee_output(outputs, target.audio))
+        else:
+            command.append(str(target.output))
+        return command
+
+    def derive_renditions(self, workdir: Path, config: AppConfig) -> List[str]:
+        """Encodes ``output.renditions`` from the finished primary output, stream-copying its audio.
+
+        Used after the planners that do not end in the single-pass overlay graph (keyframes,
+        rawvideo, segments); overlays are still composited only once.
+        """
+        renditions = config.output.renditions
+        steps = self.rendition_steps("0:v", renditions, keep_source=False)
+        return [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(workdir / config.output.file),
+            "-filter_complex",
+            ";".join(steps),
+            *[arg for idx in range(1, len(renditions) + 1) for arg in ("-map", f"[out{idx}]")],
+            "-map",
+            "0:a:0",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-crf",
+            str(config.video.crf),
+            *config.video.encoding().x264_args(config.video.fps),
+            *[
+                arg
+                for idx, rendition in enumerate(renditions)
+                if rendition.crf is not None
+                for arg in (f"-crf:v:{idx}", str(rendition.crf))
+            ],
+            "-c:a",
+            "copy",
+            *self.tee_output([workdir / rendition.file for rendition in renditions], audio=True),
+        ]
+
+    @staticmethod
+    def rendition_steps(source: str, renditions: Sequence[RenditionConfig], keep_source: bool = True) -> List[str]:
+        """Splits ``source`` into ``[out0]`` (untouched, if kept) and one cropped/scaled ``[outN]`` per rendition."""
+        branches = (["out0"] if keep_source else []) + [f"r{idx}" for idx in range(1, len(renditions) + 1)]
+        steps = [f"[{source}]split={len(branches)}" + "".join(f"[{label}]" for label in branches)]
+        for idx, rendition in enumerate(renditions, start=1):
+            crop = ""
+            if rendition.crop_width or rendition.crop_height:
+                crop = f"crop=w={rendition.crop_width or 'in_w'}:h={rendition.crop_height or 'in_h'},"
+            steps.append(f"[r{idx}]{crop}scale={rendition.width}:{rendition.height},setsar=1[out{idx}]")
+        return steps
+
+    @staticmethod
+    def rendition_crf_args(renditions: Sequence[RenditionConfig]) -> List[str]:
+        args: List[str] = []
+        for idx, rendition in enumerate(renditions, start=1):
+            if rendition.crf is not None:
+                args.extend([f"-crf:v:{idx}", str(rendition.crf)])
+        return args
 
-        inputs = ["-loop", "1", "-i", bg, "-i", audio]
-        filter_steps: List[str] = [f"[0:v]scale={config.video.width}:{config.video.height}[v0]"]
+    @staticmethod
+    def tee_output(outputs: Sequence[Path], audio: bool) -> List[str]:
+        """``-f tee`` writing video stream ``N`` (plus the one shared audio stream) to ``outputs[N]``."""
+        slaves = []
+        for idx, path in enumerate(outputs):
+            value = str(path)
+            for char in ("\\", "|", "[", "]"):
+                value = value.replace(char, "\\" + char)
+            streams = f"v\\:{idx},a" if audio else f"v\\:{idx}"
+            slaves.append(f"[select='{streams}']{value}")
+        return ["-f", "tee", "|".join(slaves)]
+
+    @staticmethod
+    def _asset_usage(cue_emojis: List[List[Path]]) -> Dict[Path, int]:
+        usage: Dict[Path, int] = {}
+        for paths in cue_emojis:
+            for emoji_path in paths:
+                usage[emoji_path] = usage.get(emoji_path, 0) + 1
+        return usage
+
+    @staticmethod
+    def _output_label(config: AppConfig, cue_emojis: List[List[Path]]) -> str:
+        if config.render.mode == RENDER_MODE_STRIPS:
+            overlays = sum(1 for paths in cue_emojis if paths)
+        else:
+            overlays = sum(len(paths) for paths in cue_emojis)
+        return f"v{overlays}"
+
+    @staticmethod
+    def _bounded(first: int, last: int, fps: int) -> str:
+        return f"loop=loop={last - first}:size=1,setpts=(N+{first})/({fps}*TB)"
 
+    @staticmethod
+    def filter_path(path: Path) -> str:
+        """Escapes a file path for a filter option value inside a filtergraph description."""
+        value = str(path)
+        for char in ("\\", "'", ":"):
+            value = value.replace(char, "\\" + char)
+        for char in ("\\", "'", "[", "]", ",", ";"):
+            value = value.replace(char, "\\" + char)
+        return value
+
+    def _filter_steps(
+        self,
+        config: AppConfig,
+        cue_emojis: List[List[Path]],
+        compiled: List[CompiledCue],
+        usage: Dict[Path, int],
+        first_index: int,
+        movie_sources: bool,
+    ) -> Iterator[str]:
+        fps = config.video.fps
+        yield f"[0:v]scale={config.video.width}:{config.video.height},loop=loop=-1:size=1,setpts=N/({fps}*TB)[v0]"
+
+        branches: Dict[Path, List[str]] = {}
+        for emoji_path, uses in usage.items():
+            image_idx = first_index + len(branches)
+            labels = [f"e{image_idx}_{n}" for n in range(uses)]
+            branches[emoji_path] = labels
+            fan_out = f",split={uses}" if uses > 1 else ""
+            scale = f"scale={config.layout.emoji_size}:{config.layout.emoji_size}"
+            if movie_sources:
+                chain = f"movie={self.filter_path(emoji_path)},{scale}"
+            else:
+                chain = f"[{image_idx}:v]{scale}"
+            yield chain + fan_out + "".join(f"[{label}]" for label in labels)
+
+        if config.render.mode == RENDER_MODE_STRIPS:
+            yield from self._strip_steps(config, cue_emojis, compiled, branches)
+        else:
+            yield from self._overlay_steps(config, cue_emojis, compiled, branches)
+
+    @staticmethod
+    def _overlay_steps(
+        config: AppConfig,
+        cue_emojis: List[List[Path]],
+        compiled: List[CompiledCue],
+        branches: Dict[Path, List[str]],
+    ) -> Iterator[str]:
         x0 = LayoutService.start_x(config.video.width, config.safe_area)
         y0 = LayoutService.top_y(config.video.height, config.layout)
 
+        fps = config.video.fps
         current = "v0"
-        input_index = 2
-
-        for cue in config.cues:
-            emojis = EmojiTokenizer.split_clusters(cue.text)
-            total = len(emojis)
-            for idx, emoji in enumerate(emojis):
-                emoji_path = resolver.resolve(emoji)
-                inputs.extend(["-loop", "1", "-i", str(emoji_path)])
-
-                image_idx = input_index
-                scaled_name = f"e{image_idx}"
-                next_video = f"v{image_idx}"
-                filter_steps.append(
-                    f"[{image_idx}:v]scale={config.layout.emoji_size}:{config.layout.emoji_size}[{scaled_name}]"
-                )
+        taken: Dict[Path, int] = {}
+        overlay_index = 0
+        for compiled_cue, paths in zip(compiled, cue_emojis):
+            for idx, emoji_path in enumerate(paths):
+                appear = compiled_cue.appear_frame(idx)
+                branch = taken.get(emoji_path, 0)
+                taken[emoji_path] = branch + 1
+                overlay_index += 1
+                bounded = f"w{overlay_index}"
+                next_video = f"v{overlay_index}"
+                window = FfmpegCommandFactory._bounded(appear, compiled_cue.last_frame, fps)
+                yield f"[{branches[emoji_path][branch]}]{window}[{bounded}]"
 
                 x = x0 + idx * (config.layout.emoji_size + config.layout.gap)
-                if cue.typing_duration > 0 and total > 0:
-                    progress = f"({total}*(t-{cue.start})/max({cue.typing_duration},0.001))"
-                    appear_expr = f"between(t,{cue.start},{cue.end})*gte({progress},{idx})"
+                yield f"[{current}][{bounded}]overlay={x}:{y0}:eof_action=pass[{next_video}]"
+                current = next_video
+
+    @staticmethod
+    def _strip_steps(
+        config: AppConfig,
+        cue_emojis: List[List[Path]],
+        compiled: List[CompiledCue],
+        branches: Dict[Path, List[str]],
+    ) -> Iterator[str]:
+        """Pre-composites each cue row into one RGBA strip and overlays it once.
+
+        Typed cues get a transparent left pad as wide as the row: cropping the strip at
+        ``x = revealed`` and shifting the overlay left by the hidden width shows exactly
+        the first ``shown_count`` cells in place. ``revealed`` is a sum of
+        ``gte(t, appear_frame - 0.5 frame)`` terms: both filters see the absolute timeline
+        timestamps (the strip is re-timed by ``setpts``), whereas their ``n`` counters do
+        not agree, and the half-frame margin keeps the thresholds clear of rounding.
+        """
+        size = config.layout.emoji_size
+        cell = size + config.layout.gap
+        fps = config.video.fps
+        x0 = LayoutService.start_x(config.video.width, config.safe_area)
+        y0 = LayoutService.top_y(config.video.height, config.layout)
+
+        current = "v0"
+        taken: Dict[Path, int] = {}
+        overlay_index = 0
+        for cue_index, (compiled_cue, paths) in enumerate(zip(compiled, cue_emojis)):
+            total = len(paths)
+            if total == 0:
+                continue
+            row_width = total * cell
+            typing = not compiled_cue.static
+            pad = row_width if typing else 0
+
+            strip = f"s{cue_index}_0"
+            yield f"color=c=black@0.0:s={pad + row_width}x{size}:r={fps}:d=1,format=rgba,trim=end_frame=1[{strip}]"
+            for idx, emoji_path in enumerate(paths):
+                branch = taken.get(emoji_path, 0)
+                taken[emoji_path] = branch + 1
+                composed = f"s{cue_index}_{idx + 1}"
+                yield f"[{strip}][{branches[emoji_path][branch]}]overlay={pad + idx * cell}:0:format=rgb[{composed}]"
+                strip = composed
+
+            row = f"r{cue_index}"
+            x = str(x0)
+            first, last = compiled_cue.first_frame, compiled_cue.last_frame
+            bounded = FfmpegCommandFactory._bounded(first, last, fps)
+            if typing:
+                appears = [compiled_cue.appear_frame(idx) for idx in range(total)]
+                revealed = "+".join(f"gte(t,{(frame - 0.5) / fps:.6f})" for frame in appears)
+                yield f"[{strip}]{bounded},crop=w={row_width}:h={size}:x='{cell}*({revealed})':y=0[{row}]"
+                x = f"'{x0}-{row_width}+{cell}*({revealed})'"
+            else:
+                yield f"[{strip}]{bounded}[{row}]"
+
+            overlay_index += 1
+            next_video = f"v{overlay_index}"
+            yield f"[{current}][{row}]overlay=x={x}:y={y0}:eof_action=pass[{next_video}]"
+            current = next_video
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    """Ordered stages of ffmpeg invocations plus the text files they read.
+
+    Commands inside one stage are independent and may run concurrently; files are written
+    before the first stage starts and ``promotions`` (source, destination) are moved into
+    place once every stage succeeded. ``frame_stage`` (the last one by default) is the stage
+    that encodes the video frames; the build metrics headline is read off its commands. With
+    ``frame_source`` the single command of that stage reads its video from stdin, fed with the
+    chunks that callable produces.
+    """
+
+    stages: List[List[List[str]]]
+    files: List[Tuple[Path, str]] = field(default_factory=list)
+    promotions: List[Tuple[Path, Path]] = field(default_factory=list)
+    frame_source: Optional[Callable[[], Iterable[bytes]]] = None
+    frame_stage: int = -1
+
+    @property
+    def commands(self) -> List[List[str]]:
+        return [command for stage in self.stages for command in stage]
+
+
+@dataclass(frozen=True)
+class BuildCost:
+    """Predicted cost of a build, read off its planned commands before any of them runs.
+
+    ``inputs`` and ``overlay_nodes`` are those of the heaviest single process;
+    ``decoder_memory_mb`` covers the heaviest set of processes that may run at once.
+    """
+
+    inputs: int
+    overlay_nodes: int
+    unique_assets: int
+    filter_script_bytes: int
+    decoder_memory_mb: float
+    overlay_evals_per_second: int
+
+    def metrics(self) -> Dict[str, float]:
+        """Values keyed by their ``COST_METRICS`` name."""
+        return {
+            "inputs": self.inputs,
+            "overlayNodes": self.overlay_nodes,
+            "uniqueAssets": self.unique_assets,
+            "filterScriptBytes": self.filter_script_bytes,
+            "decoderMemoryMb": self.decoder_memory_mb,
+            "overlayEvalsPerSecond": self.overlay_evals_per_second,
+        }
+
+    def describe(self) -> str:
+        return (
+            f"{self.inputs} input(s), {self.overlay_nodes} overlay node(s), {self.unique_assets} unique asset(s), "
+            f"{self.filter_script_bytes} filter-script bytes, ~{self.decoder_memory_mb:.0f} MB decoder memory, "
+            f"{self.overlay_evals_per_second} overlay evaluations/s"
+        )
+
+
+class CostEstimator:
+    """Predicts ``BuildCost`` from a ``RenderPlan`` and checks it against ``CostLimits``.
+
+    Inputs and overlay nodes are counted in each command's filter graph (``movie=`` sources
+    included). Decoder memory is a coarse upper bound: one yuv420p frame per overlay node
+    (every link of the chain may hold a queued frame) plus the background and output frames,
+    and one RGBA sprite per opened source; the rawvideo compositor adds its two RGB canvases.
+    """
+
+    def __init__(self, fs: FileSystemPort):
+        self._fs = fs
+
+    def estimate(self, config: AppConfig, resolver: EmojiAssetResolver, plan: RenderPlan, jobs: int = 1) -> BuildCost:
+        width, height, fps = config.video.width, config.video.height, config.video.fps
+        frame_bytes = width * height * 3 // 2
+        sprite_bytes = config.layout.emoji_size * config.layout.emoji_size * 4
+        assets = {resolver.resolve(emoji) for cue in config.cues for emoji in EmojiTokenizer.split_clusters(cue.text)}
+
+        inputs = overlays = script_bytes = evals = 0
+        peak = 0
+        for stage in plan.stages:
+            stage_memory = []
+            for command in stage:
+                graph = self._graph(command)
+                script_bytes += len(graph.encode("utf-8"))
+                sources = command.count("-i") + graph.count("movie=")
+                nodes = graph.count("overlay=")
+                inputs = max(inputs, sources)
+                overlays = max(overlays, nodes)
+                if not self._single_frame(command):
+                    evals = max(evals, nodes * fps)
+                stage_memory.append((nodes + 2) * frame_bytes + sources * sprite_bytes)
+            peak = max(peak, sum(sorted(stage_memory, reverse=True)[: max(1, jobs)]))
+        if plan.frame_source is not None:
+            peak += 2 * width * height * 3
+
+        return BuildCost(
+            inputs=inputs,
+            overlay_nodes=overlays,
+            unique_assets=len(assets),
+            filter_script_bytes=script_bytes,
+            decoder_memory_mb=round(peak / (1024 * 1024), 1),
+            overlay_evals_per_second=evals,
+        )
+
+    @staticmethod
+    def check(cost: BuildCost, limits: CostLimits) -> Tuple[List[str], List[str]]:
+        """Returns (warnings, failures) for every metric above its warn/fail limit."""
+        warnings: List[str] = []
+        failures: List[str] = []
+        for name, value in cost.metrics().items():
+            if name in limits.fail and value > limits.fail[name]:
+                failures.append(f"Build cost {name}={value:g} exceeds the fail limit {limits.fail[name]:g}")
+            elif name in limits.warn and value > limits.warn[name]:
+                warnings.append(f"Build cost {name}={value:g} exceeds the warn limit {limits.warn[name]:g}")
+        return warnings, failures
+
+    def _graph(self, command: Sequence[str]) -> str:
+        if "-filter_complex_script" in command:
+            return self._fs.read_text(Path(command[command.index("-filter_complex_script") + 1]))
+        for option in ("-filter_complex", "-vf"):
+            if option in command:
+                return command[command.index(option) + 1]
+        return ""
+
+    @staticmethod
+    def _single_frame(command: Sequence[str]) -> bool:
+        return "-frames:v" in command and command[command.index("-frames:v") + 1] == "1"
+
+
+PREVIEW_DEFAULT_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class PreviewRequest:
+    """A ``preview`` render: one time window, downscaled, as a clip, a single frame or a contact sheet."""
+
+    window: TimeWindow
+    divisor: int = 2
+    still: bool = False
+    sheet_fps: Optional[float] = None
+
+
+class PreviewPlanner:
+    """Plans fast previews with the single-pass overlay graph.
+
+    Only cues intersecting the window are rendered (rebased to ``t=0``). The whole geometry
+    is divided by ``divisor`` so every scale and overlay works on fewer pixels, and clips
+    are encoded with the ``ultrafast`` preset.
+    """
+
+    PRESET = "ultrafast"
+    SHEET_MAX_COLUMNS = 5
+
+    def __init__(self, fs: Optional[FileSystemPort] = None):
+        self._fs = fs
+
+    def plan(
+        self,
+        workdir: Path,
+        config: AppConfig,
+        resolver: EmojiAssetResolver,
+        request: PreviewRequest,
+        output: Path,
+        filter_script: Optional[Path] = None,
+    ) -> RenderPlan:
+        config = self.scale(replace(config, render=replace(config.render, mode=self._graph_mode(config))), request.divisor)
+        fps = config.video.fps
+        if request.still:
+            window = TimeWindow(start=request.window.start, end=request.window.start + 1.0 / fps)
+            target = RenderTarget(output=output, window=window, audio=False, still=True)
+        elif request.sheet_fps:
+            tiles = max(1, math.ceil(request.window.duration * request.sheet_fps - 1e-9))
+            columns = min(tiles, self.SHEET_MAX_COLUMNS)
+            rows = math.ceil(tiles / columns)
+            target = RenderTarget(
+                output=output,
+                window=request.window,
+                audio=False,
+                still=True,
+                # nb_frames emits the sheet once the window is sampled instead of waiting to fill the grid;
+                # rgb24 makes the unfilled cells black (in yuv420p they come out green)
+                post_filter=f"fps={request.sheet_fps},format=rgb24,tile={columns}x{rows}:nb_frames={tiles}",
+            )
+        else:
+            target = RenderTarget(output=output, window=request.window, preset=self.PRESET)
+        command = FfmpegCommandFactory(self._fs).build(workdir, config, resolver, target, filter_script=filter_script)
+        return RenderPlan(stages=[[command]])
+
+    @staticmethod
+    def _graph_mode(config: AppConfig) -> str:
+        # Previews always use the single-pass graph; keyframe/rawvideo pipelines gain nothing on a short window.
+        return RENDER_MODE_STRIPS if config.render.mode == RENDER_MODE_STRIPS else RENDER_MODE_OVERLAYS
+
+    @staticmethod
+    def scale(config: AppConfig, divisor: int) -> AppConfig:
+        """Divides every pixel dimension by ``divisor`` (frame size rounded to even for yuv420p)."""
+        if divisor <= 1:
+            return config
+
+        def px(value: int) -> int:
+            return int(round(value / divisor))
+
+        def even(value: int) -> int:
+            return max(2, int(round(value / divisor / 2)) * 2)
+
+        layout = config.layout
+        return replace(
+            config,
+            video=replace(config.video, width=even(config.video.width), height=even(config.video.height)),
+            safe_area=replace(
+                config.safe_area,
+                width=px(config.safe_area.width),
+                offset_x=px(config.safe_area.offset_x),
+                padding_left=px(config.safe_area.padding_left),
+            ),
+            layout=replace(
+                layout,
+                emoji_size=max(1, px(layout.emoji_size)),
+                gap=px(layout.gap),
+                top_margin=px(layout.top_margin),
+                center_y=None if layout.center_y is None else px(layout.center_y),
+                offset_y=px(layout.offset_y),
+            ),
+        )
+
+
+WATCH_PADDING_SECONDS = 0.5
+
+
+class WorkdirWatcher:
+    """Polls the watched files (and the entries of watched directories) for changes.
+
+    A change is a path whose ``(mtime_ns, size)`` differs from the previous poll, or that
+    appeared or disappeared. ``wait`` returns once changes stopped for ``debounce`` seconds,
+    so an editor's save (truncate, write, rename) is reported as a single change set.
+    """
+
+    def __init__(
+        self,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._sleep = sleep
+        self._clock = clock
+        self._paths: List[Path] = []
+        self._snapshot: Dict[Path, Tuple[int, int]] = {}
+
+    def watch(self, paths: Sequence[Path]) -> None:
+        """Replaces the watched paths.
+
+        Newly added paths take their current state as the baseline. Paths that were already
+        watched keep the previous baseline, so an edit made between the last poll and this
+        call (e.g. while the config was being reloaded) is still reported by the next poll.
+        """
+        kept = set(self._paths)
+        self._paths = list(dict.fromkeys(paths))
+        watched = set(self._paths)
+
+        def owner(path: Path) -> Path:
+            return path if path in watched else path.parent  # directory entries belong to the directory
+
+        snapshot = {path: state for path, state in self._stat_all().items() if owner(path) not in kept}
+        snapshot.update({path: state for path, state in self._snapshot.items() if owner(path) in kept & watched})
+        self._snapshot = snapshot
+
+    def changes(self) -> List[Path]:
+        current = self._stat_all()
+        paths = current.keys() | self._snapshot.keys()
+        changed = [path for path in paths if current.get(path) != self._snapshot.get(path)]
+        self._snapshot = current
+        return sorted(changed)
+
+    def wait(self, interval: float, debounce: float) -> List[Path]:
+        changed: set = set()
+        last_change = 0.0
+        while True:
+            batch = self.changes()
+            now = self._clock()
+            if batch:
+                changed.update(batch)
+                last_change = now
+            elif changed and now - last_change >= debounce:
+                return sorted(changed)
+            self._sleep(interval)
+
+    def _stat_all(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        for path in self._paths:
+            try:
+                if path.is_dir():
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            stat = entry.stat()
+                            snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
                 else:
-                    appear_expr = f"between(t,{cue.start},{cue.end})"
+                    stat = path.stat()
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue  # missing right now (e.g. mid-save); reported once it is back
+        return snapshot
 
-                filter_steps.append(
-                    f"[{current}][{scaled_name}]overlay={x}:{y0}:enable='{appear_expr}'[{next_video}]"
-                )
-                current = next_video
-                input_index += 1
 
-        filter_complex = ";".join(filter_steps)
+class WatchPlanner:
+    """Decides which time range a workdir change affects.
+
+    Cue edits (added, removed, moved or retyped cues) and emoji asset edits affect only the
+    cues involved: their span, old and new, padded by ``WATCH_PADDING_SECONDS``. Edits that
+    touch every frame (background, audio, video/layout/safe-area/render settings) re-render
+    the previously previewed window.
+    """
+
+    @staticmethod
+    def affected_window(
+        workdir: Path,
+        previous: Optional[AppConfig],
+        current: AppConfig,
+        previous_assets: Sequence[Tuple[Path, ...]],
+        current_assets: Sequence[Tuple[Path, ...]],
+        changed: Sequence[Path],
+        last_window: TimeWindow,
+    ) -> Optional[TimeWindow]:
+        if previous is None:
+            return last_window
+        global_inputs = {workdir / current.inputs.background, workdir / current.inputs.audio}
+        if (
+            previous.inputs.background != current.inputs.background
+            or previous.inputs.audio != current.inputs.audio
+            or (previous.video, previous.layout, previous.safe_area, previous.render)
+            != (current.video, current.layout, current.safe_area, current.render)
+            or global_inputs.intersection(changed)
+        ):
+            return last_window
+
+        def states(config: AppConfig, assets: Sequence[Tuple[Path, ...]]) -> set:
+            return {
+                (cue.text, cue.start, cue.end, cue.typing_duration, paths) for cue, paths in zip(config.cues, assets)
+            }
+
+        old_states = states(previous, previous_assets)
+        new_states = states(current, current_assets)
+        touched = set(changed)
+        spans = [(state[1], state[2]) for state in old_states ^ new_states]
+        spans.extend(
+            (cue.start, cue.end) for cue, paths in zip(current.cues, current_assets) if touched.intersection(paths)
+        )
+        if not spans:
+            return None
+        start = max(0.0, min(span[0] for span in spans) - WATCH_PADDING_SECONDS)
+        return TimeWindow(start=start, end=max(span[1] for span in spans) + WATCH_PADDING_SECONDS)
+
+
+class FramesRenderPlanner:
+    """Renders one keyframe per distinct visual state and encodes them via the concat demuxer.
+
+    States and their durations come from ``TimelineCompiler.events``, so every concat entry
+    lasts a whole number of frames.
+    """
+
+    def plan(
+        self,
+        workdir: Path,
+        config: AppConfig,
+        resolver: EmojiAssetResolver,
+        audio: Optional[AudioTrack] = None,
+        background: Optional[Path] = None,
+    ) -> RenderPlan:
+        tmp_dir = workdir / config.render.tmp_dir
+        bg = str(background or workdir / config.inputs.background)
+
+        keyframes: Dict[Tuple[Path, ...], Path] = {}
+        commands: List[List[str]] = []
+
+        def keyframe(state: Tuple[Path, ...]) -> Path:
+            if state not in keyframes:
+                target = tmp_dir / f"state_{len(keyframes):04d}.png"
+                keyframes[state] = target
+                commands.append(self._keyframe_command(bg, state, config, target))
+            return keyframes[state]
+
+        fps = config.video.fps
+        cue_paths = [
+            tuple(resolver.resolve(emoji) for emoji in EmojiTokenizer.split_clusters(cue.text)) for cue in config.cues
+        ]
+        compiler = TimelineCompiler(fps)
+        events = compiler.events(compiler.compile(config.cues, [len(paths) for paths in cue_paths]))
+
+        concat_path = tmp_dir / "frames.ffconcat"
+        lines = ["ffconcat version 1.0"]
+        for event, following in zip(events, events[1:] + [None]):
+            state = cue_paths[event.cue_index][: event.shown] if event.cue_index is not None else ()
+            lines.append(f"file '{self._escape(str(keyframe(state)))}'")
+            lines.append(f"option framerate {fps}")
+            if following is not None:
+                lines.append(f"duration {(following.frame - event.frame) / fps:.6f}")
+
+        return RenderPlan(
+            stages=[commands, [self._encode_command(workdir, config, concat_path, audio)]],
+            files=[(concat_path, "\n".join(lines) + "\n")],
+        )
+
+    @staticmethod
+    def _keyframe_command(bg: str, state: Tuple[Path, ...], config: AppConfig, target: Path) -> List[str]:
+        inputs = ["-i", bg]
+        filter_steps = [f"[0:v]scale={config.video.width}:{config.video.height}[v0]"]
+        size = config.layout.emoji_size
+        x0 = LayoutService.start_x(config.video.width, config.safe_area)
+        y0 = LayoutService.top_y(config.video.height, config.layout)
+
+        unique: Dict[Path, List[str]] = {}
+        for emoji_path in state:
+            unique.setdefault(emoji_path, [])
+        for emoji_path in unique:
+            image_idx = len(inputs) // 2
+            inputs.extend(["-i", str(emoji_path)])
+            uses = state.count(emoji_path)
+            unique[emoji_path] = [f"e{image_idx}_{n}" for n in range(uses)]
+            fan_out = f",split={uses}" if uses > 1 else ""
+            filter_steps.append(
+                f"[{image_idx}:v]scale={size}:{size}{fan_out}" + "".join(f"[{label}]" for label in unique[emoji_path])
+            )
+
+        current = "v0"
+        for idx, emoji_path in enumerate(state):
+            branch = unique[emoji_path].pop(0)
+            x = x0 + idx * (size + config.layout.gap)
+            filter_steps.append(f"[{current}][{branch}]overlay={x}:{y0}[v{idx + 1}]")
+            current = f"v{idx + 1}"
+
         return [
             "ffmpeg",
             "-y",
             *inputs,
             "-filter_complex",
-            filter_complex,
+            ";".join(filter_steps),
             "-map",
             f"[{current}]",
+            "-frames:v",
+            "1",
+            "-pix_fmt",
+            "rgb24",
+            str(target),
+        ]
+
+    @staticmethod
+    def _encode_command(
+        workdir: Path, config: AppConfig, concat_path: Path, audio: Optional[AudioTrack] = None
+    ) -> List[str]:
+        audio = audio or AudioTrack(workdir / config.inputs.audio)
+        return [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(concat_path),
+            "-i",
+            str(audio.path),
+            "-map",
+            "0:v:0",
             "-map",
             "1:a:0",
+            "-vf",
+            f"fps={config.video.fps},tpad=stop_mode=clone:stop=-1",
             "-c:v",
             "libx264",
             "-pix_fmt",
@@ -412,13 +1903,509 @@ class FfmpegCommandFactory:
             str(config.video.fps),
             "-crf",
             str(config.video.crf),
-            "-c:a",
-            "aac",
-            "-b:a",
-            "192k",
+            *config.video.encoding().x264_args(config.video.fps),
+            *audio.codec_args(),
             "-shortest",
-            output,
+            str(workdir / config.output.file),
+        ]
+
+    @staticmethod
+    def _escape(path: str) -> str:
+        return path.replace("'", "'\\''")
+
+
+class TimelineSegmenter:
+    """Cuts the timeline into frame-aligned windows, preferring cue-free gaps as boundaries."""
+
+    def __init__(self, fps: int):
+        self._fps = fps
+
+    def split(self, cues: Sequence[CueConfig], duration: float, count: int) -> List[TimeWindow]:
+        fps = self._fps
+        total_frames = max(1, math.ceil(duration * fps - 1e-9))
+        count = max(1, min(count, total_frames))
+
+        gap_frames: List[int] = []
+        previous_end = 0.0
+        for cue in cues:
+            first, last = math.ceil(previous_end * fps), math.floor(cue.start * fps)
+            if last > first:
+                gap_frames.append((first + last) // 2)
+            previous_end = max(previous_end, cue.end)
+
+        span = total_frames / count
+        boundaries = [0]
+        for k in range(1, count):
+            ideal = int(round(k * span))
+            nearby = [frame for frame in gap_frames if abs(frame - ideal) <= span / 2]
+            cut = min(nearby, key=lambda frame: abs(frame - ideal)) if nearby else ideal
+            if boundaries[-1] < cut < total_frames:
+                boundaries.append(cut)
+        boundaries.append(total_frames)
+
+        return [TimeWindow(start=a / fps, end=b / fps) for a, b in zip(boundaries, boundaries[1:])]
+
+
+class ContentHasher:
+    """SHA-256 digests of files (memoized per path) and of JSON-serializable payloads."""
+
+    def __init__(self) -> None:
+        self._files: Dict[Path, str] = {}
+
+    def file_digest(self, path: Path) -> str:
+        if path not in self._files:
+            digest = hashlib.sha256()
+            with path.open("rb") as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(chunk)
+            self._files[path] = digest.hexdigest()
+        return self._files[path]
+
+    @staticmethod
+    def digest(payload: object) -> str:
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class PreparedAudio:
+    """The track to mux plus, on a cache miss, the encode command and its cache promotion."""
+
+    track: AudioTrack
+    encode: Optional[List[str]] = None
+    promotion: Optional[Tuple[Path, Path]] = None
+
+
+class AudioCache:
+    """Encodes ``inputs.audio`` to AAC once and muxes it with ``-c:a copy`` afterwards.
+
+    Encoded tracks live in ``<output dir>/.audio_cache/<key>.m4a``, keyed by the source file
+    hash and the audio settings. Sources that already are AAC at a standard rate are copied
+    directly without touching the cache.
+    """
+
+    def __init__(
+        self,
+        probe: MediaProbePort,
+        fs: FileSystemPort,
+        logger: LoggerPort,
+        hasher: Optional[ContentHasher] = None,
+    ):
+        self._probe = probe
+        self._fs = fs
+        self._logger = logger
+        self._hasher = hasher or ContentHasher()
+
+    def prepare(self, workdir: Path, config: AppConfig) -> PreparedAudio:
+        source = workdir / config.inputs.audio
+        try:
+            stream = self._probe.audio_stream(source)
+            duration = self._probe.duration(source)
+        except OSError:
+            stream, duration = None, None
+        if not duration:
+            self._logger.warning(f"Cannot determine audio duration (is ffprobe on PATH?); encoding {source} inline.")
+            return PreparedAudio(track=AudioTrack(source))
+        if stream is not None and stream.codec == AUDIO_CODEC and stream.sample_rate in AUDIO_COPY_SAMPLE_RATES:
+            self._logger.info(f"Audio source is already {AUDIO_CODEC.upper()}; copying it as-is.")
+            return PreparedAudio(track=AudioTrack(source, copy=True, duration=duration))
+
+        key = self._hasher.digest(
+            {"source": self._hasher.file_digest(source), "codec": AUDIO_CODEC, "bitrate": AUDIO_BITRATE}
+        )
+        cached = (workdir / config.output.file).parent / ".audio_cache" / f"{key}.m4a"
+        if self._fs.exists(cached):
+            self._logger.info(f"Audio cache hit: {cached.name}")
+            return PreparedAudio(track=AudioTrack(cached, copy=True, duration=duration))
+
+        encoded = workdir / config.render.tmp_dir / f"audio_{key[:16]}.m4a"
+        self._fs.mkdir(encoded.parent)
+        encode = ["ffmpeg", "-y", "-i", str(source), "-vn", *AudioTrack(source).codec_args(), str(encoded)]
+        track = AudioTrack(encoded, copy=True, duration=duration)
+        return PreparedAudio(track=track, encode=encode, promotion=(encoded, cached))
+
+
+@dataclass(frozen=True)
+class PreparedBackground:
+    """The background image to read plus, on a cache miss, the scale command and its cache promotion."""
+
+    path: Path
+    scale: Optional[List[str]] = None
+    promotion: Optional[Tuple[Path, Path]] = None
+
+
+class BackgroundCache:
+    """Scales ``inputs.background`` to the output size once and reuses the result.
+
+    Scaled images live in ``<output dir>/.background_cache/<key>.png``, keyed by the source
+    file hash and the target size, so every render stage (and every later build) decodes an
+    image that already has the frame size instead of scaling the source again.
+    """
+
+    def __init__(self, fs: FileSystemPort, logger: LoggerPort, hasher: Optional[ContentHasher] = None):
+        self._fs = fs
+        self._logger = logger
+        self._hasher = hasher or ContentHasher()
+
+    def prepare(self, workdir: Path, config: AppConfig) -> PreparedBackground:
+        source = workdir / config.inputs.background
+        width, height = config.video.width, config.video.height
+        key = self._hasher.digest({"source": self._hasher.file_digest(source), "width": width, "height": height})
+        cached = (workdir / config.output.file).parent / ".background_cache" / f"{key}.png"
+        if self._fs.exists(cached):
+            self._logger.info(f"Background cache hit: {cached.name}")
+            return PreparedBackground(path=cached)
+
+        scaled = workdir / config.render.tmp_dir / f"background_{key[:16]}.png"
+        self._fs.mkdir(scaled.parent)
+        scale = [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(source),
+            "-vf",
+            f"scale={width}:{height}",
+            "-frames:v",
+            "1",
+            "-update",
+            "1",
+            str(scaled),
         ]
+        return PreparedBackground(path=scaled, scale=scale, promotion=(scaled, cached))
+
+
+SEGMENT_TARGET_SECONDS = 30.0
+# Part of every segment cache key. Bump it whenever the generated segment graph or encode arguments
+# change for identical inputs, so segments rendered by an older version are not reused.
+SEGMENT_CACHE_VERSION = 1
+
+
+class SegmentedRenderPlanner:
+    """Renders independent timeline segments in parallel and joins them with a stream-copy concat.
+
+    With ``cache`` enabled every segment is keyed by the hash of everything that affects its
+    pixels, and segments whose key is already in ``<output dir>/.segment_cache`` are reused.
+    """
+
+    def __init__(
+        self,
+        probe: MediaProbePort,
+        fs: FileSystemPort,
+        logger: LoggerPort,
+        hasher: Optional[ContentHasher] = None,
+    ):
+        self._probe = probe
+        self._fs = fs
+        self._logger = logger
+        self._hasher = hasher or ContentHasher()
+
+    def plan(
+        self,
+        workdir: Path,
+        config: AppConfig,
+        resolver: EmojiAssetResolver,
+        jobs: int,
+        cache: bool = False,
+        audio_track: Optional[AudioTrack] = None,
+        background: Optional[Path] = None,
+    ) -> RenderPlan:
+        audio = workdir / config.inputs.audio
+        audio_track = audio_track or AudioTrack(audio)
+        duration = self._probe.duration(audio)
+        if duration is None or duration <= 0:
+            raise ValueError(f"Cannot determine audio duration for segmented build: {audio}")
+
+        segments_dir = workdir / config.render.tmp_dir / "segments"
+        cache_dir = (workdir / config.output.file).parent / ".segment_cache"
+        count = max(jobs * 2, math.ceil(duration / SEGMENT_TARGET_SECONDS))
+        windows = TimelineSegmenter(config.video.fps).split(config.cues, duration, count)
+        threads = max(1, (os.cpu_count() or 1) // jobs)
+
+        factory = FfmpegCommandFactory(self._fs)
+        segment_commands: List[List[str]] = []
+        promotions: List[Tuple[Path, Path]] = []
+        lines = ["ffconcat version 1.0"]
+        for index, window in enumerate(windows):
+            segment = segments_dir / f"segment_{index:04d}.mp4"
+            if cache:
+                cached = cache_dir / f"{self._segment_key(workdir, config, resolver, window)}.mp4"
+                if self._fs.exists(cached):
+                    lines.append(f"file '{FramesRenderPlanner._escape(str(cached))}'")
+                    continue
+                promotions.append((segment, cached))
+            target = RenderTarget(output=segment, window=window, audio=False, threads=threads, background=background)
+            script = segments_dir / f"segment_{index:04d}.filter.txt"
+            segment_commands.append(factory.build(workdir, config, resolver, target, filter_script=script))
+            lines.append(f"file '{FramesRenderPlanner._escape(str(segment))}'")
+
+        if cache:
+            self._logger.info(
+                f"Segment cache: {len(windows) - len(segment_commands)} reused, {len(segment_commands)} to render."
+            )
+
+        concat_path = segments_dir / "segments.ffconcat"
+        join = [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(concat_path),
+            "-i",
+            str(audio_track.path),
+            "-map",
+            "0:v:0",
+            "-map",
+            "1:a:0",
+            "-c:v",
+            "copy",
+            *audio_track.codec_args(),
+            "-shortest",
+            str(workdir / config.output.file),
+        ]
+        return RenderPlan(
+            stages=[segment_commands, [join]],
+            files=[(concat_path, "\n".join(lines) + "\n")],
+            promotions=promotions,
+            frame_stage=0,  # the join only stream-copies the segments
+        )
+
+    def _segment_key(self, workdir: Path, config: AppConfig, resolver: EmojiAssetResolver, window: TimeWindow) -> str:
+        cues = window.rebase(config.cues)
+        return self._hasher.digest(
+            {
+                "version": SEGMENT_CACHE_VERSION,
+                "background": self._hasher.file_digest(workdir / config.inputs.background),
+                "video": asdict(config.video),
+                "layout": asdict(config.layout),
+                "safe_area": asdict(config.safe_area),
+                "mode": config.render.mode,
+                "frames": window.frames(config.video.fps),
+                "cues": [
+                    {
+                        "start": cue.start,
+                        "end": cue.end,
+                        "typing_duration": cue.typing_duration,
+                        "assets": [
+                            self._hasher.file_digest(resolver.resolve(emoji))
+                            for emoji in EmojiTokenizer.split_clusters(cue.text)
+                        ],
+                    }
+                    for cue in cues
+                ],
+            }
+        )
+
+
+CACHE_DIR_NAMES = (".audio_cache", ".background_cache", ".segment_cache")
+CACHE_MAX_MB_DEFAULT = 2048
+
+
+class OutputCachePruner:
+    """Keeps the caches next to the output (audio, background, segments) within a size limit.
+
+    Entries are removed oldest first until the three directories fit ``max_bytes`` together.
+    Entries the finished plan read or promoted are kept, so that build can be repeated from cache.
+    """
+
+    def __init__(self, logger: LoggerPort):
+        self._logger = logger
+
+    def prune(self, output_dir: Path, plan: RenderPlan, max_bytes: int) -> Tuple[int, int]:
+        """Returns the number of removed entries and the bytes they freed."""
+        referenced = "\n".join(
+            [
+                *(" ".join(command) for command in plan.commands),
+                *(content for _, content in plan.files),
+                *(str(destination) for _, destination in plan.promotions),
+            ]
+        )
+        entries: List[Tuple[int, int, Path]] = []
+        for name in CACHE_DIR_NAMES:
+            try:
+                with os.scandir(output_dir / name) as listing:
+                    for entry in listing:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime_ns, stat.st_size, Path(entry.path)))
+            except OSError:
+                continue  # this cache was never written
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        removed = freed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            if path.name in referenced:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+        if removed:
+            self._logger.info(f"Cache prune: removed {removed} entr(ies), {freed / 1e6:.1f} MB freed.")
+        return removed, freed
+
+
+class RawFrameCompositor:
+    """Composites frames in-process and streams them as ``rgb24`` rawvideo.
+
+    The background and each unique emoji are decoded once. A single canvas buffer is kept
+    across frames: on a visual state change only the affected emoji cells are restored
+    from the background or alpha-blended, and unchanged frames re-send the same buffer,
+    so the cost grows with the number of visual changes rather than with frames x emojis.
+    """
+
+    def __init__(self, config: AppConfig, loader: ImageLoaderPort):
+        self._config = config
+        self._loader = loader
+
+    def frames(self, background: Path, cue_paths: Sequence[Sequence[Path]], total_frames: int) -> Iterator[memoryview]:
+        np = _import_optional("numpy", "numpy")
+        config = self._config
+        size = config.layout.emoji_size
+
+        base = self._loader.load_rgb(background, config.video.width, config.video.height)
+        canvas = base.copy()
+        buffer = memoryview(canvas).cast("B")
+
+        sprites: Dict[Path, Tuple[Any, Any]] = {}
+        for paths in cue_paths:
+            for path in paths:
+                if path not in sprites:
+                    rgba = self._loader.load_rgba(path, size).astype(np.uint16)
+                    sprites[path] = (rgba[:, :, :3], rgba[:, :, 3:4])
+
+        compiler = TimelineCompiler(config.video.fps)
+        events = compiler.events(compiler.compile(config.cues, [len(paths) for paths in cue_paths]))
+
+        state: Tuple[Optional[int], int] = (None, 0)
+        for event, following in zip(events, events[1:] + [None]):
+            if event.frame >= total_frames:
+                break
+            state = self._apply(np, base, canvas, sprites, cue_paths, state, (event.cue_index, event.shown))
+            end = total_frames if following is None else min(following.frame, total_frames)
+            for _ in range(end - event.frame):
+                yield buffer
+
+    def _apply(
+        self,
+        np: Any,
+        base: Any,
+        canvas: Any,
+        sprites: Dict[Path, Tuple[Any, Any]],
+        cue_paths: Sequence[Sequence[Path]],
+        previous: Tuple[Optional[int], int],
+        current: Tuple[Optional[int], int],
+    ) -> Tuple[Optional[int], int]:
+        (old_cue, old_shown), (new_cue, new_shown) = previous, current
+        if old_cue != new_cue:
+            for idx in range(old_shown):
+                self._restore(base, canvas, idx)
+            old_shown = 0
+        for idx in range(new_shown, old_shown):
+            self._restore(base, canvas, idx)
+        if new_cue is not None:
+            for idx in range(old_shown, new_shown):
+                self._blend(np, base, canvas, sprites[cue_paths[new_cue][idx]], idx)
+        return current
+
+    def _cell(self, canvas: Any, idx: int) -> Optional[Tuple[slice, slice, slice, slice]]:
+        """Frame and sprite slices of emoji cell ``idx``, clipped to the frame (None if off-screen)."""
+        config = self._config
+        size = config.layout.emoji_size
+        x = LayoutService.start_x(config.video.width, config.safe_area) + idx * (size + config.layout.gap)
+        y = LayoutService.top_y(config.video.height, config.layout)
+        height, width = canvas.shape[0], canvas.shape[1]
+        x1, y1, x2, y2 = max(x, 0), max(y, 0), min(x + size, width), min(y + size, height)
+        if x1 >= x2 or y1 >= y2:
+            return None
+        return slice(y1, y2), slice(x1, x2), slice(y1 - y, y2 - y), slice(x1 - x, x2 - x)
+
+    def _restore(self, base: Any, canvas: Any, idx: int) -> None:
+        cell = self._cell(canvas, idx)
+        if cell is not None:
+            rows, cols = cell[0], cell[1]
+            canvas[rows, cols] = base[rows, cols]
+
+    def _blend(self, np: Any, base: Any, canvas: Any, sprite: Tuple[Any, Any], idx: int) -> None:
+        cell = self._cell(canvas, idx)
+        if cell is None:
+            return
+        rows, cols, sprite_rows, sprite_cols = cell
+        rgb, alpha = sprite[0][sprite_rows, sprite_cols], sprite[1][sprite_rows, sprite_cols]
+        under = base[rows, cols].astype(np.uint16)
+        canvas[rows, cols] = ((rgb * alpha + under * (255 - alpha) + 127) // 255).astype(np.uint8)
+
+
+class RawVideoRenderPlanner:
+    """Pipes frames from ``RawFrameCompositor`` into a single ffmpeg encode over the audio."""
+
+    def __init__(self, probe: MediaProbePort, loader: ImageLoaderPort):
+        self._probe = probe
+        self._loader = loader
+
+    def plan(
+        self,
+        workdir: Path,
+        config: AppConfig,
+        resolver: EmojiAssetResolver,
+        audio_track: Optional[AudioTrack] = None,
+        background: Optional[Path] = None,
+    ) -> RenderPlan:
+        audio = workdir / config.inputs.audio
+        audio_track = audio_track or AudioTrack(audio)
+        duration = self._probe.duration(audio)
+        if duration is None or duration <= 0:
+            raise ValueError(f"Cannot determine audio duration for rawvideo build: {audio}")
+        _import_optional("numpy", "numpy")
+
+        fps = config.video.fps
+        total_frames = max(1, math.ceil(duration * fps - 1e-9))
+        cue_paths = [[resolver.resolve(emoji) for emoji in EmojiTokenizer.split_clusters(cue.text)] for cue in config.cues]
+        compositor = RawFrameCompositor(config, self._loader)
+        background = background or workdir / config.inputs.background
+
+        command = [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            f"{config.video.width}x{config.video.height}",
+            "-framerate",
+            str(fps),
+            "-i",
+            "-",
+            "-i",
+            str(audio_track.path),
+            "-map",
+            "0:v:0",
+            "-map",
+            "1:a:0",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-crf",
+            str(config.video.crf),
+            *config.video.encoding().x264_args(fps),
+            *audio_track.codec_args(),
+            "-shortest",
+            str(workdir / config.output.file),
+        ]
+        return RenderPlan(
+            stages=[[command]],
+            frame_source=lambda: compositor.frames(background, cue_paths, total_frames),
+        )
 
 
 class BuildService:
@@ -432,65 +2419,601 @@ class BuildService:
         self._logger.info("Executing ffmpeg command...")
         return self._runner.run(command)
 
+    def build_plan(self, plan: RenderPlan, out_file: Path, jobs: int = 1, metrics_file: Optional[Path] = None) -> int:
+        """Runs the plan; with ``metrics_file`` a JSON summary of the run is written there (even on failure)."""
+        seen = len(self._runner.metrics())
+        started = time.monotonic()
+        code = self._execute(plan, out_file, jobs)
+        if metrics_file is not None:
+            commands = {tuple(command) for command in plan.commands}
+            runs = [run for run in self._runner.metrics()[seen:] if run.args in commands]
+            report = self._metrics_report(plan, out_file, code, time.monotonic() - started, runs)
+            self._fs.mkdir(metrics_file.parent)
+            self._fs.write_text(metrics_file, json.dumps(report, indent=2) + "\n")
+            self._logger.info(
+                f"Build metrics: {report['wallSeconds']}s wall, {report['encodeFps']} fps, "
+                f"{report['speed']}x realtime -> {metrics_file}"
+            )
+        return code
+
+    def _execute(self, plan: RenderPlan, out_file: Path, jobs: int) -> int:
+        self._fs.mkdir(out_file.parent)
+        for path, content in plan.files:
+            self._fs.mkdir(path.parent)
+            self._fs.write_text(path, content)
+        for number, stage in enumerate(plan.stages, start=1):
+            self._logger.info(f"Executing ffmpeg stage {number}/{len(plan.stages)} ({len(stage)} command(s))...")
+            if jobs > 1 and len(stage) > 1:
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    codes = list(pool.map(self._runner.run, stage))
+            elif plan.frame_source is not None and number - 1 == plan.frame_stage % len(plan.stages):
+                codes = [self._runner.run_piped(stage[0], plan.frame_source())]
+            else:
+                codes = []
+                for command in stage:
+                    codes.append(self._runner.run(command))
+                    if codes[-1] != 0:
+                        break
+            failed = [code for code in codes if code != 0]
+            if failed:
+                self._logger.error(f"ffmpeg stage {number} failed with exit code {failed[0]}")
+                return failed[0]
+        for source, destination in plan.promotions:
+            self._fs.mkdir(destination.parent)
+            self._fs.move(source, destination)
+        return 0
+
+    def _metrics_report(
+        self, plan: RenderPlan, out_file: Path, code: int, wall: float, runs: Sequence[RunMetrics]
+    ) -> Dict[str, Any]:
+        filter_graph_bytes = 0
+        for command in plan.commands:
+            if "-filter_complex_script" in command:
+                filter_graph_bytes += self._fs.size(Path(command[command.index("-filter_complex_script") + 1]))
+            elif "-filter_complex" in command:
+                filter_graph_bytes += len(command[command.index("-filter_complex") + 1].encode("utf-8"))
+
+        # Frames come from the stage that encodes them (every segment, not the stream-copy join);
+        # bitrate and size from the command that writes the primary output, not a later rendition pass.
+        encoding = {tuple(command) for command in plan.stages[plan.frame_stage]} if plan.stages else set()
+        encoded = [run.progress for run in runs if run.args in encoding and run.progress]
+        frames = sum(progress.frame for progress in encoded) if encoded else None
+        out_seconds = sum(progress.out_seconds for progress in encoded)
+        writers = [run for run in runs if run.progress and str(out_file) in run.args[-1]]
+        if not writers and runs and runs[-1].args == tuple(plan.commands[-1]):
+            writers = runs[-1:]
+        primary = writers[-1].progress if writers else None
+        rss = [run.peak_rss_kb for run in runs if run.peak_rss_kb is not None]
+        return {
+            "output": str(out_file),
+            "exitCode": code,
+            "wallSeconds": round(wall, 3),
+            "frames": frames,
+            "encodeFps": round(frames / wall, 2) if frames is not None and wall > 0 else None,
+            "speed": round(out_seconds / wall, 3) if encoded and wall > 0 else None,
+            "bitrateKbits": primary.bitrate_kbits if primary else None,
+            "outputBytes": primary.total_size if primary else None,
+            "peakRssKb": max(rss) if rss else None,
+            "filterGraphBytes": filter_graph_bytes,
+            "commands": [
+                {
+                    "program": Path(run.args[0]).name,
+                    "exitCode": run.exit_code,
+                    "wallSeconds": round(run.wall_seconds, 3),
+                    "peakRssKb": run.peak_rss_kb,
+                    "frames": run.progress.frame if run.progress else None,
+                    "fps": run.progress.fps if run.progress else None,
+                    "speed": run.progress.speed if run.progress else None,
+                }
+                for run in runs
+            ],
+        }
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """One workdir of a ``batch`` run, ready to execute (``plan`` is None if planning failed)."""
+
+    workdir: Path
+    out_file: Optional[Path] = None
+    plan: Optional[RenderPlan] = None
+    jobs: int = 1
+    exit_code: int = 0
+
+
+class BatchScheduler:
+    """Runs planned batch jobs with at most ``max_parallel`` in flight and never stops early.
+
+    Each job keeps its own exit code; a failing job is logged and the remaining jobs run.
+    """
+
+    def __init__(self, fs: FileSystemPort, runner: ProcessRunnerPort, logger: LoggerPort, max_parallel: int):
+        self._fs = fs
+        self._runner = runner
+        self._logger = logger
+        self._max_parallel = max(1, max_parallel)
+
+    def run(self, jobs: Sequence[BatchJob]) -> List[BatchJob]:
+        with ThreadPoolExecutor(max_workers=self._max_parallel) as pool:
+            return list(pool.map(self._run_job, jobs))
+
+    def _run_job(self, job: BatchJob) -> BatchJob:
+        if job.plan is None or job.out_file is None:
+            return job
+        self._logger.info(f"[batch] Rendering {job.workdir}")
+        try:
+            code = BuildService(self._fs, self._runner, self._logger).build_plan(
+                job.plan, job.out_file, job.jobs, CliApp.metrics_path(job.out_file)
+            )
+        except (ImportError, OSError) as err:
+            self._logger.error(f"[batch] {job.workdir}: {err}")
+            code = 2
+        self._logger.info(f"[batch] {job.workdir}: exit code {code}")
+        return replace(job, exit_code=code)
+
 
 class CliApp:
-    def __init__(self, fs: FileSystemPort, runner: ProcessRunnerPort, logger: LoggerPort):
+    def __init__(
+        self,
+        fs: FileSystemPort,
+        runner: ProcessRunnerPort,
+        logger: LoggerPort,
+        probe: Optional[MediaProbePort] = None,
+        loader: Optional[ImageLoaderPort] = None,
+        watcher: Optional[WorkdirWatcher] = None,
+    ):
         self._fs = fs
         self._runner = runner
         self._logger = logger
+        self._probe = probe or FfprobeMediaProbe()
+        self._loader = loader or PillowImageLoader()
+        self._watcher = watcher or WorkdirWatcher()
+        self._resolvers: Dict[Tuple[Path, str, Optional[Path], Optional[Path]], EmojiAssetResolver] = {}
+        self._asset_indexes: Dict[Path, frozenset] = {}
+        self._hasher = ContentHasher()
 
     def run(self, argv: Sequence[str]) -> int:
         parser = argparse.ArgumentParser(description="Build emoji overlay videos from local assets.")
         sub = parser.add_subparsers(dest="command", required=True)
 
-        for name in ["build", "validate", "probe"]:
+        for name in ["build", "validate", "probe", "batch", "preview", "watch"]:
             s = sub.add_parser(name)
-            s.add_argument("--workdir", required=True)
+            if name == "watch":
+                s.add_argument("--scale", type=int, default=2, help="Resolution divisor (1 = full size).")
+                s.add_argument("--output", help="Preview file (default: out/preview.mp4).")
+                s.add_argument("--interval", type=float, default=0.5, help="Seconds between polls.")
+                s.add_argument(
+                    "--debounce",
+                    type=float,
+                    default=0.3,
+                    help="Quiet seconds required after a change before re-rendering.",
+                )
+            if name == "preview":
+                s.add_argument("--from", dest="window_from", type=float, default=0.0, help="Window start in seconds.")
+                s.add_argument(
+                    "--to",
+                    dest="window_to",
+                    type=float,
+                    default=None,
+                    help=f"Window end in seconds (default: --from + {PREVIEW_DEFAULT_SECONDS:g}).",
+                )
+                s.add_argument("--scale", type=int, default=2, help="Resolution divisor (1 = full size).")
+                output_kind = s.add_mutually_exclusive_group()
+                output_kind.add_argument("--frame", action="store_true", help="Render only the frame at --from as PNG.")
+                output_kind.add_argument(
+                    "--contact-sheet",
+                    type=float,
+                    metavar="FPS",
+                    help="Tile the window sampled at FPS into one PNG.",
+                )
+                s.add_argument("--output", help="Preview file (default: out/preview.mp4 or out/preview.png).")
+            if name == "batch":
+                s.add_argument("workdirs", nargs="*", help="Workdirs or glob patterns (e.g. 'episodes/*').")
+                s.add_argument("--list", dest="workdir_list", help="Text file with one workdir or glob per line.")
+                s.add_argument(
+                    "--max-parallel",
+                    type=int,
+                    default=2,
+                    help="Workdirs rendered at the same time (0 = CPU count).",
+                )
+                s.add_argument("--report", help="Optional JSON file with the exit code of every job.")
+            else:
+                s.add_argument("--workdir", required=True)
+                s.add_argument(
+                    "--metrics",
+                    help="Where to write the build metrics JSON (default: <output>.metrics.json next to the output).",
+                )
             s.add_argument("--emoji-pack", default=None)
             s.add_argument("--emoji-dir")
             s.add_argument("--assets-root")
+            s.add_argument(
+                "--emoji-manifest",
+                help="JSON listing of the bundled emoji pack, reused while the pack dir is unchanged.",
+            )
             s.add_argument("--dry-run", action="store_true")
+            s.add_argument(
+                "--jobs",
+                type=int,
+                default=1,
+                help="Parallel ffmpeg processes; >1 renders timeline segments concurrently (0 = CPU count).",
+            )
+            s.add_argument(
+                "--incremental",
+                action="store_true",
+                help="Reuse unchanged timeline segments from the content-addressed segment cache.",
+            )
+            s.add_argument(
+                "--no-audio-cache",
+                action="store_true",
+                help="Re-encode the audio instead of reusing <output dir>/.audio_cache.",
+            )
+            s.add_argument(
+                "--ignore-limits",
+                action="store_true",
+                help="Report build-cost limit failures as warnings instead of refusing to build.",
+            )
+            s.add_argument(
+                "--no-background-cache",
+                action="store_true",
+                help="Scale the background in every render instead of reusing <output dir>/.background_cache.",
+            )
+            s.add_argument(
+                "--cache-max-mb",
+                type=float,
+                default=CACHE_MAX_MB_DEFAULT,
+                help="After a build, remove the oldest cache entries beyond this total (0 = no limit).",
+            )
 
         args = parser.parse_args(argv)
+        if args.command == "batch":
+            return self._run_batch(args)
+        if args.command == "watch":
+            return self._run_watch(args)
 
         workdir = Path(args.workdir).resolve()
-        config = ConfigLoader(workdir).load()
-        assets_root = Path(args.assets_root or os.getenv("EMOJI_VIDEO_ASSETS_ROOT") or Path(__file__).resolve().parent / "assets")
-        emoji_dir = Path(args.emoji_dir).resolve() if args.emoji_dir else None
-        emoji_pack_id = args.emoji_pack or config.inputs.emoji_pack_id
+        code, config, plan = self._plan(workdir, args)
+        if plan is None:
+            return code
+
+        if args.command == "probe" or args.dry_run:
+            self._print_plan(plan)
+            return code
+        if code != 0:
+            return code
+
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        try:
+            out_file = workdir / config.output.file
+            metrics_file = Path(args.metrics).resolve() if args.metrics else self.metrics_path(out_file)
+            code = BuildService(self._fs, self._runner, self._logger).build_plan(plan, out_file, jobs, metrics_file)
+        except ImportError as err:
+            # Pillow is only needed once the compositor starts decoding images.
+            self._logger.error(str(err))
+            return 2
+        if code == 0:
+            self._prune_caches(out_file.parent, plan, args)
+        return code
 
-        resolver = EmojiAssetResolver(
-            assets_root=assets_root,
-            emoji_pack_id=emoji_pack_id,
-            override_dir=emoji_dir or (workdir / config.inputs.emoji_override_dir if config.inputs.emoji_override_dir else None),
-            logger=self._logger,
+    def _prune_caches(self, output_dir: Path, plan: RenderPlan, args: argparse.Namespace) -> None:
+        if args.cache_max_mb > 0:
+            OutputCachePruner(self._logger).prune(output_dir, plan, int(args.cache_max_mb * 1024 * 1024))
+
+    @staticmethod
+    def metrics_path(out_file: Path) -> Path:
+        return out_file.with_name(f"{out_file.stem}.metrics.json")
+
+    def _resolver(
+        self, assets_root: Path, emoji_pack_id: str, override_dir: Optional[Path], manifest: Optional[Path]
+    ) -> EmojiAssetResolver:
+        """Returns the resolver for these asset locations, shared by every workdir that uses them."""
+        key = (assets_root, emoji_pack_id, override_dir, manifest)
+        if key not in self._resolvers:
+            self._resolvers[key] = EmojiAssetResolver(
+                assets_root=assets_root,
+                emoji_pack_id=emoji_pack_id,
+                override_dir=override_dir,
+                logger=self._logger,
+                manifest=manifest,
+                indexes=self._asset_indexes,
+            )
+        return self._resolvers[key]
+
+    def _workdir_resolver(self, workdir: Path, config: AppConfig, args: argparse.Namespace) -> EmojiAssetResolver:
+        return self._resolver(
+            self._assets_root(args),
+            args.emoji_pack or config.inputs.emoji_pack_id,
+            self._override_dir(workdir, config, args),
+            Path(args.emoji_manifest).resolve() if args.emoji_manifest else None,
         )
 
-        validation = ValidationService(self._fs)
-        errors = validation.validate(workdir, config, assets_root, emoji_pack_id, emoji_dir, resolver)
-        if errors:
-            for err in errors:
-                self._logger.error(err)
-            return 2
+    @staticmethod
+    def _assets_root(args: argparse.Namespace) -> Path:
+        return Path(args.assets_root or os.getenv("EMOJI_VIDEO_ASSETS_ROOT") or Path(__file__).resolve().parent / "assets")
 
-        command = FfmpegCommandFactory().build(workdir, config, resolver)
+    @staticmethod
+    def _override_dir(workdir: Path, config: AppConfig, args: argparse.Namespace) -> Optional[Path]:
+        if args.emoji_dir:
+            return Path(args.emoji_dir).resolve()
+        return workdir / config.inputs.emoji_override_dir if config.inputs.emoji_override_dir else None
+
+    def _validate(
+        self, workdir: Path, config: AppConfig, resolver: EmojiAssetResolver, args: argparse.Namespace
+    ) -> bool:
+        emoji_dir = Path(args.emoji_dir).resolve() if args.emoji_dir else None
+        emoji_pack_id = args.emoji_pack or config.inputs.emoji_pack_id
+        errors = ValidationService(self._fs).validate(
+            workdir, config, self._assets_root(args), emoji_pack_id, emoji_dir, resolver
+        )
+        for err in errors:
+            self._logger.error(err)
+        return not errors
+
+    def _plan(
+        self, workdir: Path, args: argparse.Namespace
+    ) -> Tuple[int, Optional[AppConfig], Optional[RenderPlan]]:
+        """Loads, validates and plans one workdir; returns (exit code, config, plan or None)."""
+        config = ConfigLoader(workdir).load()
+        resolver = self._workdir_resolver(workdir, config, args)
+        if not self._validate(workdir, config, resolver, args):
+            return 2, config, None
 
         if args.command == "validate":
             self._logger.info("Validation passed.")
+            return 0, config, None
+
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        if args.command == "preview":
+            code, config, plan = self._plan_preview(workdir, config, resolver, args)
+            if plan is None:
+                return code, config, plan
+            return self._guard(config, resolver, plan, 1, args), config, plan
+
+        # A plan that is only printed does not need its sources probed or hashed, or the tmp dir created.
+        printed_only = args.command == "probe" or args.dry_run
+        audio = PreparedAudio(track=AudioTrack(workdir / config.inputs.audio))
+        if not args.no_audio_cache and not printed_only:
+            audio = AudioCache(self._probe, self._fs, self._logger, self._hasher).prepare(workdir, config)
+        background = PreparedBackground(path=workdir / config.inputs.background)
+        if not args.no_background_cache and not printed_only:
+            background = BackgroundCache(self._fs, self._logger, self._hasher).prepare(workdir, config)
+
+        if config.render.mode == RENDER_MODE_FRAMES:
+            plan = FramesRenderPlanner().plan(workdir, config, resolver, audio.track, background.path)
+        elif config.render.mode == RENDER_MODE_RAWVIDEO:
+            try:
+                planner = RawVideoRenderPlanner(self._probe, self._loader)
+                plan = planner.plan(workdir, config, resolver, audio.track, background.path)
+            except (ValueError, ImportError) as err:
+                self._logger.error(str(err))
+                return 2, config, None
+            except OSError as err:
+                self._logger.error(f"Cannot probe the audio duration for the rawvideo build (is ffprobe installed?): {err}")
+                return 2, config, None
+        elif jobs > 1 or args.incremental:
+            try:
+                planner = SegmentedRenderPlanner(self._probe, self._fs, self._logger, self._hasher)
+                plan = planner.plan(
+                    workdir,
+                    config,
+                    resolver,
+                    jobs,
+                    cache=args.incremental,
+                    audio_track=audio.track,
+                    background=background.path,
+                )
+            except ValueError as err:
+                self._logger.error(str(err))
+                return 2, config, None
+            except OSError as err:
+                self._logger.error(f"Cannot probe the audio duration for the segmented build (is ffprobe installed?): {err}")
+                return 2, config, None
+        else:
+            script = workdir / config.render.tmp_dir / "filter_complex.txt"
+            target = RenderTarget(
+                output=workdir / config.output.file,
+                renditions=tuple(config.output.renditions),
+                audio_track=audio.track,
+                background=background.path,
+            )
+            command = FfmpegCommandFactory(self._fs).build(workdir, config, resolver, target, filter_script=script)
+            plan = RenderPlan(stages=[[command]])
+        prepare = [command for command in (audio.encode, background.scale) if command is not None]
+        if prepare:
+            promotions = [promotion for promotion in (audio.promotion, background.promotion) if promotion is not None]
+            plan = replace(
+                plan,
+                stages=[prepare, *plan.stages],
+                promotions=[*plan.promotions, *promotions],
+                frame_stage=plan.frame_stage + 1 if plan.frame_stage >= 0 else plan.frame_stage,
+            )
+        if config.output.renditions:
+            for rendition in config.output.renditions:
+                self._fs.mkdir((workdir / rendition.file).parent)
+            if "tee" not in plan.commands[-1]:
+                derive = FfmpegCommandFactory(self._fs).derive_renditions(workdir, config)
+                plan = replace(plan, stages=[*plan.stages, [derive]], frame_stage=plan.frame_stage % len(plan.stages))
+        return self._guard(config, resolver, plan, jobs, args), config, plan
+
+    def _guard(
+        self, config: AppConfig, resolver: EmojiAssetResolver, plan: RenderPlan, jobs: int, args: argparse.Namespace
+    ) -> int:
+        """Logs the predicted build cost and applies ``config.limits``; returns 2 on a fail limit."""
+        estimator = CostEstimator(self._fs)
+        cost = estimator.estimate(config, resolver, plan, jobs)
+        self._logger.info(f"Estimated cost: {cost.describe()}")
+        warnings, failures = estimator.check(cost, config.limits)
+        for message in warnings:
+            self._logger.warning(message)
+        if failures and args.ignore_limits:
+            for message in failures:
+                self._logger.warning(f"{message} (ignored)")
             return 0
-        if args.command == "probe":
-            print(CommandPrinter.to_shell(command))
-            return 0
+        for message in failures:
+            self._logger.error(f"{message}; raise limits.fail in config.json or pass --ignore-limits")
+        return 2 if failures else 0
+
+    def _plan_preview(
+        self, workdir: Path, config: AppConfig, resolver: EmojiAssetResolver, args: argparse.Namespace
+    ) -> Tuple[int, Optional[AppConfig], Optional[RenderPlan]]:
+        start = max(0.0, args.window_from)
+        end = args.window_to if args.window_to is not None else start + PREVIEW_DEFAULT_SECONDS
+        if end <= start:
+            self._logger.error(f"Preview window is empty: --from {start} --to {end}")
+            return 2, config, None
+
+        still = args.frame or args.contact_sheet is not None
+        output = Path(args.output).resolve() if args.output else workdir / "out" / ("preview.png" if still else "preview.mp4")
+        request = PreviewRequest(
+            window=TimeWindow(start=start, end=end),
+            divisor=max(1, args.scale),
+            still=args.frame,
+            sheet_fps=args.contact_sheet,
+        )
+        script = workdir / config.render.tmp_dir / "preview_filter.txt"
+        plan = PreviewPlanner(self._fs).plan(workdir, config, resolver, request, output, filter_script=script)
+        if args.frame:
+            self._logger.info(f"Preview frame at {start:g}s, 1/{request.divisor} scale -> {output}")
+        else:
+            self._logger.info(
+                f"Preview {start:g}s-{end:g}s: {len(request.window.rebase(config.cues))} cue(s), "
+                f"1/{request.divisor} scale -> {output}"
+            )
+        return 0, replace(config, output=OutputConfig(file=str(output))), plan
 
-        if args.dry_run:
+    def _print_plan(self, plan: RenderPlan) -> None:
+        for command in plan.commands:
             print(CommandPrinter.to_shell(command))
-            return 0
+            if "-filter_complex_script" in command:
+                script = Path(command[command.index("-filter_complex_script") + 1])
+                self._logger.info(f"Filter script: {script} ({self._fs.size(script)} bytes)")
+
+    def _batch_workdirs(self, args: argparse.Namespace) -> List[Path]:
+        patterns = list(args.workdirs)
+        if args.workdir_list:
+            lines = Path(args.workdir_list).read_text(encoding="utf-8").splitlines()
+            patterns.extend(line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#"))
+
+        workdirs: List[Path] = []
+        for pattern in patterns:
+            matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+            for match in matches:
+                workdir = Path(match).resolve()
+                if workdir not in workdirs and (not glob.has_magic(pattern) or (workdir / "config.json").exists()):
+                    workdirs.append(workdir)
+        return workdirs
+
+    def _run_batch(self, args: argparse.Namespace) -> int:
+        workdirs = self._batch_workdirs(args)
+        if not workdirs:
+            self._logger.error("No workdirs matched.")
+            return 2
 
-        return BuildService(self._fs, self._runner, self._logger).build(command, (workdir / config.output.file))
+        segment_jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        jobs: List[BatchJob] = []
+        for workdir in workdirs:
+            try:
+                code, config, plan = self._plan(workdir, args)
+            except (OSError, ValueError, KeyError) as err:
+                self._logger.error(f"[batch] {workdir}: {err}")
+                code, config, plan = 2, None, None
+            if plan is None or code != 0:
+                self._logger.info(f"[batch] {workdir}: exit code {code}")
+                jobs.append(BatchJob(workdir=workdir, exit_code=code))
+            elif args.dry_run:
+                self._print_plan(plan)
+                jobs.append(BatchJob(workdir=workdir))
+            else:
+                jobs.append(
+                    BatchJob(workdir=workdir, out_file=workdir / config.output.file, plan=plan, jobs=segment_jobs)
+                )
+
+        max_parallel = args.max_parallel if args.max_parallel > 0 else (os.cpu_count() or 1)
+        results = BatchScheduler(self._fs, self._runner, self._logger, max_parallel).run(jobs)
+
+        for job in results:
+            if job.exit_code == 0 and job.plan is not None and job.out_file is not None:
+                self._prune_caches(job.out_file.parent, job.plan, args)
+        failed = [job for job in results if job.exit_code != 0]
+        self._logger.info(f"[batch] {len(results) - len(failed)}/{len(results)} job(s) succeeded.")
+        for job in failed:
+            self._logger.error(f"[batch] Failed: {job.workdir} (exit code {job.exit_code})")
+        if args.report:
+            report = [{"workdir": str(job.workdir), "exitCode": job.exit_code} for job in results]
+            self._fs.mkdir(Path(args.report).parent)
+            self._fs.write_text(Path(args.report), json.dumps(report, indent=2) + "\n")
+        return 2 if failed else 0
+
+    def _run_watch(self, args: argparse.Namespace) -> int:
+        """Re-validates and re-renders the affected window to a preview whenever the workdir changes.
+
+        The parsed config, the resolvers and their directory indexes stay in memory between
+        changes; only the override dir index is re-listed when files were added there.
+        """
+        workdir = Path(args.workdir).resolve()
+        output = Path(args.output).resolve() if args.output else workdir / "out" / "preview.mp4"
+        watcher = self._watcher
+        watcher.watch([workdir / "config.json"])
+        previous: Optional[AppConfig] = None
+        previous_assets: List[Tuple[Path, ...]] = []
+        window = TimeWindow(start=0.0, end=PREVIEW_DEFAULT_SECONDS)
+        changed: List[Path] = []
+        self._logger.info(f"Watching {workdir}; previews go to {output} (Ctrl+C to stop).")
+        try:
+            while True:
+                try:
+                    config: Optional[AppConfig] = ConfigLoader(workdir).load()
+                except (OSError, ValueError, KeyError) as err:
+                    self._logger.error(f"Cannot load {workdir / 'config.json'}: {err}")
+                    config = None
+                if config is not None:
+                    override = self._override_dir(workdir, config, args)
+                    watched = [workdir / "config.json", workdir / config.inputs.background, workdir / config.inputs.audio]
+                    watcher.watch(watched + ([override] if override is not None else []))
+                    resolver = self._workdir_resolver(workdir, config, args)
+                    if override is not None and any(path.parent == override for path in changed):
+                        resolver.invalidate(override)
+                    if self._validate(workdir, config, resolver, args):
+                        assets = [
+                            tuple(resolver.resolve(emoji) for emoji in EmojiTokenizer.split_clusters(cue.text))
+                            for cue in config.cues
+                        ]
+                        affected = WatchPlanner.affected_window(
+                            workdir, previous, config, previous_assets, assets, changed, window
+                        )
+                        if affected is None:
+                            self._logger.info("No visible change; preview is up to date.")
+                        else:
+                            window = affected
+                            self._render_watch_preview(workdir, config, resolver, window, output, args)
+                        previous, previous_assets = config, assets
+                changed = watcher.wait(args.interval, args.debounce)
+                self._logger.info(f"Changed: {', '.join(str(path) for path in changed)}")
+        except KeyboardInterrupt:
+            self._logger.info("Stopped watching.")
+        return 0
+
+    def _render_watch_preview(
+        self,
+        workdir: Path,
+        config: AppConfig,
+        resolver: EmojiAssetResolver,
+        window: TimeWindow,
+        output: Path,
+        args: argparse.Namespace,
+    ) -> int:
+        request = PreviewRequest(window=window, divisor=max(1, args.scale))
+        script = workdir / config.render.tmp_dir / "watch_filter.txt"
+        plan = PreviewPlanner(self._fs).plan(workdir, config, resolver, request, output, filter_script=script)
+        if self._guard(config, resolver, plan, 1, args) != 0:
+            return 2
+        self._logger.info(f"Rendering {window.start:g}s-{window.end:g}s at 1/{request.divisor} scale -> {output}")
+        return BuildService(self._fs, self._runner, self._logger).build_plan(plan, output)
 
 
 def main() -> int:
-    app = CliApp(LocalFileSystem(), SubprocessRunner(), ConsoleLogger())
+    logger = ConsoleLogger()
+    probe = FfprobeMediaProbe()
+    app = CliApp(LocalFileSystem(), SubprocessRunner(logger, probe), logger, probe=probe)
     return app.run(sys.argv[1:])
 
 
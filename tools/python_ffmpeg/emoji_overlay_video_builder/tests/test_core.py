@@ -1,23 +1,58 @@
+import importlib.util
 import json
+import os
+import shutil
+import subprocess
+import sys
 import tempfile
 import unittest
+from unittest import mock
+from dataclasses import replace
 from pathlib import Path
 
 from emoji_overlay_video_builder import (
     AppConfig,
+    AudioCache,
+    AudioStreamInfo,
+    BackgroundCache,
+    CliApp,
     CommandPrinter,
+    ContentHasher,
+    CostEstimator,
+    CostLimits,
     ConfigLoader,
     CueConfig,
+    EmojiAssetResolver,
     EmojiTokenizer,
+    BuildService,
     FfmpegCommandFactory,
+    FramesRenderPlanner,
+    ProgressParser,
     InputsConfig,
     LayoutConfig,
     LayoutService,
+    LocalFileSystem,
+    OutputCachePruner,
     OutputConfig,
+    PreviewPlanner,
+    PreviewRequest,
+    ProgressSnapshot,
     RenderConfig,
+    RawFrameCompositor,
+    RenderPlan,
+    RenderTarget,
+    RenditionConfig,
+    RunMetrics,
     SafeAreaConfig,
+    SegmentedRenderPlanner,
+    SubprocessRunner,
+    TimelineCompiler,
+    TimelineSegmenter,
+    TimeWindow,
     ValidationService,
     VideoConfig,
+    WatchPlanner,
+    WorkdirWatcher,
 )
 
 
@@ -51,6 +86,19 @@ class EmojiTokenizerTests(unittest.TestCase):
         clusters = EmojiTokenizer.split_clusters("1️⃣")
         self.assertEqual(clusters, ["1️⃣"])
 
+    def test_splits_adjacent_flags_into_pairs(self):
+        clusters = EmojiTokenizer.split_clusters("🇺🇸🇬🇧")
+        self.assertEqual(clusters, ["🇺🇸", "🇬🇧"])
+
+    def test_keeps_tag_sequence(self):
+        scotland = "🏴\U000e0067\U000e0062\U000e0073\U000e0063\U000e0074\U000e007f"
+        clusters = EmojiTokenizer.split_clusters(f"{scotland} 😀")
+        self.assertEqual(clusters, [scotland, "😀"])
+
+    def test_cached_result_is_not_shared_with_callers(self):
+        EmojiTokenizer.split_clusters("😀😎").append("x")
+        self.assertEqual(EmojiTokenizer.split_clusters("😀😎"), ["😀", "😎"])
+
 
 class LayoutTests(unittest.TestCase):
     def test_start_x_from_safe_area(self):
@@ -65,6 +113,60 @@ class LayoutTests(unittest.TestCase):
         self.assertEqual(LayoutService.top_y(720, layout), 70)
 
 
+class TimelineCompilerTests(unittest.TestCase):
+    def test_spans_agree_with_shown_count_on_every_frame(self):
+        cue = CueConfig(text="", start=0.37, end=2.9, typing_duration=1.3)
+        compiled = TimelineCompiler(fps=24).compile_cue(cue, total=5)
+        for span in compiled.spans:
+            for frame in range(span.first_frame, span.last_frame + 1):
+                self.assertEqual(span.shown, LayoutService.shown_count(5, frame / 24, cue.start, cue.typing_duration))
+        self.assertEqual(compiled.first_frame, 9)
+        self.assertEqual(compiled.last_frame, 69)
+        self.assertEqual([span.shown for span in compiled.spans], [1, 2, 3, 4, 5])
+
+    def test_events_merge_identical_adjacent_states(self):
+        compiler = TimelineCompiler(fps=10)
+        compiled = compiler.compile(
+            [CueConfig(text="", start=1.0, end=2.0), CueConfig(text="", start=2.1, end=3.0)], [2, 0]
+        )
+        events = compiler.events(compiled)
+        self.assertEqual(
+            [(e.frame, e.cue_index, e.shown) for e in events],
+            [(0, None, 0), (10, 0, 2), (21, None, 0)],
+        )
+
+
+    def test_back_to_back_cues_get_the_same_frames_in_every_backend(self):
+        compiler = TimelineCompiler(fps=30)
+        cues = [CueConfig(text="😀", start=1.0, end=2.0), CueConfig(text="😎", start=2.0, end=3.0)]
+        compiled = compiler.compile(cues, [1, 1])
+        self.assertEqual([(cue.first_frame, cue.last_frame) for cue in compiled], [(30, 60), (61, 90)])
+
+        events = compiler.events(compiled)
+        for index, cue in enumerate(compiled):
+            shown = [
+                frame
+                for event, following in zip(events, events[1:])
+                if event.cue_index == index
+                for frame in range(event.frame, following.frame)
+            ]
+            self.assertEqual(shown, list(range(cue.first_frame, cue.last_frame + 1)))
+
+        config = AppConfig(
+            inputs=InputsConfig("bg.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=cues,
+        )
+        cmd = FfmpegCommandFactory().build(Path("/w"), config, DummyResolver(Path("/e")))
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertIn("loop=loop=30:size=1,setpts=(N+30)/(30*TB)", graph)
+        self.assertIn("loop=loop=29:size=1,setpts=(N+61)/(30*TB)", graph)
+
+
 class ConfigTests(unittest.TestCase):
     def test_loader_sorts_cues(self):
         with tempfile.TemporaryDirectory() as tmp:
@@ -80,6 +182,24 @@ class ConfigTests(unittest.TestCase):
             config = ConfigLoader(wd).load()
             self.assertLessEqual(config.cues[0].start, config.cues[1].start)
 
+    def test_loader_reads_output_renditions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            wd = Path(tmp)
+            payload = {
+                "inputs": {"background": "background.png", "audio": "audio.wav"},
+                "output": {
+                    "file": "out/1080p.mp4",
+                    "renditions": [
+                        {"file": "out/720p.mp4", "width": 1280, "height": 720, "crf": 23},
+                        {"file": "out/vertical.mp4", "width": 1080, "height": 1920, "crop": {"width": 608, "height": 1080}},
+                    ],
+                },
+            }
+            (wd / "config.json").write_text(json.dumps(payload), encoding="utf-8")
+            renditions = ConfigLoader(wd).load().output.renditions
+            self.assertEqual(renditions[0], RenditionConfig("out/720p.mp4", 1280, 720, crf=23))
+            self.assertEqual((renditions[1].crop_width, renditions[1].crop_height), (608, 1080))
+
 
 class IntegrationTests(unittest.TestCase):
     def test_ffmpeg_command_build(self):
@@ -95,9 +215,12 @@ class IntegrationTests(unittest.TestCase):
         cmd = FfmpegCommandFactory().build(Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")))
         self.assertIn("ffmpeg", cmd[0])
         self.assertIn("-filter_complex", cmd)
-        self.assertEqual(cmd.count("-loop"), 2)
+        self.assertNotIn("-loop", cmd)
+        filter_graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertIn("[0:v]scale=1280:720,loop=loop=-1:size=1,setpts=N/(30*TB)[v0]", filter_graph)
+        self.assertEqual(cmd.count("-i"), 3)
 
-    def test_typing_uses_gte_expression(self):
+    def test_typing_uses_frame_exact_windows(self):
         config = AppConfig(
             inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
             safe_area=SafeAreaConfig(width=1000),
@@ -109,13 +232,219 @@ class IntegrationTests(unittest.TestCase):
         )
         cmd = FfmpegCommandFactory().build(Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")))
         filter_graph = cmd[cmd.index("-filter_complex") + 1]
-        self.assertIn("gte(", filter_graph)
-        self.assertNotIn("lte(", filter_graph)
+        # frame 0 sits exactly on start (shown_count == 0); the second emoji appears at t=0.5
+        self.assertIn("loop=loop=59:size=1,setpts=(N+1)/(30*TB)", filter_graph)
+        self.assertIn("loop=loop=45:size=1,setpts=(N+15)/(30*TB)", filter_graph)
+        self.assertNotIn("(t-", filter_graph)
+        self.assertNotIn("enable=", filter_graph)
+
+    def test_repeated_emojis_share_one_input(self):
+        config = AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=[
+                CueConfig(text="😀😎😀", start=0.0, end=1.0),
+                CueConfig(text="😎😀", start=1.5, end=2.5),
+            ],
+        )
+        cmd = FfmpegCommandFactory().build(Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")))
+        filter_graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertEqual(cmd.count("-i"), 4)
+        self.assertEqual(filter_graph.count("scale=72:72"), 2)
+        self.assertIn("split=3", filter_graph)
+        self.assertIn("split=2", filter_graph)
+        self.assertEqual(filter_graph.count("overlay="), 5)
+
+    def test_emoji_streams_are_bounded_to_cue_window(self):
+        config = AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(fps=30),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=[CueConfig(text="😀😎", start=2.0, end=3.0), CueConfig(text="😀", start=4.01, end=4.02)],
+        )
+        cmd = FfmpegCommandFactory().build(Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")))
+        filter_graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertEqual(filter_graph.count("loop=loop=30:size=1,setpts=(N+60)/(30*TB)"), 2)
+        self.assertEqual(filter_graph.count("eof_action=pass"), 2)
+        self.assertNotIn("between(t", filter_graph)
+        self.assertEqual(cmd[cmd.index("-map") + 1], "[v2]")
+
+    def test_filter_script_keeps_argv_fixed_size(self):
+        cues = [CueConfig(text="😀😎✨" * 5, start=float(n), end=n + 0.5) for n in range(50)]
+        config = AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=cues,
+        )
+        fs = FakeFs(set())
+        script = Path("/tmp/work/out/.tmp_frames/filter_complex.txt")
+        cmd = FfmpegCommandFactory(fs).build(
+            Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")), filter_script=script
+        )
+        self.assertEqual(cmd.count("-i"), 2)
+        self.assertNotIn("-filter_complex", cmd)
+        self.assertEqual(cmd[cmd.index("-filter_complex_script") + 1], str(script))
+        self.assertEqual(cmd[cmd.index("-map") + 1], "[v750]")
+        graph = fs.written[script]
+        self.assertEqual(graph.count("movie="), 3)
+        self.assertTrue(graph.rstrip().endswith("[v750]"))
+
+    def test_renditions_share_one_graph_and_one_audio_encode(self):
+        renditions = [
+            RenditionConfig("out/720p.mp4", 1280, 720, crf=24),
+            RenditionConfig("out/vertical.mp4", 1080, 1920, crop_width=608, crop_height=1080),
+        ]
+        config = AppConfig(
+            inputs=InputsConfig("bg.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(width=1920, height=1080),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(file="out/1080p.mp4", renditions=renditions),
+            cues=[CueConfig(text="😀", start=0.0, end=1.0)],
+        )
+        cmd = FfmpegCommandFactory().build(Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")))
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertIn("[v1]split=3[out0][r1][r2]", graph)
+        self.assertIn("[r2]crop=w=608:h=1080,scale=1080:1920,setsar=1[out2]", graph)
+        self.assertEqual([cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map"], ["[out0]", "[out1]", "[out2]", "1:a:0"])
+        self.assertEqual(cmd.count("-c:a"), 1)
+        self.assertEqual(cmd[cmd.index("-crf:v:1") + 1], "24")
+        self.assertEqual(cmd[-2], "tee")
+        self.assertEqual(
+            cmd[-1],
+            "[select='v\\:0,a']/tmp/work/out/1080p.mp4|[select='v\\:1,a']/tmp/work/out/720p.mp4"
+            "|[select='v\\:2,a']/tmp/work/out/vertical.mp4",
+        )
+
+    def test_filter_path_escapes_graph_separators(self):
+        self.assertEqual(FfmpegCommandFactory.filter_path(Path("/a:b/c,d.png")), "/a\\\\:b/c\\,d.png")
+
+    def test_strip_mode_uses_one_main_overlay_per_cue(self):
+        config = AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(mode="ffmpeg_strips"),
+            layout=LayoutConfig(emoji_size=72, gap=8),
+            output=OutputConfig(),
+            cues=[
+                CueConfig(text="😀😎😀", start=0.0, end=1.0, typing_duration=0.6),
+                CueConfig(text="😎", start=1.5, end=2.5),
+            ],
+        )
+        cmd = FfmpegCommandFactory().build(Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")))
+        filter_graph = cmd[cmd.index("-filter_complex") + 1]
+        self.assertEqual(filter_graph.count("overlay=x="), 2)
+        self.assertIn("loop=loop=30:size=1,setpts=(N+0)/(30*TB),crop", filter_graph)
+        self.assertIn("loop=loop=30:size=1,setpts=(N+45)/(30*TB)[r1]", filter_graph)
+        self.assertIn("color=c=black@0.0:s=480x72", filter_graph)
+        self.assertIn("crop=w=240:h=72", filter_graph)
+        self.assertIn("x='80*(gte(t,0.016667)+gte(t,0.183333)+gte(t,0.383333))'", filter_graph)
+        self.assertNotIn("gte(n,", filter_graph)
+        self.assertEqual(cmd[cmd.index("-map") + 1], "[v2]")
+
+
+class PreviewTests(unittest.TestCase):
+    def make_config(self) -> AppConfig:
+        return AppConfig(
+            inputs=InputsConfig("bg.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000, offset_x=20),
+            video=VideoConfig(width=1280, height=720, fps=30),
+            render=RenderConfig(mode="frames"),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=[
+                CueConfig(text="😀", start=0.0, end=1.0),
+                CueConfig(text="😎😎", start=10.0, end=12.0, typing_duration=0.5),
+                CueConfig(text="😀", start=20.0, end=21.0),
+            ],
+        )
+
+    def test_clip_renders_only_window_cues_downscaled_and_ultrafast(self):
+        request = PreviewRequest(window=TimeWindow(start=9.0, end=13.0), divisor=4)
+        plan = PreviewPlanner().plan(
+            Path("/tmp/work"), self.make_config(), DummyResolver(Path("/tmp/emoji")), request, Path("/tmp/p.mp4")
+        )
+        [command] = plan.commands
+        graph = command[command.index("-filter_complex") + 1]
+        self.assertIn("scale=320:180", graph)
+        self.assertIn("scale=18:18", graph)
+        self.assertEqual(graph.count("overlay="), 2)
+        self.assertEqual(command[command.index("-preset") + 1], "ultrafast")
+        self.assertEqual(command[command.index("-frames:v") + 1], "120")
+        self.assertEqual(command[command.index("-ss") + 1], "9.000000")
+
+    def test_single_frame_and_contact_sheet_write_one_image(self):
+        config = self.make_config()
+        still = PreviewPlanner().plan(
+            Path("/tmp/work"),
+            config,
+            DummyResolver(Path("/tmp/emoji")),
+            PreviewRequest(window=TimeWindow(start=10.2, end=15.0), still=True),
+            Path("/tmp/p.png"),
+        ).commands[0]
+        self.assertEqual(still[still.index("-frames:v") + 1], "1")
+        self.assertNotIn("libx264", still)
+        self.assertNotIn("1:a:0", still)
+
+        sheet = PreviewPlanner().plan(
+            Path("/tmp/work"),
+            config,
+            DummyResolver(Path("/tmp/emoji")),
+            PreviewRequest(window=TimeWindow(start=9.0, end=13.0), sheet_fps=2.0),
+            Path("/tmp/sheet.png"),
+        ).commands[0]
+        self.assertIn("fps=2.0,format=rgb24,tile=5x2:nb_frames=8[post]", sheet[sheet.index("-filter_complex") + 1])
+        self.assertEqual(sheet[sheet.index("-map") + 1], "[post]")
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+    def test_contact_sheet_cells_past_the_window_are_black(self):
+        def ffmpeg(*args):
+            return subprocess.run(["ffmpeg", "-v", "error", *args], check=True, capture_output=True).stdout
+
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            (workdir / "emoji").mkdir()
+            ffmpeg("-f", "lavfi", "-i", "color=c=blue:s=160x90", "-frames:v", "1", str(workdir / "bg.png"))
+            ffmpeg("-f", "lavfi", "-i", "color=c=red:s=72x72", "-frames:v", "1", str(workdir / "emoji" / "1f600.png"))
+            config = replace(
+                self.make_config(),
+                safe_area=SafeAreaConfig(width=160),
+                video=VideoConfig(width=160, height=90, fps=10),
+                cues=[CueConfig(text="😀", start=0.0, end=6.0)],
+            )
+            sheet = workdir / "sheet.png"
+            # 6 tiles on a 5x2 grid: the last four cells of the second row stay empty
+            request = PreviewRequest(window=TimeWindow(start=0.0, end=6.0), divisor=1, sheet_fps=1.0)
+            [command] = PreviewPlanner().plan(workdir, config, DummyResolver(workdir / "emoji"), request, sheet).commands
+            ffmpeg(*command[1:])
+            pixels = ffmpeg("-i", str(sheet), "-f", "rawvideo", "-pix_fmt", "rgb24", "-")
+
+        def pixel(x, y):
+            offset = (y * 5 * 160 + x) * 3
+            return tuple(pixels[offset : offset + 3])
+
+        self.assertEqual(len(pixels), 5 * 160 * 2 * 90 * 3)
+        self.assertEqual(pixel(4 * 160 + 80, 90 + 45), (0, 0, 0))
+        self.assertNotEqual(pixel(80, 45), (0, 0, 0))
 
 
 class FakeFs:
     def __init__(self, existing: set[Path]):
         self.existing = {Path(p) for p in existing}
+        self.written: dict[Path, str] = {}
 
     def exists(self, path: Path) -> bool:
         return path in self.existing
@@ -123,6 +452,21 @@ class FakeFs:
     def mkdir(self, path: Path) -> None:
         return None
 
+    def write_text(self, path: Path, content: str) -> None:
+        self.written[path] = content
+
+    def move(self, source: Path, destination: Path) -> None:
+        self.existing.add(destination)
+
+    def write_lines(self, path: Path, lines) -> None:
+        self.write_text(path, "".join(lines))
+
+    def read_text(self, path: Path) -> str:
+        return self.written[path]
+
+    def size(self, path: Path) -> int:
+        return len(self.written[path].encode("utf-8"))
+
 
 class ValidationTests(unittest.TestCase):
     def test_validate_reports_missing_override_dir(self):
@@ -160,6 +504,736 @@ class ValidationTests(unittest.TestCase):
         self.assertTrue(any('missing emoji asset' in e.lower() for e in errors))
 
 
+class EmojiAssetResolverTests(unittest.TestCase):
+    def make_pack(self, root: Path, names: list[str]) -> Path:
+        pack = root / "emoji" / "twemoji" / "72x72"
+        pack.mkdir(parents=True)
+        for name in names:
+            (pack / name).write_bytes(b"png")
+        return pack
+
+    def test_lists_each_directory_once_and_prefers_override(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pack = self.make_pack(root, ["1f600.png", "1f60e.png"])
+            override = root / "override"
+            override.mkdir()
+            (override / "1f60e.png").write_bytes(b"png")
+            resolver = EmojiAssetResolver(root, "twemoji-72x72", override, SilentLogger())
+
+            with mock.patch("emoji_overlay_video_builder.os.scandir", wraps=os.scandir) as scandir:
+                for _ in range(3):
+                    self.assertEqual(resolver.resolve("😀"), pack / "1f600.png")
+                    self.assertEqual(resolver.resolve("😎"), override / "1f60e.png")
+                    with self.assertRaises(FileNotFoundError):
+                        resolver.resolve("🙂")
+            self.assertEqual(scandir.call_count, 2)
+            self.assertEqual(resolver.resolved(), {"😀": pack / "1f600.png", "😎": override / "1f60e.png"})
+
+    def test_manifest_replaces_listing_until_pack_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pack = self.make_pack(root, ["1f600.png"])
+            manifest = root / "cache" / "pack.json"
+            EmojiAssetResolver(root, "twemoji-72x72", None, SilentLogger(), manifest).resolve("😀")
+            self.assertEqual(json.loads(manifest.read_text(encoding="utf-8"))["files"], ["1f600.png"])
+
+            with mock.patch("emoji_overlay_video_builder.os.scandir", side_effect=AssertionError("listed")):
+                resolver = EmojiAssetResolver(root, "twemoji-72x72", None, SilentLogger(), manifest)
+                self.assertEqual(resolver.resolve("😀"), pack / "1f600.png")
+
+            (pack / "1f60e.png").write_bytes(b"png")
+            os.utime(pack, ns=(0, pack.stat().st_mtime_ns + 1))
+            resolver = EmojiAssetResolver(root, "twemoji-72x72", None, SilentLogger(), manifest)
+            self.assertEqual(resolver.resolve("😎"), pack / "1f60e.png")
+
+
+class FakeRunner:
+    def __init__(self, codes=None):
+        self.codes = list(codes or [])
+        self.calls = []
+
+    def run(self, args):
+        self.calls.append(list(args))
+        return self.codes.pop(0) if self.codes else 0
+
+    def run_piped(self, args, chunks):
+        self.piped = [bytes(chunk) for chunk in chunks]
+        return self.run(args)
+
+    def metrics(self):
+        return []
+
+
+class SilentLogger:
+    def info(self, message: str) -> None:
+        return None
+
+    def warning(self, message: str) -> None:
+        return None
+
+    def error(self, message: str) -> None:
+        return None
+
+
+class FramesModeTests(unittest.TestCase):
+    def make_config(self):
+        return AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(mode="frames", tmp_dir="out/.tmp_frames"),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=[
+                CueConfig(text="😀😎", start=1.0, end=3.0, typing_duration=1.0),
+                CueConfig(text="😀", start=4.0, end=5.0),
+            ],
+        )
+
+    def test_one_keyframe_per_distinct_state(self):
+        plan = FramesRenderPlanner().plan(Path("/tmp/work"), self.make_config(), DummyResolver(Path("/tmp/emoji")))
+        # blank, [😀] (shared by typing step 1 and cue #2), [😀😎] + the final concat encode
+        self.assertEqual(len(plan.commands), 4)
+        concat_path, concat = plan.files[0]
+        self.assertEqual(concat_path, Path("/tmp/work/out/.tmp_frames/frames.ffconcat"))
+        durations = [line for line in concat.splitlines() if line.startswith("duration")]
+        # frame-exact: blank 0-30, 😀 31-44, 😀😎 45-90, blank 91-119, 😀 120-150, blank tail
+        self.assertEqual(
+            durations,
+            ["duration 1.033333", "duration 0.466667", "duration 1.533333", "duration 0.966667", "duration 1.033333"],
+        )
+        self.assertEqual(concat.count("option framerate 30"), concat.count("file '"))
+        typed_state = plan.commands[2]
+        self.assertEqual(typed_state[typed_state.index("-pix_fmt") + 1], "rgb24")
+        self.assertIn("[1:v]scale=72:72[e1_0]", typed_state[typed_state.index("-filter_complex") + 1])
+        encode = plan.commands[-1]
+        self.assertIn("concat", encode)
+        self.assertNotIn("-filter_complex", encode)
+
+    def test_back_to_back_cues_keep_every_duration_positive(self):
+        config = replace(
+            self.make_config(),
+            cues=[CueConfig(text="😀", start=1.0, end=2.0), CueConfig(text="😎", start=2.0, end=3.0)],
+        )
+        plan = FramesRenderPlanner().plan(Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")))
+        durations = [line for line in plan.files[0][1].splitlines() if line.startswith("duration")]
+        self.assertTrue(all(float(line.split()[1]) > 0 for line in durations), durations)
+        # blank 0-29, 😀 30-60 (keeps the shared frame 60), 😎 61-90, blank tail
+        self.assertEqual(durations, ["duration 1.000000", "duration 1.033333", "duration 1.000000"])
+
+    def test_build_plan_writes_files_and_stops_on_failure(self):
+        fs = FakeFs(set())
+        runner = FakeRunner(codes=[0, 1])
+        plan = RenderPlan(stages=[[["ffmpeg", "a"], ["ffmpeg", "b"]], [["ffmpeg", "c"]]], files=[(Path("/tmp/l.txt"), "x")])
+        code = BuildService(fs, runner, SilentLogger()).build_plan(plan, Path("/tmp/out/final.mp4"))
+        self.assertEqual(code, 1)
+        self.assertEqual(len(runner.calls), 2)
+        self.assertEqual(fs.written[Path("/tmp/l.txt")], "x")
+
+    def test_build_plan_promotes_outputs_only_after_success(self):
+        fs = FakeFs(set())
+        plan = RenderPlan(stages=[[["ffmpeg", "a"]]], promotions=[(Path("/tmp/a.mp4"), Path("/tmp/c/a.mp4"))])
+        BuildService(fs, FakeRunner(codes=[1]), SilentLogger()).build_plan(plan, Path("/tmp/o.mp4"))
+        self.assertNotIn(Path("/tmp/c/a.mp4"), fs.existing)
+        BuildService(fs, FakeRunner(), SilentLogger()).build_plan(plan, Path("/tmp/o.mp4"))
+        self.assertIn(Path("/tmp/c/a.mp4"), fs.existing)
+
+
+class FakeProbe:
+    def __init__(self, duration, audio=None):
+        self._duration = duration
+        self._audio = audio
+
+    def duration(self, path):
+        return self._duration
+
+    def audio_stream(self, path):
+        return self._audio
+
+
+class MissingProbe:
+    def duration(self, path):
+        raise FileNotFoundError(2, "No such file or directory", "ffprobe")
+
+    def audio_stream(self, path):
+        raise FileNotFoundError(2, "No such file or directory", "ffprobe")
+
+
+def write_cli_workdir(workdir: Path, **extra) -> FakeFs:
+    config = {"inputs": {"background": "bg.png", "audio": "audio.wav", "emojiOverrideDir": "emoji"}, **extra}
+    config.setdefault("cues", [{"text": "😀", "start": 0.0, "end": 1.0}])
+    (workdir / "config.json").write_text(json.dumps(config), encoding="utf-8")
+    (workdir / "emoji").mkdir()
+    (workdir / "emoji" / "1f600.png").write_bytes(b"png")
+    return FakeFs({workdir / "bg.png", workdir / "audio.wav", workdir / "emoji"})
+
+
+class PathHasher(ContentHasher):
+    def file_digest(self, path: Path) -> str:
+        return str(path)
+
+
+class SegmentedBuildTests(unittest.TestCase):
+    def test_pruner_removes_oldest_unreferenced_entries_beyond_the_limit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            entries = {}
+            caches = [".segment_cache", ".audio_cache", ".segment_cache", ".background_cache"]
+            for age, (cache, name) in enumerate(zip(caches, ["old.mp4", "used.m4a", "mid.mp4", "new.png"])):
+                path = out / cache / name
+                path.parent.mkdir(exist_ok=True)
+                path.write_bytes(b"x" * 100)
+                os.utime(path, ns=(0, (age + 1) * 10**9))
+                entries[name] = path
+            os.utime(entries["used.m4a"], ns=(0, 1))  # oldest, but the plan reads it
+            plan = RenderPlan(stages=[[["ffmpeg", "-i", str(entries["used.m4a"]), "out.mp4"]]])
+
+            removed = OutputCachePruner(SilentLogger()).prune(out, plan, max_bytes=250)
+
+            self.assertEqual(removed, (2, 200))
+            self.assertEqual(sorted(path.name for path in entries.values() if path.exists()), ["new.png", "used.m4a"])
+
+    def test_missing_ffprobe_is_a_clean_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fs = write_cli_workdir(Path(tmp))
+            logger = RecordingLogger()
+            argv = ["build", "--workdir", tmp, "--jobs", "2", "--no-audio-cache", "--no-background-cache"]
+            self.assertEqual(CliApp(fs, FakeRunner(), logger, probe=MissingProbe()).run(argv), 2)
+            self.assertTrue(any(level == "error" and "ffprobe" in text for level, text in logger.messages))
+
+    def test_segmenter_prefers_cue_free_gaps_and_covers_timeline(self):
+        cues = [CueConfig(text="😀", start=0.5, end=4.5), CueConfig(text="😀", start=5.5, end=9.5)]
+        windows = TimelineSegmenter(fps=30).split(cues, duration=10.0, count=2)
+        self.assertEqual([(w.start, w.end) for w in windows], [(0.0, 5.0), (5.0, 10.0)])
+
+    def test_window_rebase_keeps_overlapping_cues(self):
+        cues = [CueConfig(text="😀", start=1.0, end=2.0), CueConfig(text="😎", start=4.0, end=6.0)]
+        rebased = TimeWindow(start=5.0, end=8.0).rebase(cues)
+        self.assertEqual(len(rebased), 1)
+        self.assertEqual((rebased[0].start, rebased[0].end), (-1.0, 1.0))
+
+    def test_segment_plan_renders_video_only_and_joins_with_stream_copy(self):
+        config = AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=[CueConfig(text="😀", start=0.5, end=1.5), CueConfig(text="😎", start=6.0, end=7.0)],
+        )
+        plan = SegmentedRenderPlanner(FakeProbe(12.0), FakeFs(set()), SilentLogger()).plan(
+            Path("/tmp/work"), config, DummyResolver(Path("/tmp/emoji")), jobs=2
+        )
+        segments, join = plan.stages
+        self.assertEqual(len(segments), 4)
+        for command in segments:
+            self.assertIn("-an", command)
+            self.assertIn("-frames:v", command)
+        self.assertEqual(sum(int(c[c.index("-frames:v") + 1]) for c in segments), 360)
+        self.assertEqual(join[0][join[0].index("-c:v") + 1], "copy")
+        self.assertEqual(plan.files[0][1].count("file '"), 4)
+
+    def test_incremental_plan_reuses_cached_segments_and_rerenders_dirty_ones(self):
+        config = AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=[CueConfig(text="😀", start=0.5, end=1.5), CueConfig(text="😎", start=6.0, end=7.0)],
+        )
+        workdir = Path("/tmp/work")
+        resolver = DummyResolver(Path("/tmp/emoji"))
+
+        first = SegmentedRenderPlanner(FakeProbe(12.0), FakeFs(set()), SilentLogger(), PathHasher()).plan(
+            workdir, config, resolver, jobs=1, cache=True
+        )
+        self.assertEqual(len(first.stages[0]), 2)
+        self.assertEqual(first.frame_stage, 0)  # metrics count the segment renders, not the stream-copy join
+        cached = {destination for _, destination in first.promotions}
+        self.assertTrue(all(path.parent == workdir / "out" / ".segment_cache" for path in cached))
+
+        edited = replace(config, cues=[config.cues[0], replace(config.cues[1], end=7.5)])
+        second = SegmentedRenderPlanner(FakeProbe(12.0), FakeFs(cached), SilentLogger(), PathHasher()).plan(
+            workdir, edited, resolver, jobs=1, cache=True
+        )
+        self.assertEqual(len(second.stages[0]), 1)
+        self.assertEqual(len(second.promotions), 1)
+        self.assertEqual(second.files[0][1].count(".segment_cache"), 1)
+
+        with mock.patch("emoji_overlay_video_builder.SEGMENT_CACHE_VERSION", 2):
+            bumped = SegmentedRenderPlanner(FakeProbe(12.0), FakeFs(cached), SilentLogger(), PathHasher()).plan(
+                workdir, config, resolver, jobs=1, cache=True
+            )
+        self.assertEqual(len(bumped.stages[0]), 2)
+
+    def test_build_plan_runs_stage_concurrently(self):
+        runner = FakeRunner()
+        plan = RenderPlan(stages=[[["ffmpeg", str(n)] for n in range(4)], [["ffmpeg", "join"]]])
+        code = BuildService(FakeFs(set()), runner, SilentLogger()).build_plan(plan, Path("/tmp/o.mp4"), jobs=3)
+        self.assertEqual(code, 0)
+        self.assertEqual(runner.calls[-1], ["ffmpeg", "join"])
+        self.assertEqual(len(runner.calls), 5)
+
+
+FAKE_FFMPEG = """#!{python}
+import sys
+for frame in (12, 48):
+    print(f"frame={{frame}}\\nfps=24.0\\nbitrate=812.5kbits/s\\ntotal_size=4096\\nout_time_us={{frame * 125000}}\\nspeed=2.5x")
+    print("progress=" + ("end" if frame == 48 else "continue"), flush=True)
+sys.exit(3 if "fail" in sys.argv else 0)
+"""
+
+
+class ScriptedMetricsRunner(FakeRunner):
+    """Records a RunMetrics per command, with the progress scripted per output argument."""
+
+    def __init__(self, progress):
+        super().__init__()
+        self._progress = progress
+        self._metrics = []
+
+    def run(self, args):
+        self._metrics.append(RunMetrics(tuple(args), 0, 1.0, None, self._progress.get(args[-1])))
+        return super().run(args)
+
+    def metrics(self):
+        return list(self._metrics)
+
+
+def progress(frame, bitrate=None, size=None, fps=30):
+    return ProgressSnapshot(frame, float(fps), frame / fps, 1.0, bitrate, size, True)
+
+
+class ProgressMetricsTests(unittest.TestCase):
+    def build_metrics(self, plan, progress_by_output, out_file=Path("/w/out/final.mp4")):
+        fs = FakeFs(set())
+        metrics_file = Path("/w/out/final.metrics.json")
+        runner = ScriptedMetricsRunner(progress_by_output)
+        self.assertEqual(BuildService(fs, runner, SilentLogger()).build_plan(plan, out_file, 2, metrics_file), 0)
+        return json.loads(fs.written[metrics_file])
+
+    def test_segmented_headline_sums_the_segment_renders(self):
+        plan = RenderPlan(
+            stages=[
+                [["ffmpeg", "-i", "a.wav", "a.m4a"]],
+                [["ffmpeg", "seg0.mp4"], ["ffmpeg", "seg1.mp4"]],
+                [["ffmpeg", "-c:v", "copy", "/w/out/final.mp4"]],
+            ],
+            frame_stage=1,
+        )
+        report = self.build_metrics(
+            plan,
+            {
+                "a.m4a": progress(0),
+                "seg0.mp4": progress(600),
+                "seg1.mp4": progress(637),
+                "/w/out/final.mp4": progress(0, bitrate=900.0, size=5000),
+            },
+        )
+        self.assertEqual(report["frames"], 1237)
+        self.assertGreater(report["encodeFps"], 0)
+        self.assertGreater(report["speed"], 0)
+        self.assertEqual((report["bitrateKbits"], report["outputBytes"]), (900.0, 5000))
+
+    def test_rendition_pass_does_not_replace_the_primary_render_in_the_headline(self):
+        plan = RenderPlan(
+            stages=[[["ffmpeg", "/w/out/final.mp4"]], [["ffmpeg", "-i", "/w/out/final.mp4", "/w/out/720p.mp4"]]],
+            frame_stage=0,
+        )
+        report = self.build_metrics(
+            plan,
+            {"/w/out/final.mp4": progress(300, 1200.0, 9000), "/w/out/720p.mp4": progress(300, 400.0, 3000)},
+        )
+        self.assertEqual(report["frames"], 300)
+        self.assertEqual((report["bitrateKbits"], report["outputBytes"]), (1200.0, 9000))
+
+    def test_parser_emits_one_snapshot_per_progress_block(self):
+        parser = ProgressParser()
+        lines = ["frame=0", "fps=0.00", "bitrate=N/A", "out_time_us=N/A", "speed=N/A", "progress=continue"]
+        lines += ["frame=90", "fps=29.5", "bitrate=1024.0kbits/s", "out_time_us=3000000", "speed=1.5x", "progress=end"]
+        snapshots = [snap for snap in map(parser.feed, lines) if snap is not None]
+        self.assertEqual(len(snapshots), 2)
+        self.assertIsNone(snapshots[0].speed)
+        self.assertEqual((snapshots[1].frame, snapshots[1].out_seconds, snapshots[1].speed), (90, 3.0, 1.5))
+        self.assertEqual(snapshots[1].bitrate_kbits, 1024.0)
+        self.assertTrue(snapshots[1].done)
+
+    @unittest.skipIf(os.name == "nt", "fake ffmpeg is a POSIX script")
+    def test_runner_attaches_progress_and_build_writes_metrics(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ffmpeg = Path(tmp) / "ffmpeg"
+            ffmpeg.write_text(FAKE_FFMPEG.format(python=sys.executable), encoding="utf-8")
+            ffmpeg.chmod(0o755)
+            command = [str(ffmpeg), "-t", "6", "-filter_complex", "null", "out.mp4"]
+            fs = FakeFs(set())
+            runner = SubprocessRunner()
+            metrics_file = Path(tmp) / "final.metrics.json"
+
+            code = BuildService(fs, runner, SilentLogger()).build_plan(
+                RenderPlan(stages=[[command]]), Path(tmp) / "final.mp4", metrics_file=metrics_file
+            )
+
+            self.assertEqual(code, 0)
+            [run] = runner.metrics()
+            self.assertEqual(run.args, tuple(command))
+            self.assertEqual(run.progress.frame, 48)
+            report = json.loads(fs.written[metrics_file])
+            self.assertEqual(report["frames"], 48)
+            self.assertEqual(report["bitrateKbits"], 812.5)
+            self.assertEqual(report["outputBytes"], 4096)
+            self.assertEqual(report["filterGraphBytes"], 4)
+            self.assertGreater(report["encodeFps"], 0)
+            if hasattr(os, "wait4"):
+                self.assertGreater(report["peakRssKb"], 0)
+
+            self.assertEqual(runner.run([str(ffmpeg), "fail"]), 3)
+
+    def test_expected_duration_probes_each_input_once(self):
+        probe = FakeProbe(12.0)
+        runner = SubprocessRunner(probe=probe)
+        with mock.patch.object(probe, "duration", wraps=probe.duration) as duration:
+            self.assertIsNone(runner._expected_seconds(["ffmpeg", "-i", "state.png", "-frames:v", "1", "key.png"]))
+            for _ in range(3):
+                self.assertEqual(runner._expected_seconds(["ffmpeg", "-i", "audio.wav", "out.mp4"]), 12.0)
+        self.assertEqual([call.args[0] for call in duration.call_args_list], [Path("audio.wav")])
+
+
+class AudioCacheTests(unittest.TestCase):
+    def make_config(self) -> AppConfig:
+        return AppConfig(
+            inputs=InputsConfig("bg.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(tmp_dir="out/.tmp"),
+            layout=LayoutConfig(),
+            output=OutputConfig(file="out/final.mp4"),
+            cues=[],
+        )
+
+    def test_miss_encodes_once_then_hit_is_stream_copied(self):
+        workdir = Path("/tmp/work")
+        fs = FakeFs(set())
+        cache = AudioCache(FakeProbe(10.0, AudioStreamInfo("pcm_s16le", 48000, 2)), fs, SilentLogger(), PathHasher())
+        miss = cache.prepare(workdir, self.make_config())
+        self.assertIn("-vn", miss.encode)
+        self.assertEqual(miss.encode[miss.encode.index("-c:a") + 1], "aac")
+        encoded, cached = miss.promotion
+        self.assertEqual(miss.track.path, encoded)
+        self.assertEqual(cached.parent, workdir / "out" / ".audio_cache")
+
+        fs.move(encoded, cached)
+        hit = cache.prepare(workdir, self.make_config())
+        self.assertIsNone(hit.encode)
+        self.assertEqual(hit.track.path, cached)
+        self.assertEqual(hit.track.codec_args(), ["-c:a", "copy", "-t", "10.000000"])
+
+    def test_aac_source_is_copied_directly(self):
+        probe = FakeProbe(10.0, AudioStreamInfo("aac", 44100, 2))
+        prepared = AudioCache(probe, FakeFs(set()), SilentLogger(), PathHasher()).prepare(Path("/w"), self.make_config())
+        self.assertEqual(prepared.track.path, Path("/w/audio.wav"))
+        self.assertTrue(prepared.track.copy)
+        self.assertIsNone(prepared.encode)
+
+    def test_unknown_duration_encodes_inline(self):
+        prepared = AudioCache(FakeProbe(None), FakeFs(set()), SilentLogger(), PathHasher()).prepare(
+            Path("/w"), self.make_config()
+        )
+        self.assertFalse(prepared.track.copy)
+        self.assertIsNone(prepared.encode)
+
+
+class BackgroundAndProfileTests(unittest.TestCase):
+    def make_config(self, video: VideoConfig) -> AppConfig:
+        return AppConfig(
+            inputs=InputsConfig("bg.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=video,
+            render=RenderConfig(tmp_dir="out/.tmp"),
+            layout=LayoutConfig(),
+            output=OutputConfig(file="out/final.mp4"),
+            cues=[CueConfig(text="😀", start=0.0, end=1.0)],
+        )
+
+    def test_background_is_scaled_once_per_size_then_reused(self):
+        workdir = Path("/tmp/work")
+        fs = FakeFs(set())
+        cache = BackgroundCache(fs, SilentLogger(), PathHasher())
+        miss = cache.prepare(workdir, self.make_config(VideoConfig()))
+        self.assertIn("scale=1280:720", miss.scale)
+        scaled, cached = miss.promotion
+        self.assertEqual(miss.path, scaled)
+        self.assertEqual(cached.parent, workdir / "out" / ".background_cache")
+
+        fs.move(scaled, cached)
+        hit = cache.prepare(workdir, self.make_config(VideoConfig()))
+        self.assertIsNone(hit.scale)
+        self.assertEqual(hit.path, cached)
+        self.assertIsNotNone(cache.prepare(workdir, self.make_config(VideoConfig(width=640, height=360))).scale)
+
+        target = RenderTarget(output=workdir / "out" / "final.mp4", background=hit.path)
+        cmd = FfmpegCommandFactory().build(workdir, self.make_config(VideoConfig()), DummyResolver(Path("/e")), target)
+        self.assertEqual(cmd[cmd.index("-i") + 1], str(cached))
+
+    def test_dry_run_and_probe_do_not_prepare_the_audio_or_background(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fs = write_cli_workdir(Path(tmp))
+            for command in (["build", "--dry-run"], ["probe"]):
+                argv = [*command, "--workdir", tmp]
+                with mock.patch.object(AudioCache, "prepare") as prepare_audio, mock.patch("builtins.print") as printed:
+                    with mock.patch.object(BackgroundCache, "prepare") as prepare_background:
+                        self.assertEqual(CliApp(fs, FakeRunner(), SilentLogger(), probe=MissingProbe()).run(argv), 0)
+                prepare_audio.assert_not_called()
+                prepare_background.assert_not_called()
+                self.assertEqual(len(printed.call_args_list), 1)
+
+    def test_profile_sets_x264_options_and_fields_override_it(self):
+        video = VideoConfig(fps=25, profile="static", preset="faster", threads=4)
+        self.assertEqual(
+            video.encoding().x264_args(video.fps),
+            ["-preset", "faster", "-tune", "stillimage", "-threads", "4", "-g", "250"],
+        )
+        config = self.make_config(video)
+        cmd = FfmpegCommandFactory().build(Path("/w"), config, DummyResolver(Path("/e")))
+        self.assertEqual(cmd[cmd.index("-tune") + 1], "stillimage")
+        self.assertEqual(cmd[cmd.index("-g") + 1], "250")
+        preview = FfmpegCommandFactory().build(
+            Path("/w"), config, DummyResolver(Path("/e")), RenderTarget(output=Path("/w/p.mp4"), preset="ultrafast")
+        )
+        self.assertEqual(preview[preview.index("-preset") + 1], "ultrafast")
+
+        errors = ValidationService(FakeFs(set())).validate(
+            Path("/w"), self.make_config(VideoConfig(profile="nope")), Path("/assets"), "twemoji-72x72", None
+        )
+        self.assertIn("Unknown encoding profile: nope", "\n".join(errors))
+
+
+class RecordingLogger(SilentLogger):
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message: str) -> None:
+        self.messages.append(("info", message))
+
+    def warning(self, message: str) -> None:
+        self.messages.append(("warning", message))
+
+    def error(self, message: str) -> None:
+        self.messages.append(("error", message))
+
+
+class CostEstimatorTests(unittest.TestCase):
+    def test_counts_graph_nodes_sources_and_overlay_rate(self):
+        config = AppConfig(
+            inputs=InputsConfig("bg.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=[CueConfig(text="😀😎😀", start=0.0, end=1.0), CueConfig(text="😎", start=1.5, end=2.0)],
+        )
+        resolver = DummyResolver(Path("/e"))
+        plan = RenderPlan(stages=[[FfmpegCommandFactory().build(Path("/w"), config, resolver)]])
+        cost = CostEstimator(FakeFs(set())).estimate(config, resolver, plan)
+        self.assertEqual((cost.inputs, cost.overlay_nodes, cost.unique_assets), (4, 4, 2))
+        self.assertEqual(cost.overlay_evals_per_second, 120)
+        self.assertGreater(cost.decoder_memory_mb, 6.0)
+
+        limits = CostLimits(warn={"overlayNodes": 3}, fail={"uniqueAssets": 1})
+        warnings, failures = CostEstimator.check(cost, limits)
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("uniqueAssets=2 exceeds the fail limit 1", failures[0])
+
+    def test_fail_limit_stops_build_unless_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            config = {
+                "inputs": {"background": "bg.png", "audio": "audio.wav", "emojiOverrideDir": "emoji"},
+                "limits": {"fail": {"overlayNodes": 1}, "warn": {"decoderMemoryMb": None}},
+                "cues": [{"text": "😀😀", "start": 0.0, "end": 1.0}],
+            }
+            (workdir / "config.json").write_text(json.dumps(config), encoding="utf-8")
+            (workdir / "emoji").mkdir()
+            (workdir / "emoji" / "1f600.png").write_bytes(b"png")
+            self.assertNotIn("decoderMemoryMb", ConfigLoader(workdir).load().limits.warn)
+            fs = FakeFs({workdir / "bg.png", workdir / "audio.wav", workdir / "emoji"})
+            argv = ["build", "--workdir", str(workdir), "--no-audio-cache", "--no-background-cache"]
+            runner = FakeRunner()
+            logger = RecordingLogger()
+            self.assertEqual(CliApp(fs, runner, logger).run(argv), 2)
+            self.assertEqual(runner.calls, [])
+            self.assertTrue(any(level == "error" and "overlayNodes=2" in text for level, text in logger.messages))
+
+            self.assertEqual(CliApp(fs, runner, SilentLogger()).run(argv + ["--ignore-limits"]), 0)
+            self.assertEqual(len(runner.calls), 1)
+
+
+class WatchTests(unittest.TestCase):
+    def make_config(self, cues, background="bg.png") -> AppConfig:
+        return AppConfig(
+            inputs=InputsConfig(background, "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=1000),
+            video=VideoConfig(),
+            render=RenderConfig(),
+            layout=LayoutConfig(),
+            output=OutputConfig(),
+            cues=cues,
+        )
+
+    def test_watcher_reports_one_debounced_change_set(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "emoji").mkdir()
+            (root / "config.json").write_text("{}", encoding="utf-8")
+            now = [0.0]
+            edits = [
+                lambda: (root / "config.json").write_text('{"a": 1}', encoding="utf-8"),
+                lambda: (root / "emoji" / "1f600.png").write_bytes(b"png"),
+            ]
+
+            def sleep(seconds):
+                now[0] += seconds
+                if edits:
+                    edits.pop(0)()
+
+            watcher = WorkdirWatcher(sleep=sleep, clock=lambda: now[0])
+            watcher.watch([root / "config.json", root / "emoji", root / "missing.wav"])
+            self.assertEqual(watcher.changes(), [])
+            changed = watcher.wait(interval=0.1, debounce=0.25)
+            self.assertEqual(changed, [root / "config.json", root / "emoji" / "1f600.png"])
+            self.assertGreaterEqual(now[0], 0.45)
+
+    def test_rewatching_keeps_the_baseline_of_paths_already_watched(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "emoji").mkdir()
+            (root / "config.json").write_text("{}", encoding="utf-8")
+            (root / "bg.png").write_bytes(b"png")
+            watcher = WorkdirWatcher()
+            watcher.watch([root / "config.json", root / "emoji"])
+
+            # edited while the config was being loaded, before the watch list is refreshed
+            (root / "config.json").write_text('{"a": 1}', encoding="utf-8")
+            (root / "emoji" / "1f600.png").write_bytes(b"png")
+            watcher.watch([root / "config.json", root / "emoji", root / "bg.png"])
+
+            self.assertEqual(watcher.changes(), [root / "config.json", root / "emoji" / "1f600.png"])
+
+    def test_affected_window_covers_only_changed_cues(self):
+        workdir = Path("/w")
+        a, b = Path("/e/a.png"), Path("/e/b.png")
+        old = self.make_config([CueConfig("x", 1.0, 2.0), CueConfig("y", 10.0, 11.0)])
+        new = self.make_config([CueConfig("x", 1.0, 2.0), CueConfig("y", 12.0, 13.0)])
+        last = TimeWindow(0.0, 5.0)
+        assets = [(a,), (b,)]
+        window = WatchPlanner.affected_window(workdir, old, new, assets, assets, [workdir / "config.json"], last)
+        self.assertEqual(window, TimeWindow(9.5, 13.5))
+        self.assertIsNone(WatchPlanner.affected_window(workdir, old, old, assets, assets, [], last))
+        self.assertEqual(WatchPlanner.affected_window(workdir, old, old, assets, assets, [a], last), TimeWindow(0.5, 2.5))
+        self.assertEqual(WatchPlanner.affected_window(workdir, old, old, assets, assets, [workdir / "bg.png"], last), last)
+
+    def test_watch_rerenders_edited_cue_window(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            (workdir / "emoji").mkdir()
+            (workdir / "emoji" / "1f600.png").write_bytes(b"png")
+            config = {
+                "inputs": {"background": "bg.png", "audio": "audio.wav", "emojiOverrideDir": "emoji"},
+                "cues": [{"text": "😀", "start": 1.0, "end": 2.0}, {"text": "😀", "start": 20.0, "end": 21.0}],
+            }
+            (workdir / "config.json").write_text(json.dumps(config), encoding="utf-8")
+
+            class ScriptedWatcher:
+                def __init__(self):
+                    self.watched = []
+
+                def watch(self, paths):
+                    self.watched.append(list(paths))
+
+                def wait(self, interval, debounce):
+                    if len(self.watched) > 2:
+                        raise KeyboardInterrupt
+                    config["cues"][1]["start"] = 30.0
+                    config["cues"][1]["end"] = 31.0
+                    (workdir / "config.json").write_text(json.dumps(config), encoding="utf-8")
+                    return [workdir / "config.json"]
+
+            watcher = ScriptedWatcher()
+            fs = FakeFs({workdir / "bg.png", workdir / "audio.wav", workdir / "emoji"})
+            runner = FakeRunner()
+            code = CliApp(fs, runner, SilentLogger(), watcher=watcher).run(["watch", "--workdir", str(workdir)])
+
+            self.assertEqual(code, 0)
+            self.assertEqual(len(runner.calls), 2)
+            first, second = runner.calls
+            self.assertEqual(first[first.index("-ss") + 1], "0.000000")
+            self.assertEqual(second[second.index("-ss") + 1], "19.500000")
+            self.assertEqual(second[second.index("-t") + 1], "12.000000")
+            self.assertIn(workdir / "emoji", watcher.watched[-1])
+
+
+class RawVideoModeTests(unittest.TestCase):
+    def test_missing_ffprobe_is_a_clean_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fs = write_cli_workdir(Path(tmp), render={"mode": "rawvideo"})
+            logger = RecordingLogger()
+            argv = ["build", "--workdir", tmp, "--no-audio-cache", "--no-background-cache"]
+            self.assertEqual(CliApp(fs, FakeRunner(), logger, probe=MissingProbe()).run(argv), 2)
+            self.assertTrue(any(level == "error" and "ffprobe" in text for level, text in logger.messages))
+
+    def test_build_plan_pipes_frame_source_into_last_stage(self):
+        runner = FakeRunner()
+        plan = RenderPlan(stages=[[["ffmpeg", "-i", "-", "out.mp4"]]], frame_source=lambda: iter([b"ab", b"ab"]))
+        code = BuildService(FakeFs(set()), runner, SilentLogger()).build_plan(plan, Path("/tmp/out.mp4"))
+        self.assertEqual(code, 0)
+        self.assertEqual(runner.piped, [b"ab", b"ab"])
+
+    def test_frame_source_feeds_its_own_stage_when_renditions_follow(self):
+        runner = FakeRunner()
+        plan = RenderPlan(
+            stages=[[["ffmpeg", "-i", "-", "out.mp4"]], [["ffmpeg", "derive"]]],
+            frame_source=lambda: iter([b"ab"]),
+            frame_stage=0,
+        )
+        BuildService(FakeFs(set()), runner, SilentLogger()).build_plan(plan, Path("/tmp/out.mp4"))
+        self.assertEqual(runner.piped, [b"ab"])
+        self.assertEqual(runner.calls, [["ffmpeg", "-i", "-", "out.mp4"], ["ffmpeg", "derive"]])
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+    def test_compositor_blends_only_on_state_changes(self):
+        import numpy as np
+
+        class ArrayLoader:
+            def load_rgb(self, path, width, height):
+                return np.zeros((height, width, 3), dtype=np.uint8)
+
+            def load_rgba(self, path, size):
+                sprite = np.full((size, size, 4), 255, dtype=np.uint8)
+                sprite[:, :, 3] = 128
+                return sprite
+
+        config = AppConfig(
+            inputs=InputsConfig("background.png", "audio.wav", "twemoji-72x72", None),
+            safe_area=SafeAreaConfig(width=40),
+            video=VideoConfig(width=40, height=10, fps=10),
+            render=RenderConfig(mode="rawvideo"),
+            layout=LayoutConfig(emoji_size=4, gap=2, top_margin=2),
+            output=OutputConfig(),
+            cues=[CueConfig(text="😀😎", start=0.5, end=1.0, typing_duration=0.3)],
+        )
+        compositor = RawFrameCompositor(config, ArrayLoader())
+        frames = [bytes(f) for f in compositor.frames(Path("bg.png"), [[Path("a.png"), Path("b.png")]], 15)]
+        self.assertEqual(len(frames), 15)
+        self.assertEqual(len(set(frames)), 3)
+        first_cell = np.frombuffer(frames[6], dtype=np.uint8).reshape(10, 40, 3)[2:6, 0:4]
+        self.assertTrue((first_cell == 128).all())
+        self.assertEqual(frames[12], frames[0])
+
+
 class CliPrecedenceTests(unittest.TestCase):
     def test_emoji_pack_arg_default_is_none(self):
         parser = __import__('argparse').ArgumentParser()
@@ -171,6 +1245,68 @@ class CliPrecedenceTests(unittest.TestCase):
         self.assertIsNone(args.emoji_pack)
 
 
+class BatchTests(unittest.TestCase):
+    def test_batch_keeps_going_and_reports_each_job(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            emoji_dir = root / "emoji"
+            emoji_dir.mkdir()
+            (emoji_dir / "1f600.png").write_bytes(b"png")
+            existing = set()
+            for name, text in [("ep1", "😀"), ("ep2", "😀😀"), ("ep3", "😎")]:
+                workdir = root / name
+                workdir.mkdir()
+                config = {
+                    "inputs": {"background": "bg.png", "audio": "audio.wav"},
+                    "cues": [{"text": text, "start": 0.0, "end": 1.0}],
+                }
+                (workdir / "config.json").write_text(json.dumps(config), encoding="utf-8")
+                existing |= {workdir / "bg.png", workdir / "audio.wav"}
+            fs = FakeFs(existing | {emoji_dir})
+            runner = FakeRunner(codes=[0, 1])
+            report = root / "report.json"
+
+            with mock.patch("emoji_overlay_video_builder.os.scandir", wraps=os.scandir) as scandir:
+                code = CliApp(fs, runner, SilentLogger()).run(
+                    [
+                        "batch",
+                        str(root / "ep*"),
+                        "--emoji-dir",
+                        str(emoji_dir),
+                        "--max-parallel",
+                        "1",
+                        "--report",
+                        str(report),
+                        "--no-audio-cache",
+                        "--no-background-cache",
+                    ]
+                )
+
+            self.assertEqual(code, 2)
+            self.assertEqual(len(runner.calls), 2)
+            self.assertEqual([call.args[0] for call in scandir.call_args_list].count(emoji_dir), 1)
+            self.assertEqual(
+                [(Path(job["workdir"]).name, job["exitCode"]) for job in json.loads(fs.written[report])],
+                [("ep1", 0), ("ep2", 1), ("ep3", 2)],
+            )
+
+    def test_report_directory_is_created(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp) / "ep1"
+            workdir.mkdir()
+            write_cli_workdir(workdir)
+            (workdir / "bg.png").write_bytes(b"png")
+            (workdir / "audio.wav").write_bytes(b"wav")
+            report = Path(tmp) / "reports" / "batch.json"
+
+            argv = ["batch", str(workdir), "--dry-run", "--report", str(report), "--no-audio-cache", "--no-background-cache"]
+            with mock.patch("builtins.print"):
+                code = CliApp(LocalFileSystem(), FakeRunner(), SilentLogger()).run(argv)
+
+            self.assertEqual(code, 0)
+            self.assertEqual(json.loads(report.read_text(encoding="utf-8")), [{"workdir": str(workdir), "exitCode": 0}])
+
+
 class CommandPrinterTests(unittest.TestCase):
     def test_posix_shell_printing(self):
         cmd = ['ffmpeg', '-i', '/tmp/has space/in.mp4']